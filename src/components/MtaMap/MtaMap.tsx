@@ -40,6 +40,10 @@ import {
   getADAPctByComplex,
   getCurrentElevatorCount,
 } from "@/utils/dataUtils";
+import { loadElevatorCoordinatesInView } from "@/utils/elevatorOutageGeometry";
+import { loadStationCoordinatesInView } from "@/utils/accessibleStationGeometry";
+import { loadComplexCoordinatesInView } from "@/utils/ComplexGeometry";
+import { Bounds } from "@/utils/packedCoordinates";
 import SearchBar from "../SearchBar/SearchBar";
 import { MtaStationData } from "@/utils/types";
 import { IoEarthSharp } from "react-icons/io5";
@@ -201,19 +205,50 @@ const MtaMap = () => {
     );
   };
 
+  // no-ops for inline lookups; packed ones (--ts-format packed) import the borough chunks overlapping
+  // the map view. resolves to true when new chunks came in, so the layers built from them need a redraw
+  async function loadCoordinatesInView() {
+    const bounds = (mapRef.current as mapboxgl.Map)?.getBounds();
+    if (!bounds) return false;
+    const view: Bounds = [bounds.getWest(), bounds.getSouth(), bounds.getEast(), bounds.getNorth()];
+    const loaded = await Promise.all([
+      loadElevatorCoordinatesInView(view),
+      loadStationCoordinatesInView(view),
+      loadComplexCoordinatesInView(view),
+    ]);
+    return loaded.some(Boolean);
+  }
+
+  function redrawOutageLayers() {
+    const map = mapRef.current as mapboxgl.Map;
+    if (map?.getSource("outage-data") && elevatorRawDataRef.current) {
+      updateOutageLayer(elevatorRawDataRef.current, map);
+    }
+    if (map?.getSource("station-outage-data") && stationDataRef.current) {
+      updateStationOutageLayer(stationDataRef.current, map);
+    }
+    if (map?.getSource("station-complexes") && stationDataRef.current) {
+      updateStationComplexLayer(stationDataRef.current, map);
+    }
+    if (map?.getSource("upcoming-outage-data")) {
+      updateUpcomingOutagesLayer(upcomingElevatorDataRef.current, map);
+    }
+  }
+
   useEffect(() => {
     async function loadDatasets() {
       const [elevatorsRes, stationsRes, alertsRes] = await Promise.all([
         fetch("/api/elevators"),
         fetch("/api/stations"),
         fetch("/api/alerts"),
+        loadCoordinatesInView(),
       ]);
 
       const elevatorsGeoJSON = await elevatorsRes.json();
       const { complexes, stations } = await stationsRes.json();
       const alertsData = await alertsRes.json();
 
-      initializeStore(elevatorsGeoJSON, complexes, stations, alertsData.station);
+      initializeStore(elevatorsGeoJSON, complexes, stations, alertsData.station, alertsData.byComplex);
       setStationData(stations as MtaStationData);
       setSystemAlerts(alertsData.system as AlertData[]);
     }
@@ -276,6 +311,9 @@ const MtaMap = () => {
         );
       }
     }
+    //Initialize Map (first, so the coordinate chunks for its initial view can load with the datasets)
+    initializeMtaMap(mapRef, mapContainer);
+
     // Load static datasets first, then fetch outages
     async function initialize() {
       await loadDatasets();
@@ -283,8 +321,10 @@ const MtaMap = () => {
     }
     initialize();
 
-    //Initialize Map
-    initializeMtaMap(mapRef, mapContainer);
+    // panning or zooming out to another borough imports its coordinate chunks, then redraws with them
+    mapRef.current?.on("moveend", async () => {
+      if (await loadCoordinatesInView()) redrawOutageLayers();
+    });
 
     mapRef.current?.on("load", () => {
       mapRef.current.setLayoutProperty(
@@ -6,12 +6,11 @@ import { createRoot, type Root } from "react-dom/client";
 import { createFocusTrap } from "focus-trap";
 
 // DATASETS
-import { getElevatorsDataset, getComplexesDataset, getStationsDataset, getStationAlertsDataset } from "@/lib/dataStore";
+import { getElevatorsDataset, getComplexesDataset, getStationsDataset, getStationAlertsForComplex } from "@/lib/dataStore";
 
 const customElevatorDataset = { get features() { return getElevatorsDataset().features; } };
 const mtaStationsDataset = { get features() { return getStationsDataset().features; } };
 const mtaComplexesDataset = { get features() { return getComplexesDataset().features; } };
-const taAlerts = { get features() { return getStationAlertsDataset().features; } };
 
 // FUNCTIONS
 import {
@@ -277,12 +276,10 @@ function handleStationComplexClick(
   const { complex_id, stop_name, ada, route, isOut, isProblem } =
     feature.properties;
 
-  // deal with alerts from ta_alerts.json
-  const complexAlert = taAlerts.features
-    .filter((feature) =>
-      feature.properties.complex_id.split(",").includes(complex_id),
-    )
-    .map((feature) => feature.properties.alert);
+  // deal with alerts from station_alerts.json, looked up through the alerts snapshot's complex_id index
+  const complexAlert = getStationAlertsForComplex(complex_id).map(
+    (feature) => feature.properties.alert,
+  );
 
   const stationIDsRaw = feature.properties.station_ids;
   const stationIDs = stationIDsRaw.split("/").map((id: string) => id.trim());
@@ -49,7 +49,8 @@ export function getComplexBoundaryGeoJSON(zoom: number) {
 
   // Second pass: build GeoJSON for each complex
   Object.entries(complexGroups).forEach(([complexID, coordsArray]) => {
-    const fallbackCoord = complexCoordinates[complexID] as [number, number];
+    // undefined until a packed coordinate chunk has loaded; the street elevators alone still give a boundary
+    const fallbackCoord: [number, number] | undefined = complexCoordinates[complexID];
     if (
       (!Array.isArray(coordsArray) || coordsArray.length === 0) &&
       (!Array.isArray(fallbackCoord) || fallbackCoord.length !== 2)
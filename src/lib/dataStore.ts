@@ -9,17 +9,34 @@ let _elevators = empty();
 let _complexes = empty();
 let _stations = empty();
 let _stationAlerts = empty();
+// complex_id -> positions of its station alerts, from the alerts snapshot's index
+let _stationAlertsByComplex: Record<string, number[]> = {};
+
+// fallback for a station_alerts collection without the index: split each comma-joined complex_id once
+function indexByComplex(stationAlerts: GeoJSONFeatureCollection) {
+  const index: Record<string, number[]> = {};
+  stationAlerts.features.forEach((feature, i) => {
+    String(feature.properties?.complex_id ?? "")
+      .split(",")
+      .map((id) => id.trim())
+      .filter((id) => id)
+      .forEach((id) => (index[id] ??= []).push(i));
+  });
+  return index;
+}
 
 export function initializeStore(
   elevators: GeoJSONFeatureCollection,
   complexes: GeoJSONFeatureCollection,
   stations: GeoJSONFeatureCollection,
   stationAlerts: GeoJSONFeatureCollection,
+  stationAlertsByComplex?: Record<string, number[]>,
 ) {
   _elevators = elevators;
   _complexes = complexes;
   _stations = stations;
   _stationAlerts = stationAlerts;
+  _stationAlertsByComplex = stationAlertsByComplex ?? indexByComplex(stationAlerts);
 }
 
 export function getElevatorsDataset() {
@@ -34,3 +51,9 @@ export function getStationsDataset() {
 export function getStationAlertsDataset() {
   return _stationAlerts;
 }
+export function getStationAlertsForComplex(complexId: string) {
+  const positions = Object.prototype.hasOwnProperty.call(_stationAlertsByComplex, complexId)
+    ? _stationAlertsByComplex[complexId]
+    : [];
+  return positions.map((i) => _stationAlerts.features[i]);
+}
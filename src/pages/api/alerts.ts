@@ -1,39 +1,121 @@
 import type { NextApiRequest, NextApiResponse } from "next";
+import { createHash } from "crypto";
 import { supabase } from "@/lib/supabase";
+import snapshot from "@/resources/generated/alertsSnapshot.json";
 
-export default async function handler(
-  req: NextApiRequest,
-  res: NextApiResponse,
-) {
-  if (req.method !== "GET") {
-    return res.status(405).end();
-  }
+// The database is the source of truth for alerts. Its active rows are cached here for the snapshot's TTL as
+// serialized bodies plus an ETag, so an instance queries Supabase at most once per TTL however many requests
+// come in. The snapshot bundled with the app (alertsSnapshot.py) answers until the first query returns, and
+// keeps answering with the last good alerts while the database can't be reached
+type StationFeatureCollection = { type: string; features: any[] };
+type Alerts = { system: any[]; station: StationFeatureCollection; byComplex: Record<string, number[]> };
+type CachedAlerts = { etag: string; body: string; noStationAlerts: string; alerts: Alerts; complexBodies: Map<string, string> };
+
+const ttlMs = snapshot.ttlSeconds * 1000;
+const cacheControl = `public, max-age=${snapshot.ttlSeconds}, s-maxage=${snapshot.ttlSeconds}, stale-while-revalidate=${snapshot.ttlSeconds}`;
+
+// complex_id -> positions of its station alerts, so nobody splits the comma-joined complex_ids at read time
+function indexByComplex(features: any[]) {
+  const byComplex: Record<string, number[]> = {};
+  features.forEach((feature, i) => {
+    for (const raw of String(feature.properties.complex_id ?? "").split(",")) {
+      const complexId = raw.trim();
+      if (!complexId) continue;
+      byComplex[complexId] ??= [];
+      if (!byComplex[complexId].includes(i)) byComplex[complexId].push(i);
+    }
+  });
+  return byComplex;
+}
 
+// the response bodies are serialized once per refresh, not per request
+function cache(alerts: Alerts, etag?: string): CachedAlerts {
+  const { system, station, byComplex } = alerts;
+  const body = JSON.stringify({ system, station, byComplex });
+  return {
+    etag: etag ?? `"${createHash("sha256").update(body).digest("hex").slice(0, 32)}"`,
+    body,
+    noStationAlerts: JSON.stringify({ system, station: { type: "FeatureCollection", features: [] } }),
+    alerts,
+    complexBodies: new Map(),
+  };
+}
+
+async function fetchAlerts(): Promise<Alerts> {
   const [systemAlerts, stationAlerts] = await Promise.all([
-    supabase.from("alerts").select("*").eq("active", true),
-    supabase.from("station_alerts").select("*").eq("active", true),
+    supabase.from("alerts").select("severity, text, color, type, active").eq("active", true).order("id"),
+    supabase.from("station_alerts").select("complex_ids, stop_names, alert").eq("active", true).order("id"),
   ]);
-
   if (systemAlerts.error || stationAlerts.error) {
-    console.error(systemAlerts.error ?? stationAlerts.error);
-    return res.status(500).json({ error: "Failed to fetch alerts" });
+    throw systemAlerts.error ?? stationAlerts.error;
   }
 
   // station_alerts returned as GeoJSON FeatureCollection to match station_alerts.json shape
-  const stationAlertsGeoJSON = {
-    type: "FeatureCollection",
-    features: stationAlerts.data.map((row) => ({
-      type: "Feature",
-      properties: {
-        complex_id: row.complex_ids,
-        stop_name: row.stop_names,
-        alert: row.alert,
-      },
-    })),
-  };
+  const features = stationAlerts.data.map((row) => ({
+    type: "Feature",
+    properties: {
+      complex_id: row.complex_ids,
+      stop_name: row.stop_names,
+      alert: row.alert,
+    },
+  }));
+  return { system: systemAlerts.data, station: { type: "FeatureCollection", features }, byComplex: indexByComplex(features) };
+}
 
-  return res.status(200).json({
-    system: systemAlerts.data,
-    station: stationAlertsGeoJSON,
-  });
+let cached = cache(
+  { system: snapshot.system, station: snapshot.station, byComplex: snapshot.byComplex as Record<string, number[]> },
+  snapshot.etag,
+);
+let expiresAt = 0; // the snapshot is only a stand-in, so the first request queries the database
+let refreshing: Promise<void> | null = null;
+
+// concurrent requests after the TTL share one query; a failed query is retried after another TTL
+async function currentAlerts() {
+  if (Date.now() >= expiresAt) {
+    refreshing ??= fetchAlerts()
+      .then(
+        (alerts) => {
+          cached = cache(alerts);
+        },
+        (error) => console.error("Failed to fetch alerts, serving the cached ones:", error),
+      )
+      .finally(() => {
+        expiresAt = Date.now() + ttlMs;
+        refreshing = null;
+      });
+    await refreshing;
+  }
+  return cached;
+}
+
+// station alerts for one complex, found through the complex_id -> alerts index.
+// only complexes with alerts get a cached body, so arbitrary IDs can't grow the cache
+function complexBody(current: CachedAlerts, complexId: string) {
+  const { system, station, byComplex } = current.alerts;
+  if (!Object.prototype.hasOwnProperty.call(byComplex, complexId)) return current.noStationAlerts;
+  if (!current.complexBodies.has(complexId)) {
+    const features = byComplex[complexId].map((i) => station.features[i]);
+    current.complexBodies.set(complexId, JSON.stringify({ system, station: { type: "FeatureCollection", features } }));
+  }
+  return current.complexBodies.get(complexId);
+}
+
+export default async function handler(req: NextApiRequest, res: NextApiResponse) {
+  if (req.method !== "GET") {
+    return res.status(405).end();
+  }
+
+  const current = await currentAlerts();
+  res.setHeader("ETag", current.etag);
+  res.setHeader("Cache-Control", cacheControl);
+  if (req.headers["if-none-match"] === current.etag) {
+    return res.status(304).end();
+  }
+
+  const { complexId } = req.query;
+  res.setHeader("Content-Type", "application/json; charset=utf-8");
+  if (complexId && typeof complexId === "string") {
+    return res.status(200).send(complexBody(current, complexId));
+  }
+  return res.status(200).send(current.body);
 }
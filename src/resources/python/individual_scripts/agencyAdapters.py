@@ -0,0 +1,158 @@
+import contextlib
+import importlib
+import os
+
+import pipelineRunner
+
+# Get directory where this script is located
+THIS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# === CONFIG ===
+# The agency the app is built from; its outputs keep the unpartitioned paths the frontend imports
+PRIMARY_AGENCY = "nyc_mta"
+PARTITION_DIR = "agencies"  # any other agency writes to <dir of the primary file>/agencies/<agency>/<file>
+# Curated datasets another agency starts without; the stages reading them build them up from the feeds
+CURATED_SOURCES = ("elevators",)
+
+# Module-level paths the pipeline stages read and write, moved into the agency's partition by use_agency()
+PARTITIONED_PATHS = {
+    "pipelineRunner": ["SOURCE_FILES"],
+    "incrementalBuild": ["MANIFEST_FILE"],
+    "datasetDiff": ["DIFF_REPORT_FILE"],
+    "updateMTAStations": ["STATIONS_FILE"],
+    "updateMTAComplexes": ["COMPLEXES_FILE"],
+    "updateElevators": ["MTA_EQUIP_FILE", "STATIONS_FILE", "CUSTOM_ELEVATOR_FILE", "COMPLEX_FILE"],
+    "outageGeojsonParser": ["INPUT_DATASET", "INPUT_COMPLEXES", "INPUT_OUTAGE_DATASET", "OUTPUT_DATASET", "OUTPUT_JS"],
+    "writeStationCoords": ["input_file", "output_geojson", "output_json", "output_js"],
+    "writeComplexCoords": ["input_file", "output_geojson", "output_json", "output_js"],
+    "elevatorToComplexConnector": ["CUSTOM_DATASET_FILE", "MTA_STATIONS_FILE", "OUTPUT_FILE"],
+    "vectorTiles": ["OUTPUT_FILE"],
+    "alertsSnapshot": ["ALERTS_FILE", "STATION_ALERTS_FILE", "OUTPUT_FILE"],
+}
+
+
+class AgencyAdapter:
+    """
+    One transit agency: where its feeds are, and how to turn them into the
+    station, complex and equipment records the pipeline already understands
+    (the MTA's, so MTASubwayAdapter changes nothing). To add an agency,
+    subclass this, set the attributes, override feeds() and whichever
+    normalize_* its feeds need, and decorate the class with @register.
+    """
+
+    agency = None  # ID used by --agency and for the output partition
+    system = None  # "system" given to elevators added from the equipment feed
+    systems = ()  # every "system" the agency's curated elevators carry
+    image_template = None  # elevator photo URL, formatted with title and elevatorno
+
+    def feeds(self):
+        """feedClient request specs ({"url", "headers"}) for "stationsFeed", "complexesFeed" and "equipmentFeed"."""
+        raise NotImplementedError
+
+    def normalize_stations(self, features):
+        """GeoJSON station features with the MTA station properties (station_id, complex_id, gtfs_stop_id, stop_name, borough, ada...)."""
+        return features
+
+    def normalize_complexes(self, rows):
+        """Rows shaped like the MTA complexes feed (complex_id, station_ids, gtfs_stop_ids, stop_name, latitude, longitude...)."""
+        return rows
+
+    def normalize_equipment(self, records):
+        """Records shaped like the MTA equipment feed (equipmentno, equipmenttype, ADA, station, elevatormrn...). May stay a generator."""
+        return records
+
+    def image_url(self, title, elevatorno):
+        return self.image_template.format(title=title, elevatorno=elevatorno) if self.image_template else ""
+
+
+ADAPTERS = {}
+
+
+def register(cls):
+    ADAPTERS[cls.agency] = cls
+    return cls
+
+
+@register
+class MTASubwayAdapter(AgencyAdapter):
+    agency = "nyc_mta"
+    system = "nyc_mta"
+    systems = ("nyc_mta", "nyc_sir")
+    image_template = "https://wheresthedamnelevator.com/assets/images/newyork/mta/{title}_{elevatorno}.jpg"
+
+    def feeds(self):
+        return {
+            "stationsFeed": {"url": os.environ.get("MTA_STATIONS_URL", "https://data.ny.gov/resource/39hk-dx4f.geojson")},
+            "complexesFeed": {"url": os.environ.get("MTA_COMPLEXES_URL", "https://data.ny.gov/resource/5f5g-n3cz.json")},
+            "equipmentFeed": {
+                "url": os.environ.get("MTA_EQUIPMENT_URL", "https://api-endpoint.mta.info/Dataservice/mtagtfsfeeds/nyct%2Fnyct_ene_equipments.json"),
+                "headers": {"x-api-key": os.environ.get("MTA_API_KEY", "")},
+            },
+        }
+
+
+_current = None
+
+
+def get_adapter(agency):
+    if agency not in ADAPTERS:
+        raise ValueError(f"Unknown agency {agency!r}, expected one of {sorted(ADAPTERS)}")
+    return ADAPTERS[agency]()
+
+
+def current_adapter():
+    """The agency this process is building (the primary one unless use_agency() switched it)."""
+    global _current
+    if _current is None:
+        _current = get_adapter(PRIMARY_AGENCY)
+    return _current
+
+
+def partition_path(path, agency):
+    if agency == PRIMARY_AGENCY:
+        return path
+    return os.path.join(os.path.dirname(path), PARTITION_DIR, agency, os.path.basename(path))
+
+
+@contextlib.contextmanager
+def use_agency(agency):
+    """
+    Point every stage in this process at `agency` for the duration of the block:
+    its adapter, and its own partition of every input and output path. The
+    previous adapter, paths and optional sources are restored on the way out.
+    Agencies don't nest; parallel agencies each use their own worker process.
+    """
+    global _current
+    previous = _current
+    if previous is not None and previous.agency != PRIMARY_AGENCY:
+        raise RuntimeError(f"This process already builds {previous.agency}")
+
+    saved = {}
+    optional_sources = set(pipelineRunner.OPTIONAL_SOURCES)
+    _current = get_adapter(agency)
+    try:
+        if agency != PRIMARY_AGENCY:
+            for module_name, attributes in PARTITIONED_PATHS.items():
+                module = importlib.import_module(module_name)
+                for attribute in attributes:
+                    value = getattr(module, attribute)
+                    if isinstance(value, dict):
+                        saved[module, attribute] = dict(value)
+                        # Updated in place, since other modules hold the same dict through "from ... import"
+                        value.update({key: partition_path(path, agency) for key, path in value.items()})
+                    else:
+                        saved[module, attribute] = value
+                        setattr(module, attribute, partition_path(value, agency))
+            pipelineRunner.OPTIONAL_SOURCES.update(CURATED_SOURCES)
+        yield _current
+    finally:
+        for (module, attribute), value in saved.items():
+            current = getattr(module, attribute)
+            if isinstance(current, dict):
+                current.clear()
+                current.update(value)
+            else:
+                setattr(module, attribute, value)
+        pipelineRunner.OPTIONAL_SOURCES.clear()
+        pipelineRunner.OPTIONAL_SOURCES.update(optional_sources)
+        _current = previous
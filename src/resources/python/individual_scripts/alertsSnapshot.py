@@ -0,0 +1,108 @@
+import argparse
+import os
+from datetime import datetime, timezone
+
+from dbSync import ALERTS_FILE, STATION_ALERTS_FILE, alert_rows, connect, station_alert_rows
+from incrementalBuild import hash_data, write_atomic
+from outputFormats import dumps
+from pipelineRunner import load_json, unchanged
+
+# Get directory where this script is located
+THIS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# === CONFIG ===
+OUTPUT_FILE = os.path.join(THIS_DIR, "..", "..", "generated", "alertsSnapshot.json")  # imported by src/pages/api/alerts.ts
+TTL_SECONDS = int(os.environ.get("ALERTS_TTL_SECONDS", "300"))  # how long clients and the CDN may reuse a response
+
+
+def rows_from_files(alerts_file=None, station_alerts_file=None):
+    """Alert rows as dbSync sends them to the database, read from the alert files they are curated in."""
+    alerts_file = alerts_file or ALERTS_FILE
+    station_alerts_file = station_alerts_file or STATION_ALERTS_FILE
+    system = alert_rows(load_json(alerts_file)) if os.path.exists(alerts_file) else []
+    station = station_alert_rows(load_json(station_alerts_file)) if os.path.exists(station_alerts_file) else []
+    return system, station
+
+
+def rows_from_db(dsn=None):
+    """The active alert rows in the database, for alerts edited there rather than in the files."""
+    with connect(dsn) as conn:
+        cur = conn.cursor()
+        try:
+            cur.execute("SELECT severity, text, color, type FROM alerts WHERE active ORDER BY id")
+            system = [dict(zip(("severity", "text", "color", "type"), row), active=True) for row in cur.fetchall()]
+            cur.execute("SELECT complex_ids, stop_names, alert FROM station_alerts WHERE active ORDER BY id")
+            station = [dict(zip(("complex_ids", "stop_names", "alert"), row), active=True) for row in cur.fetchall()]
+        finally:
+            cur.close()
+    return system, station
+
+
+def build_snapshot(system_rows, station_rows, ttl_seconds=TTL_SECONDS):
+    """
+    The /api/alerts response, materialized: the system alerts, the station
+    alerts as the FeatureCollection station_alerts.json uses, and byComplex,
+    an inverted index from each complex_id to the positions of its station
+    alerts, so nobody splits the comma-joined complex_id lists at read time.
+    The ETag is the hash of that content; version and generatedAt are added
+    when the snapshot is written.
+    """
+    features = [
+        {"type": "Feature", "properties": {"complex_id": row["complex_ids"], "stop_name": row["stop_names"], "alert": row["alert"]}}
+        for row in station_rows
+    ]
+    by_complex = {}
+    for i, row in enumerate(station_rows):
+        for complex_id in (row["complex_ids"] or "").split(","):
+            complex_id = complex_id.strip()
+            if complex_id and i not in by_complex.setdefault(complex_id, []):
+                by_complex[complex_id].append(i)
+
+    content = {
+        "system": system_rows,
+        "station": {"type": "FeatureCollection", "features": features},
+        "byComplex": by_complex,
+    }
+    return {"etag": f'"{hash_data(content)[:32]}"', "ttlSeconds": ttl_seconds, **content}
+
+
+def write_alerts_snapshot(force=False, dsn=None, output_file=None):
+    """
+    Pipeline stage: rebuild the alerts snapshot from the alert files (or the
+    database with a `dsn`). The version only moves, and the file is only
+    rewritten, when the alerts themselves changed.
+    """
+    output_file = output_file or OUTPUT_FILE
+    system, station = rows_from_db(dsn) if dsn else rows_from_files()
+    snapshot = build_snapshot(system, station)
+
+    previous = load_json(output_file) if os.path.exists(output_file) else {}
+    if not force and previous.get("etag") == snapshot["etag"] and previous.get("ttlSeconds") == snapshot["ttlSeconds"]:
+        print(f"\n** 📢 ALERTS SNAPSHOT 📢 **\n⏭️  Alerts unchanged, snapshot v{previous.get('version')} is up to date")
+        return unchanged(previous)
+
+    snapshot = {
+        "_comment": "This file is auto-generated by updateData.py (alertsSnapshot.py), do not edit manually",
+        "version": previous.get("version", 0) + (previous.get("etag") != snapshot["etag"]),
+        "generatedAt": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        **snapshot,
+    }
+    write_atomic(output_file, dumps(snapshot).encode("utf-8"))
+    print(f"\n** 📢 ALERTS SNAPSHOT 📢 **\n✅ v{snapshot['version']}: {len(system)} system alerts, {len(station)} station alerts "
+          f"covering {len(snapshot['byComplex'])} complexes, saved to {output_file}")
+    return snapshot
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Materialize the system and station alerts into the versioned snapshot /api/alerts serves.")
+    parser.add_argument("--from-db", action="store_true", help="read the active alerts from the database at $SUPABASE_DB_URL instead of the files")
+    parser.add_argument("--dsn", help="database to read with --from-db (default: $SUPABASE_DB_URL)")
+    parser.add_argument("--force", action="store_true", help="rewrite the snapshot even when the alerts are unchanged")
+    args = parser.parse_args()
+
+    dsn = None
+    if args.from_db:
+        dsn = args.dsn or os.environ.get("SUPABASE_DB_URL")
+        if not dsn:
+            parser.error("--from-db needs --dsn or $SUPABASE_DB_URL")
+    write_alerts_snapshot(force=args.force, dsn=dsn)
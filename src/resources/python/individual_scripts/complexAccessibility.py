@@ -0,0 +1,133 @@
+import argparse
+import json
+import os
+import threading
+
+from feedClient import fetch_json
+from outageState import current_outages
+
+# Get directory where this script is located
+THIS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# File paths
+CUSTOM_ELEVATOR_FILE = os.path.join(THIS_DIR, "..", "..", "custom_elevator_dataset.json")
+OUTPUT_FILE = os.path.join(THIS_DIR, "..", "..", "generated", "complexAccessibility.json")
+
+OUTAGES_URL = os.environ.get("MTA_OUTAGES_URL", "https://api-endpoint.mta.info/Dataservice/mtagtfsfeeds/nyct%2Fnyct_ene.json")
+
+ACCESSIBLE = "accessible"
+DEGRADED = "degraded"
+INACCESSIBLE = "inaccessible"
+
+
+def complex_status(entry):
+    """
+    inaccessible: every street elevator or every platform elevator is out, so there is no step-free way through.
+    degraded:     an elevator without a redundant twin is out, so some path needs the alternative route.
+    accessible:   nothing is out, or only elevators flagged isRedundant (another elevator covers the same trip).
+    """
+    street_out = sum(1 for e in entry["street"] if e["isBroken"])
+    platform_out = sum(1 for e in entry["platform"] if e["isBroken"])
+    if (entry["street"] and street_out == len(entry["street"])) or (entry["platform"] and platform_out == len(entry["platform"])):
+        return INACCESSIBLE
+    if any(e["isBroken"] and e["isRedundant"] != "1" for e in entry["street"] + entry["platform"]):
+        return DEGRADED
+    return ACCESSIBLE
+
+
+class ComplexAccessibilityView:
+    """
+    Per-complex elevator lists and accessibility status, kept up to date as
+    individual elevators break or are restored. Only the complexes those
+    elevators belong to are re-evaluated.
+    """
+
+    def __init__(self, elevator_data):
+        self.complexes = {}
+        self.elevator_complex = {}  # elevatorno -> (complex_id, elevator entry, alternativeRoute)
+        for feature in elevator_data["features"]:
+            props = feature["properties"]
+            complex_id = str(props.get("complexID") or "")
+            if not complex_id:
+                continue
+            entry = self.complexes.setdefault(complex_id, {
+                "complex_id": complex_id, "status": ACCESSIBLE, "street": [], "platform": [], "alternativeRoutes": {},
+            })
+            elevator = {
+                "elevatorno": props["elevatorno"],
+                "isRedundant": str(props.get("isRedundant", "")),
+                "isBroken": False,
+            }
+            if props.get("isStreet"):
+                entry["street"].append(elevator)
+            else:
+                elevator["directionLabel"] = props.get("directionLabel", "")
+                elevator["linesServed"] = props.get("linesServed", "")
+                entry["platform"].append(elevator)
+            self.elevator_complex[props["elevatorno"]] = (complex_id, elevator, props.get("alternativeRoute", ""))
+        self.out = set()
+        self.lock = threading.Lock()  # for callers sharing the view between threads, e.g. outagePoller.py
+
+    def apply(self, broken=(), restored=()):
+        """Mark elevators broken / restored. Returns {complex_id: entry} for complexes whose entry changed."""
+        touched = set()
+        for elevatorno, is_broken in [(no, True) for no in broken] + [(no, False) for no in restored]:
+            if elevatorno not in self.elevator_complex:
+                continue  # not in the custom dataset (e.g. a non-ADA elevator)
+            complex_id, elevator, alternative_route = self.elevator_complex[elevatorno]
+            if elevator["isBroken"] == is_broken:
+                continue
+            elevator["isBroken"] = is_broken
+            routes = self.complexes[complex_id]["alternativeRoutes"]
+            if is_broken:
+                self.out.add(elevatorno)
+                if alternative_route:
+                    routes[elevatorno] = alternative_route
+            else:
+                self.out.discard(elevatorno)
+                routes.pop(elevatorno, None)
+            touched.add(complex_id)
+
+        for complex_id in touched:
+            self.complexes[complex_id]["status"] = complex_status(self.complexes[complex_id])
+        return {complex_id: self.complexes[complex_id] for complex_id in touched}
+
+    def set_outages(self, out_elevators):
+        """Move to a new full outage set, applying only the difference."""
+        out_elevators = set(out_elevators)
+        return self.apply(out_elevators - self.out, self.out - out_elevators)
+
+    def statuses(self):
+        return {complex_id: entry["status"] for complex_id, entry in self.complexes.items()}
+
+    def to_json(self):
+        return {
+            "_comment": "This file is auto-generated by complexAccessibility.py, do not edit manually",
+            "complexes": self.complexes,
+        }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Materialize per-complex accessibility from the custom elevators and the live outage feed.")
+    parser.add_argument("--outages", default=OUTAGES_URL, help="outage feed URL or a saved nyct_ene.json file")
+    args = parser.parse_args()
+
+    with open(CUSTOM_ELEVATOR_FILE, "r", encoding="utf-8") as f:
+        view = ComplexAccessibilityView(json.load(f))
+
+    if os.path.exists(args.outages):
+        with open(args.outages, "r", encoding="utf-8") as f:
+            feed = json.load(f)
+    else:
+        api_key = os.environ.get("MTA_API_KEY")
+        feed = fetch_json(args.outages, headers={"x-api-key": api_key} if api_key else None)
+    view.set_outages(current_outages(feed))
+
+    os.makedirs(os.path.dirname(OUTPUT_FILE), exist_ok=True)
+    with open(OUTPUT_FILE, "w", encoding="utf-8") as f:
+        json.dump(view.to_json(), f, indent=2)
+
+    counts = {}
+    for status in view.statuses().values():
+        counts[status] = counts.get(status, 0) + 1
+    print(f"\n** ♿ COMPLEX ACCESSIBILITY ♿ **\n✅ {counts} saved to {OUTPUT_FILE}")
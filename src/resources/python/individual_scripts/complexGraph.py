@@ -0,0 +1,194 @@
+import argparse
+import json
+import os
+import re
+import threading
+from collections import OrderedDict, deque
+
+from elevatorClassifier import split_lines
+from feedClient import fetch_json
+from outageState import current_outages
+
+# Get directory where this script is located
+THIS_DIR = os.path.dirname(os.path.abspath(__file__))
+CUSTOM_ELEVATOR_FILE = os.path.join(THIS_DIR, "..", "..", "custom_elevator_dataset.json")
+OUTAGES_URL = os.environ.get("MTA_OUTAGES_URL", "https://api-endpoint.mta.info/Dataservice/mtagtfsfeeds/nyct%2Fnyct_ene.json")
+
+STREET = "street"
+MEZZANINE = "mezzanine"
+BOTH = "both"
+CACHE_SIZE = 8  # outage snapshots whose results are kept
+
+# A route list like "4", "A/C", "F/N/Q", "SIR" or "LIRR"; direction words always contain lowercase letters
+ROUTE_TOKEN = re.compile(r"^[A-Z0-9]{1,4}(/[A-Z0-9]{1,4})*$")
+
+
+def normalize_direction(text):
+    text = text.strip().lower()
+    return BOTH if text in ("", "both directions", "both") else text
+
+
+def parse_direction_label(label, lines_served):
+    """
+    Platforms an elevator lands on, as [(line, direction), ...], and whether
+    it also reaches the mezzanine. Handles labels such as "uptown",
+    "F Coney Island-bound, A/C Queens-bound", "uptown 4/5, Brooklyn-bound J/Z"
+    and "7 Queens-bound, access to E/F/M/R". Lines missing from a segment come
+    from `linesServed`; a missing direction means both directions.
+    """
+    default_lines = list(split_lines(lines_served))
+    platforms, to_mezzanine = [], False
+    for segment in (label or "").split(","):
+        segment = segment.strip()
+        if not segment:
+            continue
+        if segment.lower().startswith("access to") or "rest of complex" in segment.lower():
+            to_mezzanine = True  # reaches the rest of the complex through the mezzanine
+            continue
+        lines, words = [], []
+        for token in segment.split():
+            if ROUTE_TOKEN.match(token):
+                lines.extend(token.split("/"))
+            else:
+                words.append(token)
+        direction = normalize_direction(" ".join(words))
+        platforms.extend((line, direction) for line in (lines or default_lines))
+    return platforms, to_mezzanine
+
+
+def elevator_connections(props):
+    """The pairs of nodes one elevator connects."""
+    platforms, to_mezzanine = parse_direction_label(props.get("directionLabel"), props.get("linesServed"))
+    platform_nodes = [f"{line} {direction}" for line, direction in platforms]
+    if props.get("isStreet"):
+        # Street elevators without a platform in their label go to the mezzanine, as do ones described that way
+        to_mezzanine = to_mezzanine or not platform_nodes or "mezzanine" in (props.get("shortdescription") or "").lower()
+        ends = platform_nodes + ([MEZZANINE] if to_mezzanine else [])
+        return [(STREET, node) for node in ends]
+    if not platform_nodes:
+        platform_nodes = [f"{line} {BOTH}" for line in split_lines(props.get("linesServed"))]
+    ends = platform_nodes + ([MEZZANINE] if to_mezzanine else [])
+    return [(MEZZANINE, node) for node in ends]
+
+
+class ComplexGraphs:
+    """
+    Street / mezzanine / platform graphs for every complex, built once from the
+    custom elevator dataset. Each elevator is an edge; a broken elevator
+    removes its edges. Complexes without a street elevator are step-free from
+    the street to the mezzanine (ramp or at-grade entrance).
+    """
+
+    def __init__(self, elevator_data, cache_size=CACHE_SIZE):
+        self.graphs = {}  # complex_id -> {"nodes": [...], "adjacency": [[(node, elevatorno), ...]], "platforms": [...]}
+        self.elevator_complex = {}
+        connections = {}
+        for feature in elevator_data["features"]:
+            props = feature["properties"]
+            complex_id = str(props.get("complexID") or "")
+            if not complex_id:
+                continue
+            self.elevator_complex[props["elevatorno"]] = complex_id
+            connections.setdefault(complex_id, []).extend(
+                (a, b, props["elevatorno"]) for a, b in elevator_connections(props)
+            )
+
+        for complex_id, edges in connections.items():
+            if not any(a == STREET for a, _, _ in edges):
+                edges.append((STREET, MEZZANINE, None))  # never breaks
+            nodes = [STREET, MEZZANINE] + sorted({n for a, b, _ in edges for n in (a, b)} - {STREET, MEZZANINE})
+            index = {node: i for i, node in enumerate(nodes)}
+            adjacency = [[] for _ in nodes]
+            for a, b, elevatorno in edges:
+                adjacency[index[a]].append((index[b], elevatorno))
+                adjacency[index[b]].append((index[a], elevatorno))
+            self.graphs[complex_id] = {"nodes": nodes, "adjacency": adjacency, "platforms": list(range(2, len(nodes)))}
+
+        self.baseline = {complex_id: self._reachable(complex_id, frozenset()) for complex_id in self.graphs}
+        self.cache = OrderedDict()
+        self.cache_size = cache_size
+        self.lock = threading.Lock()  # request threads share the cache
+
+    def _reachable(self, complex_id, out):
+        """{platform: reachable from the street without a broken elevator} for one complex (BFS)."""
+        graph = self.graphs[complex_id]
+        seen = [False] * len(graph["nodes"])
+        seen[0] = True
+        queue = deque([0])
+        while queue:
+            node = queue.popleft()
+            for neighbour, elevatorno in graph["adjacency"][node]:
+                if not seen[neighbour] and elevatorno not in out:
+                    seen[neighbour] = True
+                    queue.append(neighbour)
+        return {graph["nodes"][i]: seen[i] for i in graph["platforms"]}
+
+    def reachability(self, out_elevators):
+        """
+        Street-to-platform reachability for every complex given the elevators
+        that are out, as {complex_id: {"<line> <direction>": bool}}. Only the
+        complexes with an outage are searched; the rest reuse the all-working
+        baseline. Results are cached per outage set.
+        """
+        out = frozenset(out_elevators)
+        with self.lock:
+            if out in self.cache:
+                self.cache.move_to_end(out)
+                return self.cache[out]
+
+            result = dict(self.baseline)
+            for complex_id in {self.elevator_complex[no] for no in out if no in self.elevator_complex}:
+                result[complex_id] = self._reachable(complex_id, out)
+
+            self.cache[out] = result
+            if len(self.cache) > self.cache_size:
+                self.cache.popitem(last=False)
+            return result
+
+    def is_reachable(self, complex_id, line, direction=None, out_elevators=()):
+        """Is there a working step-free path from the street to a `line` platform (in `direction`, if given)?"""
+        platforms = self.reachability(out_elevators).get(str(complex_id), {})
+        direction = normalize_direction(direction) if direction else None
+        return any(
+            reachable
+            for platform, reachable in platforms.items()
+            if platform.split(" ", 1)[0] == line and (direction is None or platform.split(" ", 1)[1] in (direction, BOTH))
+        )
+
+    def unreachable(self, out_elevators):
+        """{complex_id: [platforms cut off by the outages]}, leaving out platforms that are unreachable even with every elevator working."""
+        result = {}
+        for complex_id, platforms in self.reachability(out_elevators).items():
+            cut_off = [p for p, ok in platforms.items() if not ok and self.baseline[complex_id][p]]
+            if cut_off:
+                result[complex_id] = cut_off
+        return result
+
+
+def load_graphs(path=CUSTOM_ELEVATOR_FILE):
+    with open(path, "r", encoding="utf-8") as f:
+        return ComplexGraphs(json.load(f))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="List platforms cut off from the street by current elevator outages.")
+    parser.add_argument("--outages", default=OUTAGES_URL, help="outage feed URL or a saved nyct_ene.json file")
+    parser.add_argument("--json", action="store_true", help="print the full reachability table as JSON")
+    args = parser.parse_args()
+
+    graphs = load_graphs()
+    if os.path.exists(args.outages):
+        with open(args.outages, "r", encoding="utf-8") as f:
+            feed = json.load(f)
+    else:
+        api_key = os.environ.get("MTA_API_KEY")
+        feed = fetch_json(args.outages, headers={"x-api-key": api_key} if api_key else None)
+    out = current_outages(feed)
+
+    if args.json:
+        print(json.dumps(graphs.reachability(out), indent=2))
+    else:
+        cut_off = graphs.unreachable(out)
+        print(f"\n** 🛗 STEP-FREE REACHABILITY 🛗 **\n{len(out)} elevators out, {len(cut_off)} complexes with platforms cut off")
+        for complex_id, platforms in sorted(cut_off.items()):
+            print(f"  {complex_id}: {', '.join(platforms)}")
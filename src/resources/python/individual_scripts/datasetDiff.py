@@ -0,0 +1,119 @@
+import json
+import os
+
+# Get directory where this script is located
+THIS_DIR = os.path.dirname(os.path.abspath(__file__))
+DIFF_REPORT_FILE = os.path.join(THIS_DIR, "..", "..", "generated", "diff_report.json")
+
+
+def _compared(feature, fields, geometry):
+    """The part of a feature that is compared: its properties (or just `fields`) and optionally its coordinates."""
+    props = feature["properties"]
+    values = props if fields is None else [props.get(field) for field in fields]
+    coords = (feature.get("geometry") or {}).get("coordinates") if geometry else None
+    return values, coords
+
+
+def feature_changes(old, new, fields=None, geometry=True):
+    """Property-level {key: {"OLD": ..., "→ NEW": ...}} for two features already known to differ."""
+    old_props, new_props = old["properties"], new["properties"]
+    keys = fields if fields is not None else list(new_props) + [k for k in old_props if k not in new_props]
+    changes = {
+        key: {"OLD": old_props.get(key), "→ NEW": new_props.get(key)}
+        for key in keys
+        if old_props.get(key) != new_props.get(key)
+    }
+    if geometry:
+        old_coords = (old.get("geometry") or {}).get("coordinates")
+        new_coords = (new.get("geometry") or {}).get("coordinates")
+        if old_coords != new_coords:
+            changes["coordinates"] = {"OLD": old_coords, "→ NEW": new_coords}
+    return changes
+
+
+def diff_features(old_features, new_features, key_property, fields=None, geometry=True):
+    """
+    Added / removed / modified features, matched on `properties[key_property]`.
+
+    The old side is indexed by position only, and each matched pair is first
+    compared as a whole (a single C-level equality check that exits at the
+    first difference), so a mostly-unchanged feed is diffed in one linear
+    pass without copying any records. The property-by-property comparison
+    only runs for pairs that differ. `fields` limits the comparison to those
+    properties.
+    """
+    old_features = old_features if isinstance(old_features, list) else list(old_features)
+    old_index = {feature["properties"].get(key_property): i for i, feature in enumerate(old_features)}
+
+    added, modified = [], []
+    for feature in new_features:
+        i = old_index.pop(feature["properties"].get(key_property), None)
+        if i is None:
+            added.append(feature)
+            continue
+        old = old_features[i]
+        if _compared(old, fields, geometry) == _compared(feature, fields, geometry):
+            continue
+        changes = feature_changes(old, feature, fields, geometry)
+        if changes:
+            modified.append({"old": old, "new": feature, "changes": changes})
+
+    # Whatever was never matched by a new feature has been removed
+    removed = [old_features[i] for i in old_index.values()]
+    return {"added": added, "removed": removed, "modified": modified}
+
+
+def has_changes(diff):
+    return bool(diff["added"] or diff["removed"] or diff["modified"])
+
+
+def print_diff(diff, key_property, name_property):
+    if not has_changes(diff):
+        print("No changes detected.")
+        return
+    print(f"Added: {len(diff['added'])} | Removed: {len(diff['removed'])} | Modified: {len(diff['modified'])}")
+    if diff["added"]:
+        print("\n--- Added ---")
+        for feature in diff["added"]:
+            print(feature["properties"])
+    if diff["removed"]:
+        print("\n--- Removed ---")
+        for feature in diff["removed"]:
+            print(feature["properties"])
+    if diff["modified"]:
+        print("\n--- Modified ---")
+        for m in diff["modified"]:
+            props = m["new"]["properties"]
+            print({key_property: props.get(key_property), name_property: props.get(name_property), "changes": m["changes"]})
+
+
+def summarize(diff, name, key=None):
+    """
+    The diff_report.json entry for a diff: the display name of every added,
+    removed and modified feature. With `key`, the entry also lists their keys.
+    """
+    entry = {
+        "added": [name(feature) for feature in diff["added"]],
+        "removed": [name(feature) for feature in diff["removed"]],
+        "modified": [name(m["new"]) for m in diff["modified"]],
+    }
+    if key is not None:
+        entry["keys"] = {
+            "added": [key(feature) for feature in diff["added"]],
+            "removed": [key(feature) for feature in diff["removed"]],
+            "modified": [key(m["new"]) for m in diff["modified"]],
+        }
+    return entry
+
+
+def update_diff_report(section, entry, report_path=None):
+    """Replace one dataset's section of diff_report.json, keeping the others."""
+    report_path = report_path or DIFF_REPORT_FILE
+    report = {}
+    if os.path.exists(report_path):
+        with open(report_path) as f:
+            report = json.load(f)
+    report[section] = entry
+    os.makedirs(os.path.dirname(report_path), exist_ok=True)
+    with open(report_path, "w") as f:
+        json.dump(report, f, indent=2)
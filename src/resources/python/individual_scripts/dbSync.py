@@ -0,0 +1,378 @@
+import argparse
+import contextlib
+import json
+import os
+import sqlite3
+import threading
+
+from incrementalBuild import hash_data, write_atomic
+from pipelineRunner import SOURCE_FILES, load_json
+
+# Get directory where this script is located
+THIS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# === CONFIG ===
+# Postgres connection string for the Supabase database, or sqlite:///path for a local stand-in
+DATABASE_URL = os.environ.get("SUPABASE_DB_URL", "")
+MIGRATION_FILE = os.path.join(THIS_DIR, "..", "..", "..", "db", "migration.sql")
+ALERTS_FILE = os.path.join(THIS_DIR, "..", "..", "ta_alerts.json")
+STATION_ALERTS_FILE = os.path.join(THIS_DIR, "..", "..", "station_alerts.json")
+# A hash of every row last sent, per table, to diff the datasets and alert files against on the next sync
+SYNC_STATE_FILE = os.environ.get("DB_SYNC_STATE_FILE", os.path.join(THIS_DIR, "..", ".cache", "db_sync_state.json"))
+BATCH_SIZE = 500  # rows per statement batch
+POOL_SIZE = 4
+
+
+# === ROWS (same mapping as src/db/seed.ts) ===
+def complex_row(feature):
+    props = feature["properties"]
+    try:
+        num_stations = int(props.get("num_stations_in_complex"))
+    except (TypeError, ValueError):
+        num_stations = None
+    return {
+        "complex_id": props.get("complex_id"),
+        "station_ids": props.get("station_ids"),
+        "gtfs_stop_ids": props.get("gtfs_stop_ids"),
+        "stop_name": props.get("stop_name"),
+        "ada": props.get("ada"),
+        "borough": props.get("borough"),
+        "num_stations": num_stations or None,
+        "geometry": feature.get("geometry"),
+    }
+
+
+def station_row(feature):
+    props = feature["properties"]
+    columns = ("station_id", "complex_id", "stop_name", "line", "daytime_routes", "division", "structure", "ada",
+               "ada_northbound", "ada_southbound", "ada_notes", "north_direction_label", "south_direction_label",
+               "gtfs_stop_id", "borough")
+    return {**{column: props.get(column) for column in columns}, "geometry": feature.get("geometry")}
+
+
+def elevator_row(feature):
+    props = feature["properties"]
+    return {
+        "elevator_id": props.get("elevatorno"),
+        "complex_id": props.get("complexID"),
+        "station_id": props.get("stationID"),
+        "route": props.get("route"),
+        "lines_served": props.get("linesServed"),
+        "gtfs_stop_id": props.get("elevatorgtfsstopid"),
+        "title": props.get("title"),
+        "direction_label": props.get("directionLabel"),
+        "short_description": props.get("shortdescription"),
+        "description_custom": props.get("description_custom"),
+        "alternative_route": props.get("alternativeRoute"),
+        "ada": props.get("ada"),
+        "is_street": props.get("isStreet"),
+        "is_redundant": props.get("isRedundant"),
+        "redundant_index": props.get("redundantIndex"),
+        "image": props.get("image"),
+        "access_note": props.get("access_note"),
+        "geometry": feature.get("geometry"),
+    }
+
+
+def alert_rows(alerts):
+    return [
+        {"severity": a.get("severity"), "text": a["text"], "color": a.get("color"), "type": a.get("type"), "active": True}
+        for a in alerts
+        if a.get("text")
+    ]
+
+
+def station_alert_rows(station_alerts):
+    return [
+        {"complex_ids": f["properties"].get("complex_id"), "stop_names": f["properties"].get("stop_name"),
+         "alert": f["properties"]["alert"], "active": True}
+        for f in station_alerts["features"]
+    ]
+
+
+# Dataset -> table. Tables are written in this order (complexes first, for the foreign keys) and deleted from
+# in reverse. Elevator rows are never deleted: an elevator leaving the curated dataset is reviewed by hand.
+# A row still referenced from another table ("referenced_by", table -> column) is kept instead of deleted.
+DATASET_TABLES = [
+    {"section": "complexes", "table": "complexes", "key": "complex_id", "row": complex_row, "delete": True,
+     "referenced_by": [("station_details", "complex_id"), ("elevators", "complex_id")]},
+    {"section": "stations", "table": "station_details", "key": "station_id", "row": station_row, "delete": True},
+    {"section": "elevators", "table": "elevators", "key": "elevator_id", "row": elevator_row, "delete": False},
+]
+# Alert rows have no key besides their SERIAL id, which the files don't know (and texts can repeat),
+# so a table whose alerts changed is replaced as a whole, like seed.ts does
+ALERT_TABLES = [
+    {"name": "alerts", "table": "alerts", "file": ALERTS_FILE, "rows": alert_rows},
+    {"name": "station_alerts", "table": "station_alerts", "file": STATION_ALERTS_FILE, "rows": station_alert_rows},
+]
+
+
+# === CONNECTIONS ===
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def _postgres_pool(dsn):
+    with _pools_lock:
+        if dsn not in _pools:
+            try:
+                from psycopg2.pool import ThreadedConnectionPool
+            except ImportError:
+                raise SystemExit("❌ Syncing to Postgres needs psycopg2: pip install psycopg2-binary")
+            _pools[dsn] = ThreadedConnectionPool(1, POOL_SIZE, dsn)
+        return _pools[dsn]
+
+
+@contextlib.contextmanager
+def connect(dsn=None):
+    """
+    A connection for `dsn` as one transaction: committed on success, rolled back
+    on error. Postgres connections come from a per-DSN pool and go back to it;
+    sqlite:///path opens a local SQLite stand-in.
+    """
+    dsn = dsn or DATABASE_URL
+    if not dsn:
+        raise SystemExit("❌ Set SUPABASE_DB_URL (or pass --dsn) to sync the database")
+    if dsn.startswith("sqlite:///"):
+        conn = sqlite3.connect(dsn[len("sqlite:///"):])
+        conn.execute("PRAGMA foreign_keys = ON")  # enforce the REFERENCES like Postgres does
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+        return
+
+    pool = _postgres_pool(dsn)
+    conn = pool.getconn()
+    try:
+        with conn:  # psycopg2 commits or rolls back, but leaves the connection open for the pool
+            yield conn
+    finally:
+        pool.putconn(conn)
+
+
+def create_schema(conn):
+    """Run migration.sql against a local stand-in database (SQLite needs INTEGER for auto-numbered ids)."""
+    with open(MIGRATION_FILE, "r", encoding="utf-8") as f:
+        sql = f.read()
+    if isinstance(conn, sqlite3.Connection):
+        sql = sql.replace("SERIAL PRIMARY KEY", "INTEGER PRIMARY KEY").replace("CREATE TABLE ", "CREATE TABLE IF NOT EXISTS ")
+        conn.executescript(sql)
+    else:
+        with conn.cursor() as cur:
+            cur.execute(sql)
+
+
+def _placeholder(conn):
+    return "?" if isinstance(conn, sqlite3.Connection) else "%s"
+
+
+def _execute(conn, sql, params=()):
+    if isinstance(conn, sqlite3.Connection):
+        conn.execute(sql, params)
+        return
+    with conn.cursor() as cur:
+        cur.execute(sql, params)
+
+
+def _fetch(conn, sql, params=()):
+    if isinstance(conn, sqlite3.Connection):
+        return conn.execute(sql, params).fetchall()
+    with conn.cursor() as cur:
+        cur.execute(sql, params)
+        return cur.fetchall()
+
+
+def _value(value):
+    return json.dumps(value) if isinstance(value, (dict, list)) else value  # JSONB columns take the JSON text
+
+
+def _execute_batch(conn, sql, rows):
+    if not rows:
+        return
+    if isinstance(conn, sqlite3.Connection):
+        conn.executemany(sql, rows)
+        return
+    from psycopg2.extras import execute_batch
+    with conn.cursor() as cur:
+        execute_batch(cur, sql, rows, page_size=BATCH_SIZE)  # one round trip per page instead of per row
+
+
+def upsert_rows(conn, table, key, rows):
+    """INSERT ... ON CONFLICT (key) DO UPDATE for every row, in batches. Returns the number of rows sent."""
+    if not rows:
+        return 0
+    columns = list(rows[0])
+    p = _placeholder(conn)
+    sql = (f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join(p for _ in columns)}) "
+           f"ON CONFLICT ({key}) DO UPDATE SET {', '.join(f'{c} = EXCLUDED.{c}' for c in columns if c != key)}")
+    _execute_batch(conn, sql, [tuple(_value(row[c]) for c in columns) for row in rows])
+    return len(rows)
+
+
+def delete_rows(conn, table, key, values):
+    """DELETE ... WHERE key IN (...), BATCH_SIZE keys per statement. Returns the number of keys sent."""
+    values = list(values)
+    p = _placeholder(conn)
+    for start in range(0, len(values), BATCH_SIZE):
+        batch = values[start:start + BATCH_SIZE]
+        _execute(conn, f"DELETE FROM {table} WHERE {key} IN ({', '.join(p for _ in batch)})", batch)
+    return len(values)
+
+
+def referenced_keys(conn, references, values):
+    """The `values` some row still points to, through any of the (table, column) `references`."""
+    values = list(values)
+    p = _placeholder(conn)
+    referenced = set()
+    for start in range(0, len(values), BATCH_SIZE):
+        batch = values[start:start + BATCH_SIZE]
+        for table, column in references:
+            rows = _fetch(conn, f"SELECT DISTINCT {column} FROM {table} WHERE {column} IN ({', '.join(p for _ in batch)})", batch)
+            referenced.update(row[0] for row in rows)
+    return referenced
+
+
+def insert_rows(conn, table, rows):
+    if not rows:
+        return 0
+    columns = list(rows[0])
+    p = _placeholder(conn)
+    sql = f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join(p for _ in columns)})"
+    _execute_batch(conn, sql, [tuple(_value(row[c]) for c in columns) for row in rows])
+    return len(rows)
+
+
+# === PLANNING ===
+def dataset_changes(state, datasets, full=False):
+    """
+    {table: {"upsert": [rows], "delete": [keys]}} for the datasets against the
+    row hashes last synced, so rows a failed sync didn't send go out next time.
+    Returns the plan and the new state. A table without a previous state (or
+    with `full`) has every row upserted, like seed.ts, and nothing deleted.
+    """
+    plan, new_state = {}, {}
+    for spec in DATASET_TABLES:
+        rows = {}
+        for feature in datasets[spec["section"]]["features"]:
+            row = spec["row"](feature)
+            rows[str(row[spec["key"]])] = row  # last feature wins on a shared key (several stops share a station_id), as in seed.ts
+        hashes = {key: hash_data(row) for key, row in rows.items()}
+        new_state[spec["table"]] = {"rows": hashes}
+        previous = state.get(spec["table"])
+        if full or previous is None:
+            plan[spec["table"]] = {"upsert": list(rows.values()), "delete": []}
+            continue
+        synced = previous["rows"]
+        plan[spec["table"]] = {
+            "upsert": [rows[key] for key in sorted(rows) if synced.get(key) != hashes[key]],
+            "delete": sorted(key for key in synced if key not in rows) if spec["delete"] else [],
+        }
+        if not spec["delete"]:
+            # Rows kept in the table stay in the state, so they are not re-sent if the dataset gets them back unchanged
+            new_state[spec["table"]]["rows"] = {**synced, **hashes}
+    return plan, new_state
+
+
+def alert_changes(state, full=False):
+    """{table: {"replace": [rows]}} for the alert tables whose file changed since the last sync. Returns the plan and the new state."""
+    plan, new_state = {}, {}
+    for spec in ALERT_TABLES:
+        with open(spec["file"], "r", encoding="utf-8") as f:
+            rows = spec["rows"](json.load(f))
+        new_state[spec["name"]] = {"hash": hash_data(rows)}
+        previous = state.get(spec["name"])
+        if full or previous is None or previous["hash"] != new_state[spec["name"]]["hash"]:
+            plan[spec["table"]] = {"replace": rows}
+    return plan, new_state
+
+
+def load_state(path=None):
+    path = path or SYNC_STATE_FILE
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+# === SYNC ===
+def apply_plan(conn, dataset_plan, alert_plan):
+    """
+    Write the plans. Returns the counts per table, and per table the keys that
+    were kept instead of deleted because other rows still point to them (an
+    elevator of a complex that left the dataset, say), which would otherwise
+    fail the foreign key and the whole transaction with it.
+    """
+    counts, kept = {}, {}
+    for spec in DATASET_TABLES:
+        counts[spec["table"]] = {"upserted": upsert_rows(conn, spec["table"], spec["key"], dataset_plan[spec["table"]]["upsert"])}
+    for spec in reversed(DATASET_TABLES):
+        keys = dataset_plan[spec["table"]]["delete"]
+        referenced = referenced_keys(conn, spec["referenced_by"], keys) if keys and spec.get("referenced_by") else set()
+        if referenced:
+            kept[spec["table"]] = sorted(referenced)
+            counts[spec["table"]]["kept"] = len(referenced)
+        counts[spec["table"]]["deleted"] = delete_rows(conn, spec["table"], spec["key"], [k for k in keys if k not in referenced])
+    for spec in ALERT_TABLES:
+        change = alert_plan.get(spec["table"])
+        if change is None:
+            counts[spec["table"]] = {}
+        else:
+            _execute(conn, f"DELETE FROM {spec['table']}")
+            counts[spec["table"]] = {"replaced": insert_rows(conn, spec["table"], change["replace"])}
+    return counts, kept
+
+
+def sync_database(stations=None, complexes=None, elevators=None, dsn=None, full=False, dry_run=False, state_path=None):
+    """
+    Send what changed since the last successful sync to the database: upserts
+    and deletes for the dataset rows, and the alert tables whose files changed,
+    all in one transaction. The sync state is only saved once that transaction
+    committed, so a failed sync is retried in full. On a quiet day nothing is sent.
+    Rows kept because they are still referenced stay in the state as synced, so
+    their delete is tried again on the next sync.
+    """
+    print(f"\n** 🗃️ DATABASE SYNC 🗃️ **")
+    datasets = {
+        "stations": stations if stations is not None else load_json(SOURCE_FILES["stations"]),
+        "complexes": complexes if complexes is not None else load_json(SOURCE_FILES["complexes"]),
+        "elevators": elevators if elevators is not None else load_json(SOURCE_FILES["elevators"]),
+    }
+    state = load_state(state_path)
+    dataset_plan, dataset_state = dataset_changes(state, datasets, full)
+    alert_plan, alert_state = alert_changes(state, full)
+
+    if dry_run:
+        for table, change in {**dataset_plan, **alert_plan}.items():
+            print(f"  {table:<16} " + ", ".join(f"{len(rows)} to {action}" for action, rows in change.items()))
+        return None
+
+    with connect(dsn) as conn:
+        counts, kept = apply_plan(conn, dataset_plan, alert_plan)
+    for table, keys in kept.items():
+        dataset_state[table]["rows"].update({key: state[table]["rows"][key] for key in keys})
+        print(f"⚠️  {table}: kept {len(keys)} rows other tables still reference: {', '.join(keys)}")
+    write_atomic(state_path or SYNC_STATE_FILE, json.dumps({**dataset_state, **alert_state}).encode("utf-8"))
+
+    for table, table_counts in counts.items():
+        sent = ", ".join(f"{n} {action}" for action, n in table_counts.items() if n)
+        print(f"  {table:<16} {sent or 'no changes'}")
+    return counts
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Send the rows changed since the last sync to the Supabase tables.")
+    parser.add_argument("--dsn", default=DATABASE_URL,
+                        help="Postgres connection string, or sqlite:///path for a local stand-in (default: $SUPABASE_DB_URL)")
+    parser.add_argument("--full", action="store_true", help="upsert every row, like src/db/seed.ts")
+    parser.add_argument("--dry-run", action="store_true", help="print what would be sent without connecting")
+    parser.add_argument("--init-schema", action="store_true", help="create the tables from migration.sql first (local stand-in)")
+    args = parser.parse_args()
+
+    if not args.dsn and not args.dry_run:
+        parser.error("set $SUPABASE_DB_URL or pass --dsn")
+    if args.init_schema:
+        with connect(args.dsn) as conn:
+            create_schema(conn)
+    sync_database(dsn=args.dsn, full=args.full, dry_run=args.dry_run)
@@ -0,0 +1,113 @@
+import argparse
+import json
+import re
+from collections import Counter
+from functools import lru_cache
+from types import MappingProxyType
+
+# === CONFIG ===
+# Direction keywords interpreted as "uptown"; anything else sorts as downtown
+UPTOWN_TERMS = ("uptown", "bronx-bound", "queens-bound", "northbound")
+DOWNTOWN_TERMS = ("downtown", "brooklyn-bound", "manhattan-bound", "southbound")
+CACHE_SIZE = 4096  # distinct descriptions kept; the whole equipment feed has far fewer
+
+STREET_DESCRIPTION = "This elevator gets you from the street to the main station mezzanine"
+PLATFORM_DESCRIPTION = "This elevator gets you from the main station mezzanine to {lines} trains"
+DIRECTED_PLATFORM_DESCRIPTION = "This elevator gets you from the main station mezzanine to {direction} {lines} trains"
+
+# Compiled once: the first "<word>-bound" / "<word>bound" in a text, and the direction keywords
+BOUND_PATTERN = re.compile(r"\b([A-Za-z]+-?[Bb]ound)\b")
+UPTOWN_PATTERN = re.compile("|".join(re.escape(term) for term in UPTOWN_TERMS))
+DOWNTOWN_PATTERN = re.compile("|".join(re.escape(term) for term in DOWNTOWN_TERMS))
+STREET_PATTERN = re.compile(r"street", re.IGNORECASE)
+LINE_SEPARATORS = re.compile(r"[/,\s]+")
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def infer_direction(text):
+    """The first word ending in 'bound' (e.g. 'Queens-bound'), or "" when there is none."""
+    if not text:
+        return ""
+    match = BOUND_PATTERN.search(text)
+    return match.group(1) if match else ""
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def is_uptown(direction):
+    return bool(direction) and UPTOWN_PATTERN.search(direction.strip().lower()) is not None
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def is_downtown(direction):
+    return bool(direction) and DOWNTOWN_PATTERN.search(direction.strip().lower()) is not None
+
+
+def direction_rank(direction):
+    """Sort key that puts uptown elevators first."""
+    return 0 if is_uptown(direction) else 1
+
+
+def is_street_description(text):
+    return bool(text) and STREET_PATTERN.search(text) is not None
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def split_lines(lines_served):
+    """('A', 'C', 'F') from 'A/C/F' (also 'A C F' or 'A, C, F')."""
+    return tuple(line for line in LINE_SEPARATORS.split(lines_served or "") if line)
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def classify_text(serving, short_description, lines_served):
+    """
+    directionLabel, isStreet and description_custom for one elevator's feed
+    text. The direction comes from `serving`, else from the short description;
+    it may still need manual editing in the curated dataset. The result is
+    cached and shared between calls, so it is read-only.
+    """
+    direction = infer_direction(serving) or infer_direction(short_description)
+    is_street = is_street_description(short_description)
+    if is_street:
+        description = STREET_DESCRIPTION
+    elif direction:
+        description = DIRECTED_PLATFORM_DESCRIPTION.format(direction=direction, lines=lines_served)
+    else:
+        description = PLATFORM_DESCRIPTION.format(lines=lines_served)
+    return MappingProxyType({
+        "directionLabel": direction,
+        "isStreet": is_street,
+        "lines": split_lines(lines_served),
+        "description_custom": description,
+    })
+
+
+def classify(equip):
+    """classify_text for one equipment record, as a dict of its own the caller may change."""
+    return dict(classify_text(equip.get("serving") or "", equip.get("shortdescription") or "",
+                         equip.get("linesservedbyelevator") or ""))
+
+
+def classify_all(equipment):
+    """Classify a whole equipment list in one pass; repeated descriptions are only classified once."""
+    return [classify(equip) for equip in equipment]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Classify the direction, street/platform and lines of every elevator in an equipment feed.")
+    parser.add_argument("feed", help="saved equipment feed (e.g. generated/mta_equipments.json)")
+    args = parser.parse_args()
+
+    with open(args.feed, "r", encoding="utf-8") as f:
+        text = f.read()
+    if text.startswith("//"):
+        text = text.split("\n", 1)[1]
+    elevators = [e for e in json.loads(text) if e.get("equipmenttype") == "EL"]
+
+    results = classify_all(elevators)
+    info = classify_text.cache_info()
+    print(f"\n** 🧭 ELEVATOR CLASSIFICATION 🧭 **\n{len(results)} elevators, {info.currsize} distinct descriptions")
+    print(f"  street: {sum(r['isStreet'] for r in results)}, platform: {sum(not r['isStreet'] for r in results)}")
+    print(f"  with a direction: {sum(bool(r['directionLabel']) for r in results)}, uptown: "
+          f"{sum(is_uptown(r['directionLabel']) for r in results)}, downtown: {sum(is_downtown(r['directionLabel']) for r in results)}")
+    for direction, count in Counter(r["directionLabel"] for r in results if r["directionLabel"]).most_common(10):
+        print(f"  {direction:<24} {count}")
@@ -0,0 +1,97 @@
+import numpy as np
+
+# === CONFIG ===
+OFFSET_STEP = 0.0001  # ~11 meters between elevators placed at the same complex
+
+
+def factorize(values):
+    """Integer code for each value, numbered in order of first appearance."""
+    codes = {}
+    return np.fromiter((codes.setdefault(v, len(codes)) for v in values), dtype=np.int64, count=len(values))
+
+
+def group_ranks(groups, order=None):
+    """
+    Position of each row within its group of equal integer `groups`, counting
+    from 0. Rows are ranked in their original order, or by `order` (ascending,
+    ties keep original order) when given. Always the same result for the same input.
+    """
+    groups = np.asarray(groups, dtype=np.int64)
+    n = len(groups)
+    if n == 0:
+        return np.zeros(0, dtype=np.int64)
+    if order is None:
+        by_group = np.argsort(groups, kind="stable")
+    else:
+        by_group = np.lexsort((np.asarray(order), groups))  # stable, so ties keep their original order
+
+    # Rank = position in the sorted run minus the position where that group's run starts
+    sorted_groups = groups[by_group]
+    run_start = np.r_[0, np.flatnonzero(np.diff(sorted_groups)) + 1]
+    run_lengths = np.diff(np.r_[run_start, n])
+    ranks = np.empty(n, dtype=np.int64)
+    ranks[by_group] = np.arange(n) - np.repeat(run_start, run_lengths)
+    return ranks
+
+
+def as_coordinate_array(coords):
+    """(n, 2) float array from [[lon, lat], ...]; missing coordinates ([None, None] or None) become NaN."""
+    try:
+        return np.array(coords, dtype=np.float64).reshape(len(coords), 2)
+    except (TypeError, ValueError):
+        return np.array([c if c else (None, None) for c in coords], dtype=np.float64).reshape(len(coords), 2)
+
+
+def as_coordinate_lists(coords):
+    """Inverse of as_coordinate_array: [[lon, lat], ...] with [None, None] where a row is NaN."""
+    result = coords.tolist()
+    for i in np.flatnonzero(np.isnan(coords).any(axis=1)).tolist():
+        result[i] = [None, None]
+    return result
+
+
+def place_elevator_array(coords, complex_codes, is_street, offset_step=OFFSET_STEP):
+    """
+    Spread elevators that share a base coordinate so they don't sit on top of
+    each other. Elevators are grouped by (complex, is_street): street elevators
+    alternate left/right of the base point, the rest stack downward below it.
+
+    Takes and returns an (n, 2) array; rows that are NaN stay NaN and don't
+    take up a slot in their group.
+    """
+    coords = np.array(coords, dtype=np.float64)
+    is_street = np.asarray(is_street, dtype=bool)
+    valid = ~np.isnan(coords).any(axis=1)
+
+    groups = np.asarray(complex_codes, dtype=np.int64) * 2 + is_street
+    ranks = np.zeros(len(coords), dtype=np.int64)
+    ranks[valid] = group_ranks(groups[valid])
+
+    # Street: 1st goes left one step, 2nd right one step, 3rd left two steps, ...
+    street = valid & is_street
+    side = np.where(ranks % 2 == 0, -1, 1)
+    coords[street, 0] += side[street] * ((ranks[street] // 2 + 1) * offset_step)
+
+    # Everything else: stack downward one step per elevator
+    platform = valid & ~is_street
+    coords[platform, 1] -= (ranks[platform] + 1) * offset_step
+
+    return coords
+
+
+def place_elevators(base_coords, complex_ids, is_street, offset_step=OFFSET_STEP):
+    """place_elevator_array for plain lists: [[lon, lat], ...] in, [[lon, lat], ...] out."""
+    coords = place_elevator_array(as_coordinate_array(base_coords), factorize(complex_ids), is_street, offset_step)
+    return as_coordinate_lists(coords)
+
+
+def stack_under_complexes(base_coords, complex_ids, order=None, offset_step=OFFSET_STEP, start_offset=2):
+    """
+    Stack elevators in a single column under their complex coordinate,
+    beginning `start_offset` steps below it. `order` (e.g. 0 for uptown,
+    1 for downtown) decides who goes first within each complex.
+    """
+    coords = as_coordinate_array(base_coords)
+    ranks = group_ranks(factorize(complex_ids), order)
+    coords[:, 1] = (coords[:, 1] - start_offset * offset_step) - ranks * offset_step
+    return as_coordinate_lists(coords)
@@ -0,0 +1,217 @@
+import argparse
+import json
+import os
+import sqlite3
+
+from incrementalBuild import write_if_changed
+
+# Get directory where this script is located
+THIS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# === CONFIG ===
+STORE_FILE = os.environ.get("FEATURE_STORE_FILE", os.path.join(THIS_DIR, "..", ".cache", "datasets.sqlite"))
+
+# Columns every dataset table has, each with an index; datasets leave the ones they don't have NULL
+INDEXED_COLUMNS = ("elevatorno", "station_id", "complex_id", "gtfs_stop_id")
+
+# The GeoJSON file behind each dataset, the property that identifies a feature, and the property behind each indexed column
+DATASETS = {
+    "elevators": {
+        "file": os.path.join(THIS_DIR, "..", "..", "custom_elevator_dataset.json"),
+        "key": "elevatorno",
+        "columns": {"elevatorno": "elevatorno", "station_id": "stationID", "complex_id": "complexID", "gtfs_stop_id": "elevatorgtfsstopid"},
+    },
+    "stations": {
+        "file": os.path.join(THIS_DIR, "..", "..", "mta_subway_stations_all.json"),
+        "key": "gtfs_stop_id",
+        "columns": {"station_id": "station_id", "complex_id": "complex_id", "gtfs_stop_id": "gtfs_stop_id"},
+    },
+    "complexes": {
+        "file": os.path.join(THIS_DIR, "..", "..", "mta_subway_complexes.json"),
+        "key": "complex_id",
+        "columns": {"complex_id": "complex_id"},
+    },
+}
+
+
+def _text(value):
+    return None if value is None or value == "" else str(value)
+
+
+class FeatureStore:
+    """
+    The GeoJSON datasets kept in SQLite, one row per feature. Features are
+    stored as their original JSON, in file order, so exporting writes the same
+    file back. Lookups by elevatorno, station_id, complex_id or gtfs_stop_id go
+    through an index, and adding or updating features only touches their rows.
+    """
+
+    def __init__(self, path=STORE_FILE):
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self.db = sqlite3.connect(path)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        with self.db:
+            # The FeatureCollection minus its features (e.g. "_comment", "type"), and the file state it was read from
+            self.db.execute("CREATE TABLE IF NOT EXISTS collections (name TEXT PRIMARY KEY, header TEXT NOT NULL, "
+                            "source_mtime_ns INTEGER, source_size INTEGER)")
+            for name in DATASETS:
+                columns = ", ".join(f"{column} TEXT" for column in INDEXED_COLUMNS)
+                self.db.execute(f"CREATE TABLE IF NOT EXISTS {name} (key TEXT PRIMARY KEY, position INTEGER NOT NULL, "
+                                f"{columns}, feature TEXT NOT NULL)")
+                self.db.execute(f"CREATE INDEX IF NOT EXISTS {name}_position ON {name} (position)")
+                for column in INDEXED_COLUMNS:
+                    self.db.execute(f"CREATE INDEX IF NOT EXISTS {name}_{column} ON {name} ({column})")
+
+    def close(self):
+        self.db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _row(self, name, feature, position):
+        dataset = DATASETS[name]
+        props = feature.get("properties", {})
+        key = _text(props.get(dataset["key"]))
+        if key is None:
+            raise ValueError(f"{name} feature has no {dataset['key']}")
+        values = [_text(props.get(dataset["columns"][column])) if column in dataset["columns"] else None
+                  for column in INDEXED_COLUMNS]
+        return (key, position, *values, json.dumps(feature, separators=(",", ":")))
+
+    def _insert_sql(self, name):
+        placeholders = ", ".join("?" for _ in range(len(INDEXED_COLUMNS) + 3))
+        return f"INSERT OR REPLACE INTO {name} (key, position, {', '.join(INDEXED_COLUMNS)}, feature) VALUES ({placeholders})"
+
+    def _record_source(self, name, path):
+        stat = os.stat(path)
+        self.db.execute("UPDATE collections SET source_mtime_ns = ?, source_size = ? WHERE name = ?",
+                        (stat.st_mtime_ns, stat.st_size, name))
+
+    # === IMPORT / EXPORT ===
+    def load(self, name, path=None):
+        """Replace the `name` table with the features of a GeoJSON file. Returns the number of features."""
+        path = path or DATASETS[name]["file"]
+        with open(path, "r", encoding="utf-8") as f:
+            collection = json.load(f)
+        features = collection.get("features", [])
+        # Keep "features" in its original place among the top-level keys so the export matches the file
+        header = {key: None if key == "features" else value for key, value in collection.items()}
+        with self.db:
+            self.db.execute(f"DELETE FROM {name}")
+            self.db.executemany(self._insert_sql(name), (self._row(name, feat, i) for i, feat in enumerate(features)))
+            self.db.execute("INSERT OR REPLACE INTO collections (name, header) VALUES (?, ?)", (name, json.dumps(header)))
+            self._record_source(name, path)
+        return len(features)
+
+    def is_stale(self, name, path=None):
+        """True when the GeoJSON file changed (or was never loaded) since the store last read or wrote it."""
+        path = path or DATASETS[name]["file"]
+        row = self.db.execute("SELECT source_mtime_ns, source_size FROM collections WHERE name = ?", (name,)).fetchone()
+        if row is None or not os.path.exists(path):
+            return row is None
+        stat = os.stat(path)
+        return (stat.st_mtime_ns, stat.st_size) != tuple(row)
+
+    def sync(self, name, path=None):
+        """Load the file only if it changed since the store last saw it. Returns True if it was reloaded."""
+        if self.is_stale(name, path):
+            self.load(name, path)
+            return True
+        return False
+
+    def to_geojson(self, name):
+        row = self.db.execute("SELECT header FROM collections WHERE name = ?", (name,)).fetchone()
+        collection = json.loads(row[0]) if row else {"type": "FeatureCollection", "features": None}
+        collection["features"] = list(self.features(name))
+        return collection
+
+    def export(self, name, path=None):
+        """Write the dataset back to its GeoJSON file, formatted like the pipeline writes it. Returns True if the file changed."""
+        path = path or DATASETS[name]["file"]
+        written = write_if_changed(path, json.dumps(self.to_geojson(name), indent=2))
+        with self.db:
+            self._record_source(name, path)
+        return written
+
+    # === READS ===
+    def features(self, name):
+        for (feature,) in self.db.execute(f"SELECT feature FROM {name} ORDER BY position"):
+            yield json.loads(feature)
+
+    def get(self, name, key):
+        row = self.db.execute(f"SELECT feature FROM {name} WHERE key = ?", (str(key),)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def find(self, name, column, value):
+        """Features whose indexed `column` equals `value`, in file order."""
+        if column not in INDEXED_COLUMNS:
+            raise ValueError(f"{column} is not indexed; use one of {', '.join(INDEXED_COLUMNS)}")
+        rows = self.db.execute(f"SELECT feature FROM {name} WHERE {column} = ? ORDER BY position", (str(value),))
+        return [json.loads(feature) for (feature,) in rows]
+
+    def keys(self, name):
+        return {key for (key,) in self.db.execute(f"SELECT key FROM {name}")}
+
+    def count(self, name):
+        return self.db.execute(f"SELECT COUNT(*) FROM {name}").fetchone()[0]
+
+    # === WRITES ===
+    def upsert(self, name, features):
+        """Insert or replace features by key. Existing features keep their place; new ones go at the end. Returns the number written."""
+        features = list(features)
+        with self.db:
+            next_position = self.db.execute(f"SELECT COALESCE(MAX(position) + 1, 0) FROM {name}").fetchone()[0]
+            rows = []
+            for feature in features:
+                key = _text(feature.get("properties", {}).get(DATASETS[name]["key"]))
+                existing = self.db.execute(f"SELECT position FROM {name} WHERE key = ?", (key,)).fetchone()
+                if existing:
+                    position = existing[0]
+                else:
+                    position, next_position = next_position, next_position + 1
+                rows.append(self._row(name, feature, position))
+            self.db.executemany(self._insert_sql(name), rows)
+        return len(rows)
+
+    def delete(self, name, keys):
+        with self.db:
+            return self.db.executemany(f"DELETE FROM {name} WHERE key = ?", ((str(key),) for key in keys)).rowcount
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Keep the GeoJSON datasets in SQLite for indexed lookups and row-level updates.")
+    parser.add_argument("--store", default=STORE_FILE, help="SQLite file (default: %(default)s)")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("import", help="(re)load datasets whose GeoJSON file changed")
+    commands.add_parser("export", help="write datasets back to their GeoJSON files")
+    find = commands.add_parser("find", help="print the features matching an indexed column")
+    find.add_argument("column", choices=INDEXED_COLUMNS)
+    find.add_argument("value")
+    for command in (commands.choices["import"], commands.choices["export"], find):
+        command.add_argument("--dataset", choices=DATASETS, action="append",
+                             help="dataset to work on (repeatable; default: all)")
+    args = parser.parse_args()
+
+    with FeatureStore(args.store) as store:
+        names = args.dataset or list(DATASETS)
+        if args.command == "import":
+            print(f"\n** 🗄️ FEATURE STORE 🗄️ **")
+            for name in names:
+                reloaded = store.sync(name)
+                print(f"  {name}: {store.count(name)} features{' (reloaded)' if reloaded else ' (up to date)'}")
+        elif args.command == "export":
+            for name in names:
+                store.sync(name)  # never overwrite a file with an older copy of itself
+                written = store.export(name)
+                print(f"✅ {DATASETS[name]['file']} {'written' if written else 'unchanged'}")
+        else:
+            for name in names:
+                store.sync(name)
+                for feature in store.find(name, args.column, args.value):
+                    print(json.dumps({"dataset": name, **feature}))
@@ -0,0 +1,374 @@
+import argparse
+import bisect
+import gzip
+import json
+import os
+import time
+from collections import OrderedDict
+from datetime import datetime
+
+from incrementalBuild import hash_bytes, write_atomic
+
+# Get directory where this script is located
+THIS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# === CONFIG ===
+ARCHIVE_DIR = os.environ.get("FEED_ARCHIVE_DIR", os.path.join(THIS_DIR, "..", ".cache", "feed_archive"))
+COMPRESSION = os.environ.get("FEED_ARCHIVE_COMPRESSION", "gzip")  # gzip, or zstd with the zstandard package installed
+KEEP_DAYS = float(os.environ["FEED_ARCHIVE_KEEP_DAYS"]) if os.environ.get("FEED_ARCHIVE_KEEP_DAYS") else None  # None keeps everything
+KEYFRAME_INTERVAL = 64  # longest delta chain; reading a snapshot decompresses at most this many objects
+CACHE_SIZE = 8  # decoded objects kept in memory, so reading snapshots in order decodes each object once
+GZIP_LEVEL = 6
+ZSTD_LEVEL = 10
+EXTENSIONS = {"gzip": ".gz", "zstd": ".zst"}
+
+# Feeds whose raw payload updateData.py saves as is, so `add` can archive it between runs. The stations and
+# complexes files are the curated GeoJSON built from their feeds, a different shape than the stationsFeed and
+# complexesFeed snapshots replay hands back to the pipeline, so those two are only archived by updateData.py --archive
+FEED_FILES = {
+    "equipmentFeed": os.path.join(THIS_DIR, "..", "..", "generated", "mta_equipments.json"),
+}
+
+
+def canonical_bytes(data):
+    return json.dumps(data, sort_keys=True, separators=(",", ":")).encode("utf-8")
+
+
+def _records(data):
+    """The list a payload's deltas are taken over: a GeoJSON's features, or the payload itself when it is a list."""
+    if isinstance(data, dict) and isinstance(data.get("features"), list):
+        return data["features"], {key: value for key, value in data.items() if key != "features"}
+    if isinstance(data, list):
+        return data, None
+    return None, None
+
+
+def _compress(content, compression):
+    if compression == "zstd":
+        return _zstd().ZstdCompressor(level=ZSTD_LEVEL).compress(content)
+    return gzip.compress(content, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+def _decompress(content, compression):
+    if compression == "zstd":
+        return _zstd().ZstdDecompressor().decompress(content)
+    return gzip.decompress(content)
+
+
+def _zstd():
+    try:
+        import zstandard
+    except ImportError:
+        raise SystemExit("❌ zstd compression needs zstandard: pip install zstandard (or use FEED_ARCHIVE_COMPRESSION=gzip)")
+    return zstandard
+
+
+def delta_ops(base_hashes, record_hashes, records):
+    """
+    Rebuild `records` from a base: [start, length] copies a run of base records,
+    {"add": [...]} inserts new ones. Records are matched by their own hash, so
+    reordered or unchanged records cost a few integers each.
+    """
+    positions = {}
+    for i, record_hash in enumerate(base_hashes):
+        positions.setdefault(record_hash, i)
+    ops = []
+    for record_hash, record in zip(record_hashes, records):
+        i = positions.get(record_hash)
+        if i is None:
+            if ops and isinstance(ops[-1], dict):
+                ops[-1]["add"].append(record)
+            else:
+                ops.append({"add": [record]})
+        elif ops and isinstance(ops[-1], list) and ops[-1][0] + ops[-1][1] == i:
+            ops[-1][1] += 1
+        else:
+            ops.append([i, 1])
+    return ops
+
+
+def apply_ops(base_records, ops):
+    records = []
+    for op in ops:
+        if isinstance(op, dict):
+            records.extend(op["add"])
+        else:
+            records.extend(base_records[op[0]:op[0] + op[1]])
+    return records
+
+
+class FeedArchive:
+    """
+    Every snapshot of every feed, deduplicated by content hash. Each distinct
+    payload is one compressed object under objects/<hash[:2]>/<hash>, stored
+    either in full or as a delta against the feed's previous payload (runs of
+    unchanged records become [start, length] copies). A chain of deltas is
+    cut by a full keyframe every KEYFRAME_INTERVAL objects. Each feed has an
+    append-only <feed>.index with one "<unix time> <hash>" line per change,
+    so finding the snapshot in effect at any time is a binary search.
+    Payloads are stored as canonical JSON, the form the pipeline parses them into.
+    """
+
+    def __init__(self, archive_dir=ARCHIVE_DIR, compression=COMPRESSION):
+        if compression not in EXTENSIONS:
+            raise ValueError(f"Unknown compression {compression!r}, expected one of {sorted(EXTENSIONS)}")
+        self.dir = archive_dir
+        self.compression = compression
+        os.makedirs(os.path.join(self.dir, "objects"), exist_ok=True)
+        self._indexes = {}  # feed -> ([times], [hashes])
+        self._last = {}  # feed -> (hash, depth, record hashes, records) of its latest payload, for the next delta
+        self._cache = OrderedDict()
+
+    # --- storage ---
+
+    def _object_path(self, payload_hash):
+        for extension in EXTENSIONS.values():
+            path = os.path.join(self.dir, "objects", payload_hash[:2], payload_hash + extension)
+            if os.path.exists(path):
+                return path
+        return None
+
+    def _write_object(self, payload_hash, obj):
+        path = os.path.join(self.dir, "objects", payload_hash[:2], payload_hash + EXTENSIONS[self.compression])
+        content = _compress(canonical_bytes(obj), self.compression)
+        write_atomic(path, content)
+        return len(content)
+
+    def _read_object(self, payload_hash):
+        path = self._object_path(payload_hash)
+        if path is None:
+            raise KeyError(f"No archived object {payload_hash}")
+        compression = "zstd" if path.endswith(EXTENSIONS["zstd"]) else "gzip"
+        with open(path, "rb") as f:
+            return json.loads(_decompress(f.read(), compression))
+
+    def _index_path(self, feed):
+        return os.path.join(self.dir, f"{feed}.index")
+
+    def index(self, feed):
+        if feed not in self._indexes:
+            times, hashes = [], []
+            if os.path.exists(self._index_path(feed)):
+                with open(self._index_path(feed), "r", encoding="utf-8") as f:
+                    for line in f:
+                        at, payload_hash = line.split()
+                        times.append(float(at))
+                        hashes.append(payload_hash)
+            self._indexes[feed] = (times, hashes)
+        return self._indexes[feed]
+
+    def feeds(self):
+        return sorted(name[:-len(".index")] for name in os.listdir(self.dir) if name.endswith(".index"))
+
+    # --- reading ---
+
+    def load(self, payload_hash):
+        """The payload with this hash, rebuilt from its keyframe and the deltas after it."""
+        if payload_hash in self._cache:
+            self._cache.move_to_end(payload_hash)
+            return self._cache[payload_hash]
+        obj = self._read_object(payload_hash)
+        if obj["type"] == "full":
+            data = obj["data"]
+        else:
+            base_records, _ = _records(self.load(obj["base"]))
+            records = apply_ops(base_records, obj["ops"])
+            data = records if obj["envelope"] is None else {**obj["envelope"], "features": records}
+        self._cache[payload_hash] = data
+        if len(self._cache) > CACHE_SIZE:
+            self._cache.popitem(last=False)
+        return data
+
+    def locate(self, feed, at=None):
+        """(time, hash) of the snapshot in effect at `at` (default: the latest), or None before the first one."""
+        times, hashes = self.index(feed)
+        i = bisect.bisect_right(times, time.time() if at is None else at) - 1
+        if i < 0:
+            return None
+        return times[i], hashes[i]
+
+    def get(self, feed, at=None):
+        """(time, payload) of the snapshot in effect at `at` (default: the latest), or None before the first one."""
+        located = self.locate(feed, at)
+        if located is None:
+            return None
+        return located[0], self.load(located[1])
+
+    def snapshots(self, feed, start=None, end=None):
+        """Yield (time, hash, payload) for every archived change of `feed` in [start, end), oldest first."""
+        times, hashes = self.index(feed)
+        lo = 0 if start is None else bisect.bisect_left(times, start)
+        hi = len(times) if end is None else bisect.bisect_left(times, end)
+        for i in range(lo, hi):
+            yield times[i], hashes[i], self.load(hashes[i])
+
+    # --- writing ---
+
+    def _latest(self, feed):
+        if feed not in self._last:
+            times, hashes = self.index(feed)
+            if not hashes:
+                return None
+            payload_hash = hashes[-1]
+            depth = self._read_object(payload_hash).get("depth", 0)
+            records, _ = _records(self.load(payload_hash))
+            record_hashes = [hash_bytes(canonical_bytes(r)) for r in records] if records is not None else None
+            self._last[feed] = (payload_hash, depth, record_hashes, records)
+        return self._last[feed]
+
+    def add(self, feed, data, at=None):
+        """
+        Archive one snapshot of `feed`. Returns (hash, bytes written): no bytes
+        when the payload is already archived, and no index line either when it
+        is the feed's latest payload.
+        """
+        at = time.time() if at is None else at
+        payload_hash = hash_bytes(canonical_bytes(data))
+        latest = self._latest(feed)
+        if latest is not None and latest[0] == payload_hash:
+            return payload_hash, 0
+
+        records, envelope = _records(data)
+        record_hashes = [hash_bytes(canonical_bytes(r)) for r in records] if records is not None else None
+        written = 0
+        depth = 0
+        if self._object_path(payload_hash) is None:
+            obj = {"type": "full", "data": data, "depth": 0}
+            if latest is not None and records is not None and latest[2] is not None and latest[1] + 1 < KEYFRAME_INTERVAL:
+                ops = delta_ops(latest[2], record_hashes, records)
+                added = sum(len(op["add"]) for op in ops if isinstance(op, dict))
+                if added < len(records) / 2:  # otherwise the delta saves little and only lengthens the chain
+                    depth = latest[1] + 1
+                    obj = {"type": "delta", "base": latest[0], "depth": depth, "envelope": envelope, "ops": ops}
+            written = self._write_object(payload_hash, obj)
+        else:
+            depth = self._read_object(payload_hash).get("depth", 0)
+
+        with open(self._index_path(feed), "a", encoding="utf-8") as f:
+            f.write(f"{at:.3f} {payload_hash}\n")
+        times, hashes = self.index(feed)
+        times.append(at)
+        hashes.append(payload_hash)
+        self._last[feed] = (payload_hash, depth, record_hashes, records)
+        return payload_hash, written
+
+    # --- retention ---
+
+    def _reachable(self):
+        """Every object some index line needs, including the bases of its delta chain."""
+        needed = set()
+        for feed in self.feeds():
+            for payload_hash in set(self.index(feed)[1]):
+                while payload_hash not in needed:
+                    needed.add(payload_hash)
+                    obj = self._read_object(payload_hash)
+                    if obj["type"] != "delta":
+                        break
+                    payload_hash = obj["base"]
+        return needed
+
+    def prune(self, keep_days=KEEP_DAYS, now=None):
+        """
+        Drop snapshots older than `keep_days`, except the one still in effect at
+        the cutoff, then delete the objects nothing needs any more. Returns
+        (snapshots dropped, objects deleted).
+        """
+        if keep_days is None:
+            return 0, 0
+        cutoff = (time.time() if now is None else now) - keep_days * 86400
+        dropped = 0
+        for feed in self.feeds():
+            times, hashes = self.index(feed)
+            first = max(0, bisect.bisect_right(times, cutoff) - 1)
+            if first == 0:
+                continue
+            dropped += first
+            self._indexes[feed] = (times[first:], hashes[first:])
+            lines = "".join(f"{at:.3f} {payload_hash}\n" for at, payload_hash in zip(*self._indexes[feed]))
+            write_atomic(self._index_path(feed), lines.encode("utf-8"))
+
+        needed = self._reachable()
+        deleted = 0
+        objects_dir = os.path.join(self.dir, "objects")
+        for prefix in os.listdir(objects_dir):
+            for name in os.listdir(os.path.join(objects_dir, prefix)):
+                if name.split(".", 1)[0] not in needed:
+                    os.remove(os.path.join(objects_dir, prefix, name))
+                    deleted += 1
+        self._cache.clear()
+        return dropped, deleted
+
+    def size(self):
+        total = 0
+        for root, _, files in os.walk(self.dir):
+            total += sum(os.path.getsize(os.path.join(root, name)) for name in files)
+        return total
+
+
+def archive_feeds(*feeds, names, archive_dir=ARCHIVE_DIR, keep_days=KEEP_DAYS, at=None):
+    """Pipeline stage: archive this run's raw feeds (named by `names`, in order), then apply the retention policy."""
+    print(f"\n** 🗄️ FEED ARCHIVE 🗄️ **\nArchiving {', '.join(names)}...")
+    archive = FeedArchive(archive_dir)
+    at = time.time() if at is None else at
+    for name, data in zip(names, feeds):
+        if data is None:
+            continue
+        payload_hash, written = archive.add(name, data, at)
+        print(f"  {name}: {payload_hash[:12]} " + (f"stored, {written / 1024:.1f} KB" if written else "already archived"))
+    dropped, deleted = archive.prune(keep_days)
+    if dropped:
+        print(f"  retention: dropped {dropped} snapshots older than {keep_days:g} days, deleted {deleted} objects")
+    print(f"✅ Archive at {archive_dir} is {archive.size() / 1024 / 1024:.1f} MB")
+
+
+def parse_when(text):
+    """A unix time, or 'YYYY-MM-DD HH:MM[:SS]' in local time."""
+    try:
+        return float(text)
+    except ValueError:
+        for fmt in ("%Y-%m-%d %H:%M:%S", "%Y-%m-%d %H:%M", "%Y-%m-%d"):
+            try:
+                return datetime.strptime(text, fmt).timestamp()
+            except ValueError:
+                pass
+    raise argparse.ArgumentTypeError(f"not a time: {text!r}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Store raw feed snapshots in a compressed, content-addressed archive and read them back.")
+    parser.add_argument("--dir", default=ARCHIVE_DIR, help="archive directory (default: %(default)s)")
+    commands = parser.add_subparsers(dest="command", required=True)
+    add = commands.add_parser("add", help="archive the raw feed files updateData.py saved (the equipment feed)")
+    add.add_argument("feed", nargs="*", help=f"feeds to archive: {', '.join(sorted(FEED_FILES))} (default: all)")
+    get = commands.add_parser("get", help="print the snapshot of a feed in effect at a time")
+    get.add_argument("feed")
+    get.add_argument("--at", type=parse_when, help="unix time or 'YYYY-MM-DD HH:MM' (default: latest)")
+    commands.add_parser("list", help="snapshots and size per feed")
+    prune = commands.add_parser("prune", help="drop snapshots older than the retention window")
+    prune.add_argument("--keep-days", type=float, default=KEEP_DAYS, required=KEEP_DAYS is None)
+    args = parser.parse_args()
+
+    archive = FeedArchive(args.dir)
+    if args.command == "add":
+        from pipelineRunner import load_json
+        names = args.feed or sorted(FEED_FILES)
+        unknown = [name for name in names if name not in FEED_FILES]
+        if unknown:
+            parser.error(f"unknown feeds {unknown}, expected some of {sorted(FEED_FILES)}")
+        archive_feeds(*[load_json(FEED_FILES[name]) if os.path.exists(FEED_FILES[name]) else None for name in names],
+                      names=names, archive_dir=args.dir, keep_days=None)
+    elif args.command == "get":
+        snapshot = archive.get(args.feed, args.at)
+        if snapshot is None:
+            raise SystemExit(f"❌ No snapshot of {args.feed} at that time")
+        print(json.dumps(snapshot[1], indent=2))
+    elif args.command == "list":
+        print(f"\n** 🗄️ FEED ARCHIVE 🗄️ **")
+        for feed in archive.feeds():
+            times, hashes = archive.index(feed)
+            span = f"{datetime.fromtimestamp(times[0]):%Y-%m-%d %H:%M} → {datetime.fromtimestamp(times[-1]):%Y-%m-%d %H:%M}" if times else "-"
+            print(f"  {feed:<16} {len(times):>7} snapshots, {len(set(hashes)):>7} distinct  {span}")
+        print(f"  {'total':<16} {archive.size() / 1024 / 1024:.1f} MB")
+    else:
+        dropped, deleted = archive.prune(args.keep_days)
+        print(f"✅ Dropped {dropped} snapshots older than {args.keep_days:g} days, deleted {deleted} objects")
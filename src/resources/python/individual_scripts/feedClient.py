@@ -0,0 +1,294 @@
+import codecs
+import contextlib
+import hashlib
+import json
+import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# === CONFIG ===
+TIMEOUT = (5, 60)  # (connect, read) seconds per request
+MAX_RETRIES = 3
+BACKOFF_FACTOR = 0.5  # waits 0s, 1s, 2s before successive retries
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+CHUNK_SIZE = 64 * 1024  # bytes read from the socket / file per step when streaming
+
+# Get directory where this script is located
+THIS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Conditional-request cache: one validator file + one raw body file per URL
+CACHE_DIR = os.environ.get("FEED_CACHE_DIR", os.path.join(THIS_DIR, "..", ".cache", "feeds"))
+
+_session = None
+# Cache writes held back by deferred_cache(), {meta path: (body path, body, meta)}; None when writes go straight to disk
+_pending = None
+_pending_lock = threading.Lock()
+
+
+def make_session(pool_size=10, retries=MAX_RETRIES, backoff_factor=BACKOFF_FACTOR):
+    """Build a keep-alive session whose connection pool retries failed GETs with exponential backoff."""
+    retry = Retry(
+        total=retries,
+        backoff_factor=backoff_factor,
+        status_forcelist=RETRY_STATUSES,
+        allowed_methods=["GET"],
+    )
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def get_session():
+    """Shared session so every feed download in this process reuses the same pooled connections."""
+    global _session
+    if _session is None:
+        _session = make_session()
+    return _session
+
+
+def fetch_json(url, headers=None, session=None, timeout=TIMEOUT):
+    response = (session or get_session()).get(url, headers=headers, timeout=timeout)
+    response.raise_for_status()
+    return response.json()
+
+
+_WHITESPACE = re.compile(r"\s*")
+_DELIMITERS = ",] \t\r\n"
+
+# What iter_json_array expects next
+_OPEN, _FIRST, _ELEMENT, _SEPARATOR, _CLOSED = range(5)
+
+
+def iter_json_array(chunks):
+    """
+    Yield the elements of a top-level JSON array from an iterable of byte chunks
+    as soon as each one is complete, so memory holds one element plus one chunk
+    instead of the whole document. A leading '// ...' banner line is ignored.
+    Raises ValueError on anything but a well-formed array followed by whitespace,
+    so a truncated or corrupted feed fails instead of yielding part of itself.
+    """
+    decoder = json.JSONDecoder()
+    utf8 = codecs.getincrementaldecoder("utf-8")()
+    buffer = ""
+    expect = _OPEN
+    chunks = iter(chunks)
+    eof = False
+
+    while True:
+        if not eof:
+            chunk = next(chunks, None)
+            if chunk is None:
+                eof = True
+                buffer += utf8.decode(b"", final=True)
+            else:
+                buffer += utf8.decode(chunk)
+
+        pos = 0
+        while True:
+            pos = _WHITESPACE.match(buffer, pos).end()
+            if pos == len(buffer):
+                break
+            char = buffer[pos]
+            if expect == _OPEN:
+                if char == "/" and len(buffer) - pos < 2 and not eof:
+                    break
+                if buffer.startswith("//", pos):
+                    newline = buffer.find("\n", pos)
+                    if newline == -1:
+                        break
+                    pos = newline + 1
+                    continue
+                if char != "[":
+                    raise ValueError("Expected a JSON array")
+                expect = _FIRST
+                pos += 1
+                continue
+            if expect == _CLOSED:
+                raise ValueError("Unexpected data at end of JSON array")
+            if expect == _SEPARATOR:
+                if char not in ",]":
+                    raise ValueError(f"Expected ',' or ']' after an array element, found {char!r}")
+                expect = _ELEMENT if char == "," else _CLOSED
+                pos += 1
+                continue
+            if char == "]":
+                if expect == _ELEMENT:
+                    raise ValueError("Expected an array element after ','")
+                expect = _CLOSED
+                pos += 1
+                continue
+            try:
+                item, end = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                break  # element is split across chunks; read more
+            if not eof and (end == len(buffer) or buffer[end] not in _DELIMITERS):
+                break  # a number like -7.5e3 may continue in the next chunk
+            yield item
+            expect = _SEPARATOR
+            pos = end
+        buffer = buffer[pos:]
+
+        if eof:
+            if expect == _CLOSED:
+                return  # only whitespace followed the closing ']'
+            if expect == _OPEN:
+                raise ValueError("Expected a JSON array")
+            raise ValueError("Unterminated JSON array")
+
+
+def iter_file_chunks(path, chunk_size=CHUNK_SIZE):
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                return
+            yield chunk
+
+
+def stream_json_array(url, headers=None, session=None, timeout=TIMEOUT, save_to=None, header=""):
+    """
+    Stream a JSON array feed, yielding each element while the download is still
+    in progress. With `save_to`, the raw bytes are written (after `header`) to a
+    temp file as they arrive and moved into place once the array is complete.
+    """
+    response = (session or get_session()).get(url, headers=headers, timeout=timeout, stream=True)
+    response.raise_for_status()
+    chunks = response.iter_content(chunk_size=CHUNK_SIZE)
+
+    if save_to is None:
+        with response:
+            yield from iter_json_array(chunks)
+        return
+
+    os.makedirs(os.path.dirname(save_to), exist_ok=True)
+    tmp_path = f"{save_to}.tmp"
+    with response, open(tmp_path, "wb") as f:
+        f.write(header.encode("utf-8"))
+
+        def teed():
+            for chunk in chunks:
+                f.write(chunk)
+                yield chunk
+
+        yield from iter_json_array(teed())
+    os.replace(tmp_path, save_to)
+
+
+def _cache_paths(url, cache_dir):
+    key = hashlib.sha256(url.encode("utf-8")).hexdigest()
+    return os.path.join(cache_dir, f"{key}.json"), os.path.join(cache_dir, f"{key}.body")
+
+
+def _write_atomic(path, content):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(content)
+    os.replace(tmp_path, path)
+
+
+def fetch_json_cached(url, headers=None, session=None, timeout=TIMEOUT, cache_dir=None):
+    """
+    Conditional GET: send the ETag / Last-Modified we saw last time for `url`.
+    Returns (data, changed); on a 304 the data comes from the cached body and changed is False.
+    Inside deferred_cache() the new body and validators are only saved once the block succeeds.
+    """
+    meta_path, body_path = _cache_paths(url, cache_dir or CACHE_DIR)
+    meta = {}
+    if os.path.exists(meta_path) and os.path.exists(body_path):
+        with open(meta_path, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+
+    request_headers = dict(headers or {})
+    if meta.get("etag"):
+        request_headers["If-None-Match"] = meta["etag"]
+    if meta.get("last_modified"):
+        request_headers["If-Modified-Since"] = meta["last_modified"]
+
+    session = session or get_session()
+    response = session.get(url, headers=request_headers, timeout=timeout)
+    if response.status_code == 304:
+        if meta:
+            with open(body_path, "rb") as f:
+                return json.loads(f.read()), False
+        # Nothing cached to answer from (the validators came from the caller's headers); ask for the body itself
+        unconditional = {key: value for key, value in (headers or {}).items()
+                         if key.lower() not in ("if-none-match", "if-modified-since")}
+        response = session.get(url, headers=unconditional, timeout=timeout)
+        if response.status_code == 304:
+            raise requests.HTTPError(f"304 Not Modified for {url} without a cached copy to use", response=response)
+    response.raise_for_status()
+
+    etag = response.headers.get("ETag")
+    last_modified = response.headers.get("Last-Modified")
+    data = response.json()
+    if etag or last_modified:
+        meta = {"url": url, "etag": etag, "last_modified": last_modified}
+        with _pending_lock:
+            if _pending is not None:
+                _pending[meta_path] = (body_path, response.content, meta)
+                return data, True
+        _write_cache(meta_path, body_path, response.content, meta)
+    return data, True
+
+
+def _write_cache(meta_path, body_path, body, meta):
+    os.makedirs(os.path.dirname(meta_path), exist_ok=True)
+    _write_atomic(body_path, body)
+    _write_atomic(meta_path, json.dumps(meta).encode("utf-8"))
+
+
+@contextlib.contextmanager
+def deferred_cache():
+    """
+    Hold back the cache writes of fetch_json_cached until the block finishes
+    without an exception. Wrapping a pipeline run in it means a stage that
+    fails leaves the old validators in place, so the next run downloads the
+    feed again and re-runs the stages instead of getting a 304 and skipping them.
+    """
+    global _pending
+    with _pending_lock:
+        if _pending is not None:
+            raise RuntimeError("deferred_cache() blocks cannot be nested")
+        _pending = {}
+    try:
+        yield
+        with _pending_lock:
+            pending = _pending
+            _pending = None
+        for meta_path, (body_path, body, meta) in pending.items():
+            _write_cache(meta_path, body_path, body, meta)
+    finally:
+        with _pending_lock:
+            _pending = None
+
+
+def _fetch_concurrently(fetch, feeds, session, timeout, **kwargs):
+    session = session or get_session()
+    with ThreadPoolExecutor(max_workers=max(len(feeds), 1)) as pool:
+        futures = {
+            name: pool.submit(fetch, feed["url"], feed.get("headers"), session, timeout, **kwargs)
+            for name, feed in feeds.items()
+        }
+        return {name: future.result() for name, future in futures.items()}
+
+
+def fetch_all(feeds, session=None, timeout=TIMEOUT):
+    """
+    Download several feeds concurrently. `feeds` maps a name to {"url": ..., "headers": ...};
+    returns the parsed JSON keyed by the same names. The first failure is re-raised.
+    """
+    return _fetch_concurrently(fetch_json, feeds, session, timeout)
+
+
+def fetch_all_cached(feeds, session=None, timeout=TIMEOUT, cache_dir=None):
+    """Like fetch_all, but with conditional requests; returns {name: (data, changed)}."""
+    return _fetch_concurrently(fetch_json_cached, feeds, session, timeout, cache_dir=cache_dir)
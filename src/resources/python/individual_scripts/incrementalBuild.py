@@ -0,0 +1,100 @@
+import hashlib
+import json
+import os
+
+# Get directory where this script is located
+THIS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Paths in the manifest are stored relative to src/ so it survives the repo being checked out elsewhere
+SRC_DIR = os.path.normpath(os.path.join(THIS_DIR, "..", "..", ".."))
+MANIFEST_FILE = os.environ.get("BUILD_MANIFEST_FILE", os.path.join(THIS_DIR, "..", ".cache", "build_manifest.json"))
+
+
+def hash_bytes(content):
+    return hashlib.sha256(content).hexdigest()
+
+
+def hash_file(path):
+    with open(path, "rb") as f:
+        return hash_bytes(f.read())
+
+
+def hash_data(data):
+    """Hash parsed JSON by its canonical form, so key order and whitespace don't matter."""
+    return hash_bytes(json.dumps(data, sort_keys=True, separators=(",", ":")).encode("utf-8"))
+
+
+def _key(path):
+    return os.path.relpath(os.path.normpath(path), SRC_DIR)
+
+
+def load_manifest(manifest_file=None):
+    manifest_file = manifest_file or MANIFEST_FILE
+    if not os.path.exists(manifest_file):
+        return {}
+    try:
+        with open(manifest_file, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except json.JSONDecodeError:
+        print(f"⚠️ Warning: {manifest_file} is invalid. Rebuilding everything.")
+        return {}
+
+
+def write_atomic(path, content):
+    if os.path.dirname(path):  # a bare filename goes in the working directory
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(content)
+    os.replace(tmp_path, path)
+
+
+def _as_bytes(content):
+    return content.encode("utf-8") if isinstance(content, str) else content
+
+
+def write_if_changed(path, content):
+    """Atomically write `content` (text or bytes) to `path` unless the file already has exactly that content. Returns True if written."""
+    content = _as_bytes(content)
+    if os.path.exists(path):
+        with open(path, "rb") as f:
+            if f.read() == content:
+                return False
+    write_atomic(path, content)
+    return True
+
+
+def is_up_to_date(stage_name, input_hashes, output_paths, manifest_file=None):
+    """
+    A stage is up to date when its input hashes match the manifest and every
+    output it recorded (including `output_paths`) still has that content.
+    """
+    entry = load_manifest(manifest_file).get(stage_name)
+    if not entry or entry.get("inputs") != input_hashes:
+        return False
+    recorded = entry.get("outputs", {})
+    if any(_key(path) not in recorded for path in output_paths):
+        return False
+    for key, recorded_hash in recorded.items():
+        path = os.path.join(SRC_DIR, key)
+        if not os.path.exists(path) or hash_file(path) != recorded_hash:
+            return False
+    return True
+
+
+def record_stage(stage_name, input_hashes, outputs, manifest_file=None):
+    """Store the input hashes and the hashes of the `outputs` ({path: text or bytes}) a stage just produced."""
+    manifest_file = manifest_file or MANIFEST_FILE
+    manifest = load_manifest(manifest_file)
+    manifest[stage_name] = {
+        "inputs": input_hashes,
+        "outputs": {_key(path): hash_bytes(_as_bytes(content)) for path, content in outputs.items()},
+    }
+    write_atomic(manifest_file, json.dumps(manifest, indent=2, sort_keys=True).encode("utf-8"))
+
+
+def write_outputs(stage_name, input_hashes, outputs, manifest_file=None):
+    """Write each changed output, record the stage in the manifest and return the paths actually rewritten."""
+    written = [path for path, content in outputs.items() if write_if_changed(path, content)]
+    record_stage(stage_name, input_hashes, outputs, manifest_file)
+    return written
@@ -0,0 +1,131 @@
+import argparse
+import json
+import os
+import random
+import threading
+import time
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Get directory where this script is located
+THIS_DIR = os.path.dirname(os.path.abspath(__file__))
+CUSTOM_ELEVATOR_FILE = os.path.join(THIS_DIR, "..", "..", "custom_elevator_dataset.json")
+
+# === CONFIG ===
+DEFAULT_PORT = 8766
+OUTAGE_SHARE = 0.05  # share of elevators out of service in the first state
+CHANGES_PER_TICK = 3  # elevators that break or get restored every tick
+FEED_DATE_FORMAT = "%m/%d/%Y %I:%M:%S %p"  # same as the MTA feed, e.g. 07/14/2025 09:30:00 AM
+
+
+class MockOutageFeed:
+    """
+    A stand-in for the MTA nyct_ene.json outage feed. The outage set starts from
+    a seeded random sample and every tick a few elevators break or are restored,
+    so the same seed always produces the same sequence of feeds.
+    """
+
+    def __init__(self, elevators, seed=0, outage_share=OUTAGE_SHARE, changes_per_tick=CHANGES_PER_TICK, start=None):
+        self.elevators = {e["elevatorno"]: e for e in elevators}
+        self.rng = random.Random(seed)
+        self.changes_per_tick = changes_per_tick
+        self.start = start or datetime(2025, 1, 1, 6, 0, 0)
+        self.tick = 0
+        self.out = {}  # elevatorno -> outage start
+        self.upcoming = {}
+        self.lock = threading.Lock()
+        for elevatorno in self.rng.sample(sorted(self.elevators), int(len(self.elevators) * outage_share)):
+            self.out[elevatorno] = self.start
+        for elevatorno in self.rng.sample(sorted(self.elevators), max(1, changes_per_tick)):
+            if elevatorno not in self.out:
+                self.upcoming[elevatorno] = self.start + timedelta(days=3)
+
+    def advance(self, ticks=1):
+        with self.lock:
+            for _ in range(ticks):
+                self.tick += 1
+                now = self.start + timedelta(minutes=2 * self.tick)
+                for _ in range(self.changes_per_tick):
+                    elevatorno = self.rng.choice(sorted(self.elevators))
+                    if elevatorno in self.out:
+                        del self.out[elevatorno]
+                    else:
+                        self.out[elevatorno] = now
+
+    def _record(self, elevatorno, outage_start, upcoming):
+        elevator = self.elevators[elevatorno]
+        return {
+            "station": elevator.get("title", ""),
+            "borough": "",
+            "trainno": elevator.get("linesServed", "").replace("/", " "),
+            "equipment": elevatorno,
+            "equipmenttype": "EL",
+            "serving": elevator.get("shortdescription", ""),
+            "ADA": "Y",
+            "outagedate": outage_start.strftime(FEED_DATE_FORMAT),
+            "estimatedreturntoservice": (outage_start + timedelta(days=2)).strftime(FEED_DATE_FORMAT),
+            "reason": "Capital Replacement" if upcoming else "Repair",
+            "isupcomingoutage": "Y" if upcoming else "N",
+            "ismaintenanceoutage": "Y" if upcoming else "N",
+        }
+
+    def feed(self):
+        with self.lock:
+            return (
+                [self._record(no, start, False) for no, start in sorted(self.out.items())]
+                + [self._record(no, start, True) for no, start in sorted(self.upcoming.items())]
+            )
+
+
+def load_elevators(path=CUSTOM_ELEVATOR_FILE):
+    with open(path, "r", encoding="utf-8") as f:
+        return [feature["properties"] for feature in json.load(f)["features"]]
+
+
+def serve(mock, port=DEFAULT_PORT, tick_seconds=None):
+    """Serve the mock feed at /nyct_ene.json. With `tick_seconds` the outages change on a timer; POST /tick advances by hand."""
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?", 1)[0] not in ("/", "/nyct_ene.json"):
+                self.send_error(404)
+                return
+            body = json.dumps(mock.feed()).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_POST(self):
+            if self.path != "/tick":
+                self.send_error(404)
+                return
+            mock.advance()
+            self.send_response(204)
+            self.end_headers()
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+    if tick_seconds:
+        def tick_forever():
+            while True:
+                time.sleep(tick_seconds)
+                mock.advance()
+        threading.Thread(target=tick_forever, daemon=True).start()
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve a fake MTA elevator outage feed for testing the outage poller.")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--tick", type=float, metavar="SECONDS",
+                        help="break/restore a few elevators every SECONDS (default: only on POST /tick)")
+    args = parser.parse_args()
+
+    server = serve(MockOutageFeed(load_elevators(), seed=args.seed), args.port, args.tick)
+    print(f"** 🧪 MOCK OUTAGE FEED 🧪 **\nServing http://127.0.0.1:{args.port}/nyct_ene.json")
+    server.serve_forever()
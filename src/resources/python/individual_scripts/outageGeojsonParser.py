@@ -1,66 +1,94 @@
 import os
 import json
 
+from agencyAdapters import current_adapter
+from incrementalBuild import hash_data, hash_file, is_up_to_date, write_outputs
+import outputFormats
+from outputFormats import coordinate_module_outputs, dumps, format_signature, geojson_outputs, print_module_savings, remove_stale_chunks
+from pipelineRunner import unchanged
+
 # Get directory where this script is located
 THIS_DIR = os.path.dirname(os.path.abspath(__file__))
 
 # Paths relative to the script's directory
 INPUT_DATASET = os.path.join(THIS_DIR, "..", "..", "custom_elevator_dataset.json")
+INPUT_COMPLEXES = os.path.join(THIS_DIR, "..", "..", "mta_subway_complexes.json")
 INPUT_OUTAGE_DATASET = os.path.join(THIS_DIR, "..", "..", "generated", "elevatorOutagesDataset.geojson")
 OUTPUT_DATASET = os.path.join(THIS_DIR, "..", "..", "generated", "elevatorOutageGeometry.json")
-OUTPUT_JS = os.path.join(THIS_DIR, "..", "..", "..", "utils", "elevatorOutageGeometry.ts") 
-
-# Load the GeoJSON data from the file
-with open(INPUT_DATASET) as f:
-    geojson = json.load(f)
-
-# Initialize an empty list to store the transformed data
-outage_features = []
-
-# Initialize an empty dictionary to use to map real time data with
-outage_geometry_json = {}
-
-# Iterate through each feature in the GeoJSON data
-for feature in geojson['features']:
-    if feature['properties']['system'] == 'nyc_mta' or 'nyc_sir':
-        obj = {
-            'type': feature['type'],
-            'id': feature['properties']['elevatorno'],
-            'properties': {
-                'elevatorno': feature['properties']['elevatorno'],
-                'isBroken':  False
-            },
-            'geometry': {
-                'coordinates': feature['geometry']['coordinates'],
-                'type': feature['geometry']['type']
+OUTPUT_JS = os.path.join(THIS_DIR, "..", "..", "..", "utils", "elevatorOutageGeometry.ts")
+
+
+def write_outage_geometry(geojson=None, complexes=None, force=False):
+    # Load the GeoJSON data from the file unless the pipeline already handed it to us
+    if geojson is None:
+        with open(INPUT_DATASET) as f:
+            geojson = json.load(f)
+
+    # Skip entirely when neither the elevators nor this script changed since the outputs were last written
+    input_hashes = {"elevators": hash_data(geojson), "script": hash_file(__file__), "format": format_signature()}
+    if outputFormats.TS_FORMAT == "packed":
+        # Packed chunks are split by the borough of each elevator's complex
+        if complexes is None:
+            with open(INPUT_COMPLEXES) as f:
+                complexes = json.load(f)
+        complex_boroughs = {f["properties"]["complex_id"]: f["properties"].get("borough") for f in complexes["features"]}
+        input_hashes["complexes"] = hash_data(complex_boroughs)
+    if not force and is_up_to_date("outageGeojsonParser", input_hashes, [INPUT_OUTAGE_DATASET, OUTPUT_DATASET, OUTPUT_JS]):
+        print(f"\n** 📍 [2a] ELEVATOR COORDINATES 📍 **\n⏭️  Elevators unchanged, outputs are up to date")
+        return unchanged()
+
+    # Initialize an empty list to store the transformed data
+    outage_features = []
+
+    # Initialize an empty dictionary to use to map real time data with
+    outage_geometry_json = {}
+    boroughs = {}
+
+    # Iterate through each feature in the GeoJSON data
+    for feature in geojson['features']:
+        if feature['properties']['system'] in current_adapter().systems:
+            obj = {
+                'type': feature['type'],
+                'id': feature['properties']['elevatorno'],
+                'properties': {
+                    'elevatorno': feature['properties']['elevatorno'],
+                    'isBroken':  False
+                },
+                'geometry': {
+                    'coordinates': feature['geometry']['coordinates'],
+                    'type': feature['geometry']['type']
+                }
             }
-        }
-        
-        outage_geometry_json[feature['properties']['elevatorno']] = feature['geometry']['coordinates']
-        
-        outage_features.append(obj)
-
-outage_geojson = {
-    "_comment": "This file is auto-generated by updateData.py, do not edit manually",
-    'features': outage_features,
-    'type': 'FeatureCollection'
-
-}
-
-# Write the transformed data to a file
-with open(INPUT_OUTAGE_DATASET, 'w') as f:
-    json.dump(outage_geojson, f, indent=2)
-    
-# Write geometry json data to a file
-with open(OUTPUT_DATASET, 'w') as f:
-    f.write("// 🚨 This file is auto-generated by updateData.py. Do not edit manually.\n")
-    json.dump(outage_geometry_json, f, indent=2)
-
-# Save the compact JSON as a JavaScript const
-js_content = f"/* 🚨 This file is auto-generated by updateData.py. Do not edit manually. */\nexport const elevatorCoordinates: Record<string, [number, number]> = {json.dumps(outage_geometry_json, indent=2)}"
-
-with open(OUTPUT_JS, "w") as f:
-    f.write(js_content)
-
-print(f"\n** 📍 [2a] ELEVATOR COORDINATES 📍 **\n✅ Generated {len(outage_features)} features and saved to {OUTPUT_DATASET}")
-print(f"JavaScript file saved to {OUTPUT_JS}")
\ No newline at end of file
+
+            outage_geometry_json[feature['properties']['elevatorno']] = feature['geometry']['coordinates']
+            if outputFormats.TS_FORMAT == "packed":
+                boroughs[feature['properties']['elevatorno']] = complex_boroughs.get(feature['properties'].get('complexID'))
+
+            outage_features.append(obj)
+
+    outage_geojson = {
+        "_comment": "This file is auto-generated by updateData.py, do not edit manually",
+        'features': outage_features,
+        'type': 'FeatureCollection'
+
+    }
+
+    # Write the transformed data, geometry json and JavaScript files, only touching the ones whose content changed
+    outputs = geojson_outputs(INPUT_OUTAGE_DATASET, outage_geojson, "elevatorno")
+    outputs[OUTPUT_DATASET] = "// 🚨 This file is auto-generated by updateData.py. Do not edit manually.\n" + dumps(outage_geometry_json)
+    # The TS lookup, split into per-borough chunks when the TS format is "packed"
+    js_outputs = coordinate_module_outputs(OUTPUT_JS, "elevatorCoordinates", outage_geometry_json, boroughs)
+    outputs.update(js_outputs)
+    written = write_outputs("outageGeojsonParser", input_hashes, outputs)
+    remove_stale_chunks(OUTPUT_JS, js_outputs)  # once the index no longer imports them
+
+    print(f"\n** 📍 [2a] ELEVATOR COORDINATES 📍 **\n✅ Generated {len(outage_features)} features and saved to {OUTPUT_DATASET}")
+    print(f"JavaScript file saved to {OUTPUT_JS}")
+    print_module_savings("elevatorCoordinates", outage_geometry_json, js_outputs)
+    print(f"{len(written)} of {len(outputs)} files changed on disk")
+
+    return outage_geojson
+
+
+if __name__ == "__main__":
+    write_outage_geometry()
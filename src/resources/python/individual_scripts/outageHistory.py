@@ -0,0 +1,293 @@
+import argparse
+import io
+import json
+import os
+import threading
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+
+from feedClient import fetch_json
+from incrementalBuild import write_atomic
+from outageState import current_outages
+
+# Get directory where this script is located
+THIS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# === CONFIG ===
+HISTORY_DIR = os.environ.get("OUTAGE_HISTORY_DIR", os.path.join(THIS_DIR, "..", ".cache", "outage_history"))
+CUSTOM_ELEVATOR_FILE = os.path.join(THIS_DIR, "..", "..", "custom_elevator_dataset.json")
+OUTAGES_URL = os.environ.get("MTA_OUTAGES_URL", "https://api-endpoint.mta.info/Dataservice/mtagtfsfeeds/nyct%2Fnyct_ene.json")
+MAX_GAP = 15 * 60  # seconds between snapshots beyond which the time in between counts as unobserved
+DAY = 24 * 60 * 60
+DAYS_PER_MONTH = 365.25 / 12
+
+# Columns of the per-day stats arrays, one row per elevator
+OBSERVED, DOWN, OUTAGES, REPAIRS, REPAIR_SECONDS = range(5)
+STAT_COLUMNS = 5
+
+# State transitions are appended per UTC day, one file per column: <day>.time.i8, <day>.elevator.i4, <day>.state.i1
+TRANSITION_COLUMNS = {"time": np.dtype("<i8"), "elevator": np.dtype("<i4"), "state": np.dtype("i1")}
+WENT_DOWN, CAME_BACK = 1, 0
+
+
+def _day_name(day):
+    return datetime.fromtimestamp(day * DAY, timezone.utc).strftime("%Y-%m-%d")
+
+
+def _column_file(day, column):
+    return f"{_day_name(day)}.{column}.{TRANSITION_COLUMNS[column].str[1:]}"
+
+
+def _npy_bytes(array):
+    buffer = io.BytesIO()
+    np.save(buffer, array)
+    return buffer.getvalue()
+
+
+class OutageHistory:
+    """
+    Every elevator's outage history, built from a stream of outage snapshots.
+    Each snapshot is diffed against the last one. Transitions (went down /
+    came back) are appended to per-day column files, and per-day and all-time
+    totals are updated as the snapshots arrive: time observed, time down,
+    outages started, repairs finished and their duration. Reliability over any
+    window is the sum of its days' totals, so no query rescans the transitions.
+    """
+
+    def __init__(self, history_dir=HISTORY_DIR, elevators=()):
+        self.dir = history_dir
+        os.makedirs(self.dir, exist_ok=True)
+        state = {}
+        if os.path.exists(self._path("state.json")):
+            with open(self._path("state.json"), "r", encoding="utf-8") as f:
+                state = json.load(f)
+        self.ids = state.get("elevators", [])  # row of each elevator in the stats arrays, in order of first sight
+        self.index = {elevatorno: i for i, elevatorno in enumerate(self.ids)}
+        self.down_since = state.get("down_since", {})  # elevators out at the last snapshot -> when they went down
+        self.last_snapshot = state.get("last_snapshot")
+        self.totals = np.load(self._path("totals.npy")) if os.path.exists(self._path("totals.npy")) \
+            else np.zeros((0, STAT_COLUMNS))
+        self._days = {}  # day number -> stats array, loaded on first use
+        self._transitions = {}  # day number -> {column: array}, for days that are over
+        self._pending = {}  # day number -> [(time, row, state)] not yet flushed
+        self._dirty = set()
+        self.lock = threading.Lock()  # the poller thread ingests while request threads query
+        self.add_elevators(elevators)
+
+    def _path(self, name):
+        return os.path.join(self.dir, name)
+
+    def _fit(self, array):
+        """Pad a stats array with zero rows for elevators first seen after it was written."""
+        if len(array) < len(self.ids):
+            array = np.vstack([array, np.zeros((len(self.ids) - len(array), STAT_COLUMNS))])
+        return array
+
+    def add_elevators(self, elevators):
+        for elevatorno in elevators:
+            if elevatorno not in self.index:
+                self.index[elevatorno] = len(self.ids)
+                self.ids.append(elevatorno)
+        self.totals = self._fit(self.totals)
+
+    def day_stats(self, day):
+        if day not in self._days:
+            path = self._path(f"{_day_name(day)}.stats.npy")
+            self._days[day] = np.load(path) if os.path.exists(path) else np.zeros((0, STAT_COLUMNS))
+        self._days[day] = self._fit(self._days[day])
+        return self._days[day]
+
+    # === INGEST ===
+    def _accumulate(self, start, end, down_rows):
+        """Count [start, end) as observed for every elevator and as down for `down_rows`, split at day boundaries."""
+        while start < end:
+            day = int(start // DAY)
+            stop = min(end, (day + 1) * DAY)
+            stats = self.day_stats(day)
+            for array in (stats, self.totals):
+                array[:, OBSERVED] += stop - start
+                array[down_rows, DOWN] += stop - start
+            self._dirty.add(day)
+            start = stop
+
+    def _count(self, at, row, column, amount=1):
+        day = int(at // DAY)
+        self.day_stats(day)[row, column] += amount
+        self.totals[row, column] += amount
+        self._dirty.add(day)
+
+    def ingest(self, out_elevators, at=None):
+        """
+        Apply one snapshot: the elevators out of service at time `at` (unix
+        seconds, default now). Snapshots must arrive in time order; older ones
+        are ignored. Outages already in progress at the first snapshot count
+        from that snapshot. Returns (went down, came back), or None if ignored.
+        """
+        at = time.time() if at is None else float(at)
+        if self.last_snapshot is not None and at <= self.last_snapshot:
+            return None
+        out = set(out_elevators)
+        self.add_elevators(sorted(out - self.index.keys()))
+
+        if self.last_snapshot is not None and at - self.last_snapshot <= MAX_GAP:
+            down_rows = np.fromiter((self.index[e] for e in self.down_since), dtype=np.int64, count=len(self.down_since))
+            self._accumulate(self.last_snapshot, at, down_rows)
+
+        went_down = sorted(out - self.down_since.keys())
+        came_back = sorted(self.down_since.keys() - out)
+        pending = self._pending.setdefault(int(at // DAY), [])
+        for elevatorno in went_down:
+            self.down_since[elevatorno] = at
+            self._count(at, self.index[elevatorno], OUTAGES)
+            pending.append((int(at), self.index[elevatorno], WENT_DOWN))
+        for elevatorno in came_back:
+            since = self.down_since.pop(elevatorno)
+            self._count(at, self.index[elevatorno], REPAIRS)
+            self._count(at, self.index[elevatorno], REPAIR_SECONDS, at - since)
+            pending.append((int(at), self.index[elevatorno], CAME_BACK))
+        self.last_snapshot = at
+        return went_down, came_back
+
+    def ingest_feed(self, feed, at=None):
+        return self.ingest(current_outages(feed), at)
+
+    def flush(self):
+        """Append the new transitions and save the changed totals. Call after each snapshot or batch of snapshots."""
+        for day, rows in self._pending.items():
+            if not rows:
+                continue
+            columns = list(zip(*rows))
+            for (column, dtype), values in zip(TRANSITION_COLUMNS.items(), columns):
+                with open(self._path(_column_file(day, column)), "ab") as f:
+                    f.write(np.asarray(values, dtype=dtype).tobytes())
+            self._transitions.pop(day, None)
+        self._pending = {}
+        for day in self._dirty:
+            write_atomic(self._path(f"{_day_name(day)}.stats.npy"), _npy_bytes(self._days[day]))
+        self._dirty = set()
+        write_atomic(self._path("totals.npy"), _npy_bytes(self.totals))
+        write_atomic(self._path("state.json"), json.dumps({
+            "elevators": self.ids, "down_since": self.down_since, "last_snapshot": self.last_snapshot,
+        }).encode("utf-8"))
+
+    # === QUERIES ===
+    def window_stats(self, days=None, end=None):
+        """Summed stats rows over the `days` UTC days up to `end` (default: the last snapshot); all time when `days` is None."""
+        if days is None:
+            return self.totals
+        end = end if end is not None else (self.last_snapshot or time.time())
+        last_day = int(end // DAY)
+        stats = np.zeros((len(self.ids), STAT_COLUMNS))
+        for day in range(last_day - days + 1, last_day + 1):
+            stats += self.day_stats(day)
+        return stats
+
+    def reliability(self, days=None, end=None, elevators=None):
+        """
+        {elevatorno: {uptime_pct, mttr_hours, outages_per_month, outages,
+        observed_days}} over a window (see window_stats). Uptime is the share
+        of observed time the elevator was in service. MTTR averages the outages
+        that ended in the window. Outages per month are scaled from the observed
+        time, once there is at least a day of it.
+        """
+        stats = self.window_stats(days, end)
+        observed = stats[:, OBSERVED]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            uptime = np.where(observed > 0, 100 * (1 - stats[:, DOWN] / observed), np.nan)
+            mttr = np.where(stats[:, REPAIRS] > 0, stats[:, REPAIR_SECONDS] / stats[:, REPAIRS] / 3600, np.nan)
+            # Scaling less than a day of observation up to a month would say nothing useful
+            per_month = np.where(observed >= DAY, stats[:, OUTAGES] / (observed / DAY) * DAYS_PER_MONTH, np.nan)
+        rows = np.arange(len(self.ids)) if elevators is None else np.array([self.index[e] for e in elevators if e in self.index], dtype=np.int64)
+        as_list = lambda values, places: [None if value != value else value for value in np.round(values[rows], places).tolist()]  # NaN -> None
+        columns = zip(
+            as_list(uptime, 3), as_list(mttr, 2), as_list(per_month, 2),
+            stats[rows, OUTAGES].astype(int).tolist(), np.round(observed[rows] / DAY, 2).tolist(),
+        )
+        return {
+            self.ids[i]: {"uptime_pct": u, "mttr_hours": m, "outages_per_month": p, "outages": o, "observed_days": d}
+            for i, (u, m, p, o, d) in zip(rows.tolist(), columns)
+        }
+
+    def _day_transitions(self, day):
+        if day in self._transitions:
+            return self._transitions[day]
+        columns = {}
+        for column, dtype in TRANSITION_COLUMNS.items():
+            path = self._path(_column_file(day, column))
+            columns[column] = np.fromfile(path, dtype=dtype) if os.path.exists(path) else np.zeros(0, dtype=dtype)
+        if self.last_snapshot is None or day < int(self.last_snapshot // DAY):
+            self._transitions[day] = columns  # finished days never change again
+        return columns
+
+    def transitions(self, elevatorno, start, end=None):
+        """[(unix time, WENT_DOWN or CAME_BACK)] for one elevator between `start` and `end` (unix seconds), flushed transitions only."""
+        end = end if end is not None else (self.last_snapshot or time.time())
+        row = self.index.get(elevatorno)
+        if row is None:
+            return []
+        result = []
+        for day in range(int(start // DAY), int(end // DAY) + 1):
+            columns = self._day_transitions(day)
+            mask = (columns["elevator"] == row) & (columns["time"] >= start) & (columns["time"] <= end)
+            result.extend(zip(columns["time"][mask].tolist(), columns["state"][mask].tolist()))
+        return result
+
+    def outage_intervals(self, elevatorno, start, end=None):
+        """[(went down, came back or None if still out)] for one elevator, from its transitions."""
+        intervals = []
+        for at, state in self.transitions(elevatorno, start, end):
+            if state == WENT_DOWN:
+                intervals.append([at, None])
+            elif intervals and intervals[-1][1] is None:
+                intervals[-1][1] = at
+            else:
+                intervals.append([None, at])  # went down before `start`
+        return [tuple(interval) for interval in intervals]
+
+
+def load_history(history_dir=HISTORY_DIR):
+    """The history, with every elevator in the custom dataset known up front so their up time is counted too."""
+    with open(CUSTOM_ELEVATOR_FILE, "r", encoding="utf-8") as f:
+        elevators = [feature["properties"]["elevatorno"] for feature in json.load(f)["features"]]
+    return OutageHistory(history_dir, elevators)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Record elevator outage snapshots and report per-elevator reliability.")
+    parser.add_argument("--dir", default=HISTORY_DIR, help="history directory (default: %(default)s)")
+    commands = parser.add_subparsers(dest="command", required=True)
+    ingest = commands.add_parser("ingest", help="record one snapshot of the outage feed")
+    ingest.add_argument("--outages", default=OUTAGES_URL, help="outage feed URL or a saved nyct_ene.json file")
+    stats = commands.add_parser("stats", help="print reliability per elevator, least reliable first")
+    stats.add_argument("--days", type=int, help="rolling window in days (default: all time)")
+    stats.add_argument("--elevator", action="append", help="elevatorno to report (repeatable; default: all)")
+    stats.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args()
+
+    history = load_history(args.dir)
+    if args.command == "ingest":
+        if os.path.exists(args.outages):
+            with open(args.outages, "r", encoding="utf-8") as f:
+                feed = json.load(f)
+        else:
+            api_key = os.environ.get("MTA_API_KEY")
+            feed = fetch_json(args.outages, headers={"x-api-key": api_key} if api_key else None)
+        went_down, came_back = history.ingest_feed(feed) or ([], [])
+        history.flush()
+        print(f"\n** 📈 OUTAGE HISTORY 📈 **\n{len(history.down_since)} elevators out: "
+              f"{len(went_down)} went down, {len(came_back)} came back since the last snapshot")
+    else:
+        report = history.reliability(args.days, elevators=args.elevator)
+        if args.json:
+            print(json.dumps(report, indent=2))
+        else:
+            window = f"last {args.days} days" if args.days else "all time"
+            print(f"\n** 📈 ELEVATOR RELIABILITY ({window}) 📈 **")
+            print(f"  {'elevator':<10} {'uptime %':>9} {'MTTR h':>8} {'out/month':>10} {'outages':>8} {'days':>7}")
+            ranked = sorted(report.items(), key=lambda item: item[1]["uptime_pct"] if item[1]["uptime_pct"] is not None else 101)
+            for elevatorno, r in ranked:
+                fmt = lambda value, spec: format(value, spec) if value is not None else "-"
+                print(f"  {elevatorno:<10} {fmt(r['uptime_pct'], '9.2f'):>9} {fmt(r['mttr_hours'], '8.1f'):>8} "
+                      f"{fmt(r['outages_per_month'], '10.2f'):>10} {r['outages']:>8} {r['observed_days']:>7.1f}")
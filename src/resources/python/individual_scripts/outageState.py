@@ -0,0 +1,63 @@
+import threading
+from collections import deque
+
+# Outage fields clients need; everything else in the feed record is static elevator data they already have
+OUTAGE_FIELDS = ("reason", "outagedate", "estimatedreturntoservice")
+HISTORY_SIZE = 500  # deltas kept so a reconnecting client can catch up instead of re-downloading the snapshot
+
+
+def current_outages(feed):
+    """{elevatorno: {reason, outagedate, estimatedreturntoservice}} for elevators out of service right now."""
+    return {
+        record["equipment"]: {field: record.get(field) for field in OUTAGE_FIELDS}
+        for record in feed
+        if record.get("equipmenttype") == "EL" and record.get("isupcomingoutage") == "N"
+    }
+
+
+def outage_delta(old, new):
+    """Elevators that broke (or whose outage details changed) and elevators that were restored between two states."""
+    broken = {elevatorno: outage for elevatorno, outage in new.items() if old.get(elevatorno) != outage}
+    restored = sorted(elevatorno for elevatorno in old if elevatorno not in new)
+    return broken, restored
+
+
+class OutageState:
+    """
+    Current elevator outages keyed by elevatorno, plus a numbered history of
+    deltas. Safe to update from a poller thread while request threads read it.
+    """
+
+    def __init__(self, history_size=HISTORY_SIZE):
+        self.outages = {}
+        self.version = 0
+        self.loaded = False  # a feed has been applied; version stays 0 if it had no outages
+        self.history = deque(maxlen=history_size)
+        self.lock = threading.Lock()
+
+    def update(self, feed):
+        """Apply a fresh outage feed. Returns the delta, or None when nothing changed."""
+        new = current_outages(feed)
+        with self.lock:
+            self.loaded = True
+            broken, restored = outage_delta(self.outages, new)
+            if not broken and not restored:
+                return None
+            self.outages = new
+            self.version += 1
+            delta = {"version": self.version, "broken": broken, "restored": restored}
+            self.history.append(delta)
+            return delta
+
+    def snapshot(self):
+        with self.lock:
+            return {"version": self.version, "outages": dict(self.outages)}
+
+    def deltas_since(self, version):
+        """Every delta after `version`, or None if some of them have already dropped out of the history."""
+        with self.lock:
+            if version == self.version:
+                return []
+            if not self.history or version < self.history[0]["version"] - 1 or version > self.version:
+                return None
+            return [delta for delta in self.history if delta["version"] > version]
@@ -0,0 +1,316 @@
+import argparse
+import glob
+import gzip
+import json
+import os
+import struct
+
+# Get directory where this script is located
+THIS_DIR = os.path.dirname(os.path.abspath(__file__))
+GENERATED_DIR = os.path.join(THIS_DIR, "..", "..", "generated")
+
+# === CONFIG ===
+# "pretty" keeps the current indent=2 output; "minified" drops all whitespace
+FORMATS = ("pretty", "minified")
+OUTPUT_FORMAT = os.environ.get("OUTPUT_FORMAT", "pretty")
+# Decimal places kept for coordinates; None keeps full precision (6 places ≈ 0.1 m)
+COORD_PRECISION = int(os.environ["COORD_PRECISION"]) if os.environ.get("COORD_PRECISION") else None
+# Also write a compact binary copy (.bin) next to every generated GeoJSON
+WRITE_BINARY = os.environ.get("WRITE_BINARY", "") == "1"
+# "object" writes each TS coordinate lookup as one inline object literal; "packed" writes a small index module
+# plus one lazily imported chunk per group (borough) holding an ID list and a Float64Array of lon/lat pairs
+TS_FORMATS = ("object", "packed")
+TS_FORMAT = os.environ.get("TS_FORMAT", "object")
+TS_HEADER = "/* 🚨 This file is auto-generated by updateData.py. Do not edit manually. */\n"
+CHUNK_DIR = "coordinates"  # next to the index module
+PACKED_RUNTIME = os.path.join(THIS_DIR, "..", "..", "..", "utils", "packedCoordinates")  # utils/packedCoordinates.ts
+UNGROUPED_CHUNK = "other"  # IDs without a group
+
+# Binary layout (little-endian):
+#   header   4s magic "TAGB" | u8 version | u8 geometry type | u8 precision | u8 reserved | u32 features | u32 vertices
+#   offsets  i32[features + 1]  index of each feature's first vertex (last entry = vertices)
+#   coords   i32[vertices * 2]  lon/lat scaled by 10**precision
+#            (a feature without coordinates has no vertices, so its ID still lines up with its offset)
+#   ids      u32 byte length, then the feature IDs as UTF-8 joined by "\n"
+BINARY_MAGIC = b"TAGB"
+BINARY_VERSION = 1
+BINARY_HEADER = struct.Struct("<4sBBBBII")
+GEOMETRY_TYPES = {"Point": 1, "LineString": 2}
+DEFAULT_BINARY_PRECISION = 6
+MAX_BINARY_PRECISION = 7  # 180 * 10**8 no longer fits in an i32
+
+# GeoJSON outputs the size report compares, with the property used as each feature's ID
+GENERATED_GEOJSON = {
+    "accessibleStationGeometry.geojson": "station_id",
+    "ComplexGeometry.geojson": "complex_id",
+    "elevatorOutagesDataset.geojson": "elevatorno",
+    "street_to_complex_lines.geojson": "elevator_no",
+}
+
+
+def configure(fmt=None, precision=None, binary=None, ts_format=None):
+    """Override the env-var defaults, e.g. from updateData.py command-line flags."""
+    global OUTPUT_FORMAT, COORD_PRECISION, WRITE_BINARY, TS_FORMAT
+    if fmt is not None:
+        if fmt not in FORMATS:
+            raise ValueError(f"Unknown output format {fmt!r}, expected one of {FORMATS}")
+        OUTPUT_FORMAT = fmt
+    if precision is not None:
+        COORD_PRECISION = precision
+    if binary is not None:
+        WRITE_BINARY = binary
+    if ts_format is not None:
+        if ts_format not in TS_FORMATS:
+            raise ValueError(f"Unknown TS format {ts_format!r}, expected one of {TS_FORMATS}")
+        TS_FORMAT = ts_format
+
+
+def format_signature():
+    """Settings that change generated bytes, so incremental builds rebuild when they change."""
+    return f"{OUTPUT_FORMAT}:{COORD_PRECISION}:{int(WRITE_BINARY)}:{TS_FORMAT}"
+
+
+def quantize(data, precision):
+    """Round every float to `precision` decimals (the only floats in generated files are coordinates)."""
+    if isinstance(data, float):
+        return round(data, precision)
+    if isinstance(data, list):
+        return [quantize(item, precision) for item in data]
+    if isinstance(data, dict):
+        return {key: quantize(value, precision) for key, value in data.items()}
+    return data
+
+
+def dumps(data, fmt=None, precision=None):
+    """Serialize generated JSON in the configured output format."""
+    fmt = fmt or OUTPUT_FORMAT
+    precision = COORD_PRECISION if precision is None else precision
+    if precision is not None:
+        data = quantize(data, precision)
+    if fmt == "minified":
+        return json.dumps(data, separators=(",", ":"))
+    return json.dumps(data, indent=2)
+
+
+def binary_path(geojson_path):
+    return os.path.splitext(geojson_path)[0] + ".bin"
+
+
+def encode_binary(feature_collection, id_property, precision=None):
+    """Pack a Point or LineString FeatureCollection into flat Int32 coordinate arrays plus an ID table."""
+    if precision is None:
+        precision = DEFAULT_BINARY_PRECISION if COORD_PRECISION is None else COORD_PRECISION
+    if not 0 <= precision <= MAX_BINARY_PRECISION:
+        raise ValueError(f"Binary encoding supports a precision of 0 to {MAX_BINARY_PRECISION} decimal places, got {precision}")
+    scale = 10 ** precision
+    features = feature_collection["features"]
+    geometry_types = {f["geometry"]["type"] for f in features if f.get("geometry")} or {"Point"}
+    if len(geometry_types) != 1 or next(iter(geometry_types)) not in GEOMETRY_TYPES:
+        raise ValueError(f"Binary encoding supports one geometry type per file, got {sorted(geometry_types)}")
+    geometry_type = next(iter(geometry_types))
+
+    offsets = [0]
+    coords = []
+    for f in features:
+        vertices = (f.get("geometry") or {}).get("coordinates") or []
+        if geometry_type == "Point":
+            vertices = [vertices]
+        for vertex in vertices:
+            if not vertex or None in vertex[:2]:
+                continue  # e.g. an elevator not placed yet ([None, None]); stored without that vertex
+            lon, lat = vertex[:2]
+            coords.append(round(lon * scale))
+            coords.append(round(lat * scale))
+        offsets.append(len(coords) // 2)
+
+    ids = "\n".join(str(f["properties"].get(id_property, "")) for f in features).encode("utf-8")
+    return b"".join([
+        BINARY_HEADER.pack(BINARY_MAGIC, BINARY_VERSION, GEOMETRY_TYPES[geometry_type], precision, 0,
+                           len(features), offsets[-1]),
+        struct.pack(f"<{len(offsets)}i", *offsets),
+        struct.pack(f"<{len(coords)}i", *coords),
+        struct.pack("<I", len(ids)),
+        ids,
+    ])
+
+
+def decode_binary(content):
+    """Inverse of encode_binary; returns (geometry type, [(id, coordinates), ...])."""
+    magic, version, type_code, precision, _, feature_count, vertex_count = BINARY_HEADER.unpack_from(content)
+    if magic != BINARY_MAGIC or version != BINARY_VERSION:
+        raise ValueError("Not a Transit Access binary geometry file")
+    geometry_type = {code: name for name, code in GEOMETRY_TYPES.items()}[type_code]
+    scale = 10 ** precision
+
+    pos = BINARY_HEADER.size
+    offsets = struct.unpack_from(f"<{feature_count + 1}i", content, pos)
+    pos += 4 * (feature_count + 1)
+    coords = struct.unpack_from(f"<{vertex_count * 2}i", content, pos)
+    pos += 4 * vertex_count * 2
+    (ids_length,) = struct.unpack_from("<I", content, pos)
+    ids = content[pos + 4:pos + 4 + ids_length].decode("utf-8").split("\n") if feature_count else []
+
+    features = []
+    for i, feature_id in enumerate(ids):
+        vertices = [[coords[2 * v] / scale, coords[2 * v + 1] / scale] for v in range(offsets[i], offsets[i + 1])]
+        if geometry_type == "Point":
+            vertices = vertices[0] if vertices else None
+        features.append((feature_id, vertices))
+    return geometry_type, features
+
+
+def geojson_outputs(path, feature_collection, id_property):
+    """The {path: content} outputs for a generated GeoJSON: the file itself plus its binary copy when enabled."""
+    outputs = {path: dumps(feature_collection)}
+    if WRITE_BINARY:
+        outputs[binary_path(path)] = encode_binary(feature_collection, id_property)
+    return outputs
+
+
+def _loader_name(name):
+    return "load" + name[0].upper() + name[1:]
+
+
+def _object_module(name, coordinates):
+    return (f"{TS_HEADER}export const {name}: Record<string, [number, number]> = {dumps(coordinates)};\n\n"
+            f"// Everything is inline, so this resolves at once; the packed format imports its chunks here\n"
+            f"export const {_loader_name(name)} = (_chunks?: string[]) => Promise.resolve({name});\n"
+            f"export const {_loader_name(name)}InView = (_view?: [number, number, number, number]) => Promise.resolve(false);\n\n"
+            f"export default {name};")
+
+
+def _chunk_module(ids, coordinates):
+    flat = [value for key in ids for value in coordinates[key]]
+    return (f"{TS_HEADER}export const ids: string[] = {json.dumps(ids, separators=(',', ':'))};\n"
+            f"export const coords = new Float64Array({dumps(flat, 'minified')});\n")
+
+
+def _chunk_bounds(ids, coordinates):
+    """[west, south, east, north] around a chunk's coordinates, or None when none of them is placed."""
+    points = [coordinates[key] for key in ids if coordinates[key] and None not in coordinates[key]]
+    if not points:
+        return None
+    lons, lats = [p[0] for p in points], [p[1] for p in points]
+    return [min(lons), min(lats), max(lons), max(lats)]
+
+
+def _packed_modules(path, name, coordinates, groups):
+    stem = os.path.splitext(os.path.basename(path))[0]
+    chunks = {}
+    for key in coordinates:
+        chunks.setdefault(groups.get(key) or UNGROUPED_CHUNK, []).append(key)
+
+    outputs = {}
+    loaders = []
+    bounds = {}
+    for chunk in sorted(chunks):
+        module = f"{CHUNK_DIR}/{stem}.{chunk}"
+        outputs[os.path.join(os.path.dirname(path), CHUNK_DIR, f"{stem}.{chunk}.ts")] = _chunk_module(chunks[chunk], coordinates)
+        loaders.append(f'  {json.dumps(chunk)}: () => import("./{module}"),')
+        bounds[chunk] = _chunk_bounds(chunks[chunk], coordinates)
+    loader = _loader_name(name)
+    runtime = os.path.relpath(PACKED_RUNTIME, os.path.dirname(path)).replace(os.sep, "/")
+    runtime = runtime if runtime.startswith(".") else "./" + runtime
+    outputs[path] = (f'{TS_HEADER}import {{ lazyCoordinates }} from "{runtime}";\n\n'
+                     f"// One chunk per group, imported the first time {loader}() (or {loader}InView() for a\n"
+                     f"// map view overlapping the chunk's bounds) asks for it; {name} reads like the inline\n"
+                     f"// object but only holds the chunks loaded so far\n"
+                     f"const lookup = lazyCoordinates({{\n" + "\n".join(loaders) + "\n}, "
+                     f"{dumps(bounds, 'minified')});\n\n"
+                     f"export const {loader} = lookup.load;\n"
+                     f"export const {loader}InView = lookup.loadInView;\n"
+                     f"export const {name} = lookup.record;\n\n"
+                     f"export default {name};")
+    return outputs
+
+
+def coordinate_module_outputs(path, name, coordinates, groups=None):
+    """
+    The {path: content} outputs for a TS module exporting `name` (an ID -> [lon, lat] lookup), a
+    load<Name>() that resolves once it can be read, and load<Name>InView([west, south, east, north])
+    that loads only the chunks overlapping a map view and resolves to whether any were new. `groups`
+    maps IDs to the chunk (e.g. borough) they go in when the TS format is "packed".
+    """
+    if TS_FORMAT == "packed":
+        return _packed_modules(path, name, coordinates, groups or {})
+    return {path: _object_module(name, coordinates)}
+
+
+def remove_stale_chunks(path, outputs):
+    """
+    Delete the chunk modules of the TS module at `path` that `outputs` no longer writes: all of them after
+    switching back to the "object" format, or a group that disappeared. Returns the paths removed.
+    """
+    chunk_dir = os.path.join(os.path.dirname(path), CHUNK_DIR)
+    stem = os.path.splitext(os.path.basename(path))[0]
+    kept = {os.path.normpath(output) for output in outputs}
+    stale = [chunk for chunk in glob.glob(os.path.join(glob.escape(chunk_dir), f"{glob.escape(stem)}.*.ts"))
+             if os.path.normpath(chunk) not in kept]
+    for chunk in stale:
+        os.remove(chunk)
+    if stale and not os.listdir(chunk_dir):
+        os.rmdir(chunk_dir)
+    if stale:
+        print(f"🧹 Removed {len(stale)} stale coordinate chunk(s) of {os.path.basename(path)}")
+    return stale
+
+
+def _sizes(contents):
+    contents = [c.encode("utf-8") for c in contents]
+    return sum(len(c) for c in contents), sum(len(gzip.compress(c, mtime=0)) for c in contents)
+
+
+def print_module_savings(name, coordinates, outputs):
+    """Report how much smaller the packed TS modules are than the inline object, raw and gzipped."""
+    if TS_FORMAT != "packed":
+        return
+    object_bytes, object_gzip = _sizes([_object_module(name, coordinates)])
+    packed_bytes, packed_gzip = _sizes(outputs.values())
+    largest_chunk = max((len(c.encode("utf-8")) for path, c in outputs.items() if os.sep + CHUNK_DIR + os.sep in path), default=0)
+    print(f"📦 {name}: packed {packed_bytes:,} B (gzip {packed_gzip:,} B) vs object {object_bytes:,} B "
+          f"(gzip {object_gzip:,} B), {1 - packed_bytes / object_bytes:.0%} smaller; "
+          f"{len(outputs) - 1} chunks, largest {largest_chunk:,} B")
+
+
+def size_report(precision=5):
+    """Compare the byte size (raw and gzipped) of every generated GeoJSON in each output format."""
+    report = {}
+    for name, id_property in GENERATED_GEOJSON.items():
+        path = os.path.join(GENERATED_DIR, name)
+        if not os.path.exists(path):
+            continue
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        variants = {
+            "pretty": dumps(data, "pretty").encode("utf-8"),
+            "minified": dumps(data, "minified").encode("utf-8"),
+            f"minified+{precision}dp": dumps(data, "minified", precision).encode("utf-8"),
+            "binary": encode_binary(data, id_property),
+        }
+        report[name] = {
+            fmt: {"bytes": len(content), "gzip_bytes": len(gzip.compress(content, mtime=0))}
+            for fmt, content in variants.items()
+        }
+    return report
+
+
+def print_size_report(report):
+    print(f"\n** 📦 OUTPUT SIZE REPORT 📦 **")
+    for name, variants in report.items():
+        baseline = variants["pretty"]["bytes"]
+        print(f"{name}")
+        for fmt, sizes in variants.items():
+            print(f"  {fmt:<16} {sizes['bytes']:>9,} B  ({sizes['bytes'] / baseline:6.1%})  gzip {sizes['gzip_bytes']:>8,} B")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare generated GeoJSON sizes across output formats.")
+    parser.add_argument("--precision", type=int, default=5, help="decimal places for the quantized variant")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args()
+
+    report = size_report(args.precision)
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_size_report(report)
@@ -0,0 +1,386 @@
+import argparse
+import hashlib
+import json
+import math
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+from pipelineRunner import SOURCE_FILES, load_json
+from stageMetrics import peak_rss_bytes
+
+# Get directory where this script is located
+THIS_DIR = os.path.dirname(os.path.abspath(__file__))
+PYTHON_DIR = os.path.join(THIS_DIR, "..")
+
+# === CONFIG ===
+DEFAULT_SCALES = [1, 10]
+ID_STRIDE = 100_000  # numeric station/complex IDs of copy k are shifted by k * ID_STRIDE
+TILE_SPACING = (0.6, 0.5)  # degrees lon/lat between synthetic city copies, so they never overlap
+CHANGE_RATE = 0.01  # share of stations/complexes that are new or modified since the "previous" run
+NEW_ELEVATOR_RATE = 0.1  # share of elevators missing from the custom dataset, so updateElevators has to place them
+
+# What each pipeline stage exercises, so results can be compared across stage renames
+STAGE_CATEGORIES = {
+    "fetchFeeds": "fetch",
+    "fetchEquipment": "fetch",
+    "updateMTAStations": "diff",
+    "updateMTAComplexes": "diff",
+    "updateElevators": "placement",
+    "outageGeojsonParser": "geometry",
+    "writeStationCoords": "geometry",
+    "writeComplexCoords": "geometry",
+    "elevatorToComplexConnector": "lines",
+    "vectorTiles": "tiles",
+}
+
+
+# === SYNTHETIC DATASETS ===
+
+def _shift_id(value, k, sep="/"):
+    """Shift every numeric ID in an "a/b" string into copy k's range."""
+    if k == 0 or value in (None, ""):
+        return value
+    return sep.join(str(int(part) + k * ID_STRIDE) for part in str(value).split(sep))
+
+
+def _suffix_id(value, k, sep="/"):
+    """Make every string ID in an "a/b" string unique to copy k."""
+    if k == 0 or value in (None, ""):
+        return value
+    return sep.join(f"{part}-{k}" for part in str(value).split(sep))
+
+
+def _tile_offsets(scale):
+    cols = math.ceil(math.sqrt(scale))
+    return [((k % cols) * TILE_SPACING[0], -(k // cols) * TILE_SPACING[1]) for k in range(scale)]
+
+
+def _shift_coords(coords, offset):
+    return [round(coords[0] + offset[0], 6), round(coords[1] + offset[1], 6)]
+
+
+def load_templates():
+    """The current NYC datasets, used as the 1× city every synthetic copy is tiled from."""
+    return {key: load_json(path) for key, path in SOURCE_FILES.items()}
+
+
+def synthetic_datasets(scale, templates, change_rate=CHANGE_RATE, new_elevator_rate=NEW_ELEVATOR_RATE, seed=0):
+    """
+    Tile the NYC datasets `scale` times side by side with unique IDs. Returns the
+    three feed payloads plus the files the previous run would have left on disk,
+    which differ from the feeds by `change_rate` (stations/complexes) and
+    `new_elevator_rate` (elevators) so the diff and placement stages do real work.
+    """
+    rng = random.Random(seed)
+    stations, complexes_raw, equipment, elevators = [], [], [], []
+
+    for k, offset in enumerate(_tile_offsets(scale)):
+        for feature in templates["stations"]["features"]:
+            props = dict(feature["properties"])
+            props["station_id"] = _shift_id(props["station_id"], k)
+            props["complex_id"] = _shift_id(props["complex_id"], k)
+            props["gtfs_stop_id"] = _suffix_id(props["gtfs_stop_id"], k)
+            coords = _shift_coords(feature["geometry"]["coordinates"], offset)
+            props["gtfs_longitude"], props["gtfs_latitude"] = str(coords[0]), str(coords[1])
+            stations.append({"type": "Feature", "geometry": {"type": "Point", "coordinates": coords}, "properties": props})
+
+        for feature in templates["complexes"]["features"]:
+            props = feature["properties"]
+            lon, lat = _shift_coords(feature["geometry"]["coordinates"], offset)
+            complexes_raw.append({
+                "complex_id": _shift_id(props["complex_id"], k),
+                "station_ids": _shift_id(props["station_ids"], k).replace("/", "; "),
+                "gtfs_stop_ids": _suffix_id(props["gtfs_stop_ids"], k).replace("/", "; "),
+                "stop_name": props["stop_name"],
+                "ada": props["ada"],
+                "borough": props["borough"],
+                "number_of_stations_in_complex": props["num_stations_in_complex"],
+                "latitude": str(lat),
+                "longitude": str(lon),
+            })
+
+        for record in templates["equipment"]:
+            record = dict(record)
+            record["equipmentno"] = _suffix_id(record["equipmentno"], k)
+            record["elevatormrn"] = _shift_id(record.get("elevatormrn"), k)
+            record["stationcomplexid"] = _shift_id(record.get("stationcomplexid"), k)
+            equipment.append(record)
+
+        for feature in templates["elevators"]["features"]:
+            props = dict(feature["properties"])
+            props["elevatorno"] = _suffix_id(props["elevatorno"], k)
+            props["complexID"] = _shift_id(props.get("complexID"), k)
+            props["stationID"] = _shift_id(props.get("stationID"), k)
+            coords = feature["geometry"]["coordinates"]
+            if coords and None not in coords:
+                coords = _shift_coords(coords, offset)
+            elevators.append({**feature, "properties": props,
+                              "geometry": {**feature["geometry"], "coordinates": coords},
+                              "id": f"{feature.get('id')}-{k}"})
+
+    # The previous run: some records didn't exist yet and some have since been edited
+    def previous(features, name_key):
+        kept = []
+        for feature in features:
+            roll = rng.random()
+            if roll < change_rate:
+                continue
+            if roll < 2 * change_rate:
+                feature = {**feature, "properties": {**feature["properties"], name_key: feature["properties"][name_key] + " (old)"}}
+            kept.append(feature)
+        return kept
+
+    old_complexes = [
+        {"type": "Feature",
+         "geometry": {"type": "Point", "coordinates": [float(row["longitude"]), float(row["latitude"])]},
+         "properties": {"complex_id": row["complex_id"], "station_ids": row["station_ids"].replace("; ", "/"),
+                        "gtfs_stop_ids": row["gtfs_stop_ids"].replace("; ", "/"), "stop_name": row["stop_name"],
+                        "ada": row["ada"], "borough": row["borough"],
+                        "num_stations_in_complex": row["number_of_stations_in_complex"]}}
+        for row in complexes_raw
+    ]
+
+    def collection(features):
+        return {"_comment": "This file is auto-generated by updateData.py, do not edit manually",
+                "type": "FeatureCollection", "features": features}
+
+    return {
+        "feeds": {
+            "stations.geojson": {"type": "FeatureCollection", "features": stations},
+            "complexes.json": complexes_raw,
+            "equipment.json": equipment,
+        },
+        "disk": {
+            "stations": collection(previous(stations, "stop_name")),
+            "complexes": collection(previous(old_complexes, "stop_name")),
+            "elevators": {**templates["elevators"],
+                          "features": [f for f in elevators if rng.random() >= new_elevator_rate]},
+        },
+        "counts": {
+            "stations": len(stations),
+            "complexes": len(complexes_raw),
+            "equipment": len(equipment),
+            "elevators": len(elevators),
+        },
+    }
+
+
+# === FIXTURE SERVER ===
+
+class FixtureHandler(SimpleHTTPRequestHandler):
+    """Serves the fixture directory with strong ETags so the warm run gets 304s like the real feeds."""
+
+    def do_GET(self):
+        path = self.translate_path(self.path.split("?", 1)[0])
+        if not os.path.isfile(path):
+            self.send_error(404)
+            return
+        with open(path, "rb") as f:
+            body = f.read()
+        etag = f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", etag)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def serve_fixtures(directory):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), lambda *a: FixtureHandler(*a, directory=directory))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+# === WORKSPACE ===
+
+def make_workspace(root, datasets):
+    """
+    Lay out a throwaway copy of src/ under `root`: the pipeline scripts, the
+    "previous run" source files and empty output folders. Every script resolves
+    its paths relative to itself, so the copy never touches the real repo.
+    """
+    python_dir = os.path.join(root, "src", "resources", "python")
+    shutil.copytree(os.path.join(PYTHON_DIR, "individual_scripts"), os.path.join(python_dir, "individual_scripts"),
+                    ignore=shutil.ignore_patterns("__pycache__"))
+    shutil.copy(os.path.join(PYTHON_DIR, "updateData.py"), python_dir)
+    os.makedirs(os.path.join(root, "src", "resources", "generated"), exist_ok=True)
+    os.makedirs(os.path.join(root, "src", "utils"), exist_ok=True)
+
+    resources_dir = os.path.join(root, "src", "resources")
+    for key, data in datasets["disk"].items():
+        relative = os.path.relpath(SOURCE_FILES[key], os.path.join(PYTHON_DIR, ".."))
+        with open(os.path.join(resources_dir, relative), "w", encoding="utf-8") as f:
+            json.dump(data, f)
+
+    fixtures_dir = os.path.join(root, "fixtures")
+    os.makedirs(fixtures_dir)
+    for name, data in datasets["feeds"].items():
+        with open(os.path.join(fixtures_dir, name), "w", encoding="utf-8") as f:
+            json.dump(data, f)
+    return python_dir, fixtures_dir
+
+
+# === WORKER (runs inside the workspace copy) ===
+
+def run_worker(result_path, stream_equipment, trace_memory):
+    sys.path.insert(0, PYTHON_DIR)
+    import updateData
+    from pipelineRunner import run_pipeline
+
+    stages = updateData.build_stages(stream_equipment=stream_equipment)
+    traced_peaks = {}
+    if trace_memory:
+        tracemalloc.start()
+        for s in stages:
+            s["func"] = _traced(s["name"], s["func"], traced_peaks)
+
+    start = time.perf_counter()
+    _, timings = run_pipeline(stages)
+    total = time.perf_counter() - start
+
+    for t in timings:
+        t["category"] = "load" if t["stage"].startswith("load:") else STAGE_CATEGORIES.get(t["stage"], "other")
+        if t["stage"] in traced_peaks:
+            t["peak_traced_bytes"] = traced_peaks[t["stage"]]
+
+    with open(result_path, "w", encoding="utf-8") as f:
+        json.dump({"stages": timings, "total_seconds": total, "peak_rss_bytes": peak_rss_bytes()}, f)
+
+
+def _traced(name, func, peaks):
+    def wrapper(*args):
+        tracemalloc.reset_peak()
+        try:
+            return func(*args)
+        finally:
+            peaks[name] = tracemalloc.get_traced_memory()[1]
+    return wrapper
+
+
+# === DRIVER ===
+
+def run_scale(scale, templates, args):
+    datasets = synthetic_datasets(scale, templates, args.change_rate, args.new_elevator_rate, args.seed)
+    runs = []
+    with tempfile.TemporaryDirectory(prefix=f"pipeline-bench-{scale}x-") as root:
+        python_dir, fixtures_dir = make_workspace(root, datasets)
+        server = serve_fixtures(fixtures_dir)
+        base_url = f"http://127.0.0.1:{server.server_address[1]}"
+        env = {
+            **os.environ,
+            "MTA_STATIONS_URL": f"{base_url}/stations.geojson",
+            "MTA_COMPLEXES_URL": f"{base_url}/complexes.json",
+            "MTA_EQUIPMENT_URL": f"{base_url}/equipment.json",
+            "MTA_API_KEY": "benchmark",  # the fixture server doesn't check it
+        }
+        for k in ("FEED_CACHE_DIR", "BUILD_MANIFEST_FILE"):
+            env.pop(k, None)  # keep the workspace's own cache and manifest
+
+        try:
+            # Cold: the workspace starts with no feed cache or build manifest, so everything downloads and rebuilds.
+            # Warm: the same feeds again, answered with 304s, so every stage should skip
+            for mode in ["cold", "warm"][:1 if args.cold_only else 2]:
+                result_path = os.path.join(root, f"{mode}.json")
+                command = [sys.executable, os.path.join(python_dir, "individual_scripts", "pipelineBenchmark.py"),
+                           "--worker", result_path]
+                if args.stream_equipment:
+                    command.append("--stream-equipment")
+                if args.trace_memory:
+                    command.append("--trace-memory")
+                with open(os.path.join(root, f"{mode}.log"), "w") as log:
+                    completed = subprocess.run(command, env=env, stdout=log, stderr=subprocess.STDOUT)
+                if completed.returncode != 0:
+                    with open(os.path.join(root, f"{mode}.log")) as log:
+                        tail = log.read()[-2000:]
+                    raise RuntimeError(f"{scale}× {mode} run failed:\n{tail}")
+                with open(result_path) as f:
+                    runs.append({"mode": mode, **json.load(f)})
+        finally:
+            server.shutdown()
+
+    return {"scale": scale, "counts": datasets["counts"], "runs": runs}
+
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], cwd=THIS_DIR, capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def print_summary(results):
+    print(f"\n** 🏁 PIPELINE BENCHMARK 🏁 **")
+    for result in results:
+        counts = ", ".join(f"{n:,} {key}" for key, n in result["counts"].items())
+        print(f"{result['scale']}× NYC ({counts})")
+        for run in result["runs"]:
+            by_category = {}
+            for t in run["stages"]:
+                by_category[t["category"]] = by_category.get(t["category"], 0.0) + t["seconds"]
+            breakdown = "  ".join(f"{cat} {seconds:.2f}s" for cat, seconds in by_category.items())
+            print(f"  {run['mode']:<5} {run['total_seconds']:8.2f}s  peak RSS {run['peak_rss_bytes'] / 2**20:7.1f} MiB  |  {breakdown}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark updateData.py on synthetic city-scale datasets.")
+    parser.add_argument("--scales", type=int, nargs="+", default=DEFAULT_SCALES,
+                        help="dataset sizes as multiples of NYC (default: 1 10)")
+    parser.add_argument("--output", metavar="PATH", help="write the results as JSON to this file")
+    parser.add_argument("--change-rate", type=float, default=CHANGE_RATE,
+                        help="share of stations/complexes that changed since the previous run")
+    parser.add_argument("--new-elevator-rate", type=float, default=NEW_ELEVATOR_RATE,
+                        help="share of elevators updateElevators has to add and place")
+    parser.add_argument("--seed", type=int, default=0, help="random seed for the synthetic changes")
+    parser.add_argument("--cold-only", action="store_true", help="skip the warm (all feeds unchanged) run")
+    parser.add_argument("--stream-equipment", action="store_true", help="benchmark the streaming equipment parser")
+    parser.add_argument("--trace-memory", action="store_true",
+                        help="also record each stage's peak Python allocations (slower)")
+    parser.add_argument("--worker", metavar="RESULT", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(args.worker, args.stream_equipment, args.trace_memory)
+        sys.exit(0)
+
+    templates = load_templates()
+    results = []
+    for scale in args.scales:
+        print(f"Running {scale}× NYC...")
+        results.append(run_scale(scale, templates, args))
+
+    report = {
+        "generated_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "git_commit": _git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "settings": {"change_rate": args.change_rate, "new_elevator_rate": args.new_elevator_rate,
+                     "seed": args.seed, "stream_equipment": args.stream_equipment},
+        "results": results,
+    }
+    print_summary(results)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"Results saved to {args.output}")
+    else:
+        print(json.dumps(report, indent=2))
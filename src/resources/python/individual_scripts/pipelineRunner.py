@@ -0,0 +1,177 @@
+import contextlib
+import json
+import os
+import time
+
+# Get directory where this script is located
+THIS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Source datasets a stage can ask for without another stage producing them first
+SOURCE_FILES = {
+    "stations": os.path.join(THIS_DIR, "..", "..", "mta_subway_stations_all.json"),
+    "complexes": os.path.join(THIS_DIR, "..", "..", "mta_subway_complexes.json"),
+    "elevators": os.path.join(THIS_DIR, "..", "..", "custom_elevator_dataset.json"),
+    "equipment": os.path.join(THIS_DIR, "..", "..", "generated", "mta_equipments.json"),
+    # Generated layers, for stages that read them after the stage producing them was skipped
+    "outages": os.path.join(THIS_DIR, "..", "..", "generated", "elevatorOutagesDataset.geojson"),
+    "stationGeometry": os.path.join(THIS_DIR, "..", "..", "generated", "accessibleStationGeometry.geojson"),
+    "complexGeometry": os.path.join(THIS_DIR, "..", "..", "generated", "ComplexGeometry.geojson"),
+    "streetLines": os.path.join(THIS_DIR, "..", "..", "generated", "street_to_complex_lines.geojson"),
+}
+# Source datasets a stage may be handed as None when their file doesn't exist yet, because the stage
+# starts them from its own default (agencyAdapters.use_agency adds a new agency's curated datasets)
+OPTIONAL_SOURCES = set()
+
+
+def load_json(path):
+    """Load a JSON file, skipping the '// auto-generated' banner some generated files start with."""
+    with open(path, "r", encoding="utf-8") as f:
+        text = f.read()
+    if text.startswith("//"):
+        text = text.split("\n", 1)[1]
+    return json.loads(text)
+
+
+class Unchanged:
+    """Returned by a stage in place of an output to say it is identical to the last run."""
+
+    def __init__(self, value=None):
+        self.value = value
+
+
+def unchanged(value=None):
+    return Unchanged(value)
+
+
+def stage(name, func, inputs=(), outputs=(), files=()):
+    """
+    Describe one step of the pipeline. `func` is called with the parsed `inputs`
+    datasets as positional arguments and returns the `outputs` datasets
+    (a single value for one output, a tuple for several). Any output may be
+    wrapped in `unchanged(...)` to let downstream stages skip. `files` are the
+    paths the stage writes; it is never skipped while one of them is missing.
+    """
+    return {"name": name, "func": func, "inputs": tuple(inputs), "outputs": tuple(outputs), "files": tuple(files)}
+
+
+def order_stages(stages):
+    """Order stages so every stage runs after the stages producing its inputs, keeping declared order otherwise."""
+    producers = {}
+    for s in stages:
+        for key in s["outputs"]:
+            producers.setdefault(key, []).append(s["name"])
+
+    names = [s["name"] for s in stages]
+    if len(set(names)) != len(names):
+        raise ValueError("Pipeline stage names must be unique")
+
+    # A stage that reads and rewrites the same dataset (e.g. updateElevators) depends on earlier producers only
+    depends_on = {}
+    for i, s in enumerate(stages):
+        earlier = set(names[:i])
+        deps = set()
+        for key in s["inputs"]:
+            for producer in producers.get(key, []):
+                if producer != s["name"] and (producer in earlier or key not in s["outputs"]):
+                    deps.add(producer)
+        depends_on[s["name"]] = deps
+
+    ordered = []
+    done = set()
+    pending = list(stages)
+    while pending:
+        ready = next((s for s in pending if depends_on[s["name"]] <= done), None)
+        if ready is None:
+            raise ValueError(f"Pipeline has a dependency cycle between: {[s['name'] for s in pending]}")
+        ordered.append(ready)
+        done.add(ready["name"])
+        pending.remove(ready)
+    return ordered
+
+
+def print_timings(timings):
+    total = sum(t["seconds"] for t in timings)
+    print(f"\n** ⏱️ PIPELINE TIMINGS ⏱️ **")
+    for t in timings:
+        if t.get("skipped"):
+            print(f"  {t['stage']:<32}  skipped")
+        else:
+            print(f"  {t['stage']:<32} {t['seconds']:8.3f}s")
+    print(f"  {'total':<32} {total:8.3f}s")
+
+
+def should_skip(s, status):
+    """
+    Skip a stage when none of its inputs changed this run and at least one was
+    reported unchanged by an upstream stage. Inputs that only come from disk
+    count as unchanged, but a stage fed purely from disk always runs, and so
+    does a stage whose output files are not all on disk.
+    """
+    if not all(os.path.exists(path) for path in s.get("files", ())):
+        return False
+    statuses = [status.get(key, "source") for key in s["inputs"]]
+    return "unchanged" in statuses and "changed" not in statuses
+
+
+@contextlib.contextmanager
+def _unmeasured(name, inputs=()):
+    yield {}
+
+
+def run_pipeline(stages, datasets=None, force=False, metrics=None):
+    """
+    Run `stages` in dependency order inside this process. Each source dataset is
+    parsed at most once and handed between stages in memory. Stages whose inputs
+    are all unchanged are skipped unless `force` is set. Returns the final
+    datasets dict and a list of per-stage timings. A stageMetrics.StageMetrics
+    passed as `metrics` also records each stage's (and each source load's)
+    CPU time, I/O bytes, record counts and peak RSS.
+    """
+    measure = metrics.measure if metrics is not None else _unmeasured
+
+    datasets = dict(datasets or {})
+    status = {key: "changed" for key in datasets}
+    timings = []
+
+    for s in order_stages(stages):
+        if not force and should_skip(s, status):
+            print(f"\n⏭️  Skipping {s['name']}: inputs unchanged since last run")
+            status.update({key: "unchanged" for key in s["outputs"]})
+            timings.append({"stage": s["name"], "seconds": 0.0, "skipped": True})
+            if metrics is not None:
+                metrics.skipped(s["name"])
+            continue
+
+        args = []
+        for key in s["inputs"]:
+            if key not in datasets and not os.path.exists(SOURCE_FILES[key]):
+                if key not in OPTIONAL_SOURCES:
+                    raise FileNotFoundError(f"{s['name']} needs {key}, which no stage produced and {SOURCE_FILES[key]} does not exist")
+                datasets[key] = None
+            elif key not in datasets:
+                start = time.perf_counter()
+                with measure(f"load:{key}") as record:
+                    datasets[key] = load_json(SOURCE_FILES[key])
+                    record["outputs"] = (datasets[key],)
+                timings.append({"stage": f"load:{key}", "seconds": time.perf_counter() - start})
+            args.append(datasets[key])
+
+        start = time.perf_counter()
+        with measure(s["name"], args) as record:
+            result = s["func"](*args)
+            if len(s["outputs"]) == 1:
+                result = (result,)
+            record["outputs"] = tuple(result or ())[:len(s["outputs"])]
+        timings.append({"stage": s["name"], "seconds": time.perf_counter() - start})
+
+        for key, value in zip(s["outputs"], result or ()):
+            if isinstance(value, Unchanged):
+                status[key] = "unchanged"
+                if value.value is not None:
+                    datasets[key] = value.value
+            else:
+                status[key] = "changed"
+                datasets[key] = value
+
+    print_timings(timings)
+    return datasets, timings
@@ -0,0 +1,241 @@
+import argparse
+import calendar
+import json
+import os
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from complexAccessibility import CUSTOM_ELEVATOR_FILE, DEGRADED, INACCESSIBLE, ComplexAccessibilityView, complex_status
+from feedClient import fetch_json
+
+# Get directory where this script is located
+THIS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# === CONFIG ===
+OUTAGES_URL = os.environ.get("MTA_OUTAGES_URL", "https://api-endpoint.mta.info/Dataservice/mtagtfsfeeds/nyct%2Fnyct_ene.json")
+OUTPUT_FILE = os.path.join(THIS_DIR, "..", "..", "generated", "plannedOutageAdvisories.json")
+FEED_DATE_FORMAT = "%m/%d/%Y %I:%M:%S %p"  # e.g. 07/14/2025 09:30:00 AM
+OUTPUT_DATE_FORMAT = "%Y-%m-%d %H:%M"
+NO_END = np.iinfo(np.int64).max  # outages without an estimated return to service
+
+
+def to_seconds(dt):
+    """Feed times are New York wall-clock times; they are kept (and queried) as such, in seconds since 1970-01-01 00:00."""
+    return calendar.timegm(dt.timetuple())
+
+
+def from_seconds(seconds):
+    if seconds == NO_END:
+        return None
+    return (datetime(1970, 1, 1) + timedelta(seconds=int(seconds))).strftime(OUTPUT_DATE_FORMAT)
+
+
+def parse_feed_date(text):
+    try:
+        return to_seconds(datetime.strptime(text.strip(), FEED_DATE_FORMAT))
+    except (AttributeError, ValueError):
+        return None
+
+
+class PlannedOutageIndex:
+    """
+    Outage windows from the outage feed (upcoming ones, and by default the
+    current ones until their estimated return to service), sorted by start
+    with a running maximum of the ends. A window query is two binary searches:
+    everything starting before the window ends, from the first position whose
+    running maximum end is after the window starts. Positions are also grouped
+    by elevator and by complex, so keyed queries only look at their own windows.
+    """
+
+    def __init__(self, elevator_data):
+        # Complex membership and street/platform roles come from the same view the live accessibility uses
+        self.view = ComplexAccessibilityView(elevator_data)
+        self.load([])
+
+    def load(self, feed, include_current=True):
+        """Index the outage windows of a fresh feed, replacing the previous ones."""
+        windows = []
+        for record in feed:
+            if record.get("equipmenttype") != "EL":
+                continue
+            planned = record.get("isupcomingoutage") == "Y"
+            if not planned and not include_current:
+                continue
+            start = parse_feed_date(record.get("outagedate"))
+            if start is None:
+                continue
+            end = parse_feed_date(record.get("estimatedreturntoservice"))
+            windows.append((start, NO_END if end is None or end <= start else end, record["equipment"], planned,
+                            record.get("reason", "")))
+        windows.sort(key=lambda window: window[0])
+
+        self.starts = np.array([w[0] for w in windows], dtype=np.int64)
+        self.ends = np.array([w[1] for w in windows], dtype=np.int64)
+        self.max_ends = np.maximum.accumulate(self.ends) if windows else self.ends
+        self.elevators = [w[2] for w in windows]
+        self.planned = np.array([w[3] for w in windows], dtype=bool)
+        self.reasons = [w[4] for w in windows]
+
+        self.by_elevator = {}
+        self.by_complex = {}
+        for position, elevatorno in enumerate(self.elevators):
+            self.by_elevator.setdefault(elevatorno, []).append(position)
+            if elevatorno in self.view.elevator_complex:
+                self.by_complex.setdefault(self.view.elevator_complex[elevatorno][0], []).append(position)
+        self.by_elevator = {key: np.array(positions) for key, positions in self.by_elevator.items()}
+        self.by_complex = {key: np.array(positions) for key, positions in self.by_complex.items()}
+        return self
+
+    def __len__(self):
+        return len(self.starts)
+
+    def _overlapping(self, start, end, positions=None):
+        """Positions of the windows overlapping [start, end)."""
+        if positions is None:
+            lo = np.searchsorted(self.max_ends, start, side="right")
+            hi = np.searchsorted(self.starts, end, side="left")
+            positions = np.arange(lo, max(lo, hi))
+        return positions[(self.starts[positions] < end) & (self.ends[positions] > start)]
+
+    def _keyed(self, groups, keys):
+        if keys is None:
+            return None
+        positions = [groups[key] for key in keys if key in groups]
+        return np.concatenate(positions) if positions else np.array([], dtype=np.int64)
+
+    def window(self, position):
+        return {
+            "elevatorno": self.elevators[position],
+            "from": from_seconds(self.starts[position]),
+            "to": from_seconds(self.ends[position]),
+            "planned": bool(self.planned[position]),
+            "reason": self.reasons[position],
+        }
+
+    def elevators_out(self, start, end=None, elevators=None):
+        """{elevatorno: [windows]} for elevators out at any time in [start, end) (at `start` only without an end)."""
+        end = start + 1 if end is None else end
+        out = {}
+        for position in self._overlapping(start, end, self._keyed(self.by_elevator, elevators)):
+            out.setdefault(self.elevators[position], []).append(self.window(position))
+        return out
+
+    def _status(self, complex_id, out):
+        entry = self.view.complexes[complex_id]
+        mark = lambda elevators: [{**e, "isBroken": e["elevatorno"] in out} for e in elevators]
+        return complex_status({"street": mark(entry["street"]), "platform": mark(entry["platform"])})
+
+    def complex_timelines(self, start, end, complexes=None, statuses=(INACCESSIBLE,)):
+        """
+        {complex_id: [{from, to, status, elevators}]}: the stretches of [start, end)
+        during which a complex's status is one of `statuses`, given the windows
+        overlapping it. Complexes no window touches are never looked at.
+        """
+        positions = self._overlapping(start, end, self._keyed(self.by_complex, complexes))
+        grouped = {}
+        for position in positions:
+            grouped.setdefault(self.view.elevator_complex[self.elevators[position]][0], []).append(position)
+
+        timelines = {}
+        for complex_id, positions in grouped.items():
+            positions = np.array(positions)
+            bounds = np.unique(np.clip(np.concatenate([self.starts[positions], self.ends[positions], [start, end]]), start, end))
+            stretches = []
+            for at, until in zip(bounds[:-1], bounds[1:]):
+                covering = positions[(self.starts[positions] <= at) & (self.ends[positions] > at)]
+                out = {self.elevators[position] for position in covering}
+                status = self._status(complex_id, out)
+                if status not in statuses:
+                    continue
+                if stretches and stretches[-1]["_until"] == at and stretches[-1]["status"] == status:
+                    stretches[-1]["_until"] = until
+                    stretches[-1]["elevators"] |= out
+                else:
+                    stretches.append({"_at": at, "_until": until, "status": status, "elevators": out})
+            if stretches:
+                timelines[complex_id] = [
+                    {"from": from_seconds(s["_at"]), "to": from_seconds(s["_until"]), "status": s["status"],
+                     "elevators": sorted(s["elevators"])}
+                    for s in stretches
+                ]
+        return timelines
+
+    def losing_access(self, start, end, complexes=None):
+        """Complexes without a step-free way through at some point in [start, end), and when."""
+        return self.complex_timelines(start, end, complexes)
+
+    def status_at(self, at, complexes=None):
+        """{complex_id: status} at one moment, for the complexes that aren't fully accessible then."""
+        timelines = self.complex_timelines(at, at + 1, complexes, statuses=(DEGRADED, INACCESSIBLE))
+        return {complex_id: stretches[0]["status"] for complex_id, stretches in timelines.items()}
+
+    def advisories(self, start, end, complexes=None, include_degraded=False):
+        statuses = (DEGRADED, INACCESSIBLE) if include_degraded else (INACCESSIBLE,)
+        return {
+            "_comment": "This file is auto-generated by plannedOutages.py, do not edit manually",
+            "from": from_seconds(start),
+            "to": from_seconds(end),
+            "complexes": self.complex_timelines(start, end, complexes, statuses),
+        }
+
+
+def load_index(feed, include_current=True):
+    with open(CUSTOM_ELEVATOR_FILE, "r", encoding="utf-8") as f:
+        return PlannedOutageIndex(json.load(f)).load(feed, include_current)
+
+
+def parse_time(text, day):
+    """'22:00' on `day`, or a full 'YYYY-MM-DD HH:MM'."""
+    try:
+        return datetime.strptime(text, OUTPUT_DATE_FORMAT)
+    except ValueError:
+        return datetime.combine(day, datetime.strptime(text, "%H:%M").time())
+
+
+def parse_window(start_text, end_text, day):
+    """Seconds for [start, end); an end clock time before the start means the next day, as in 22:00-05:00."""
+    start = parse_time(start_text, day)
+    end = parse_time(end_text, day)
+    if end <= start:
+        end += timedelta(days=1)
+    return to_seconds(start), to_seconds(end)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Index upcoming elevator outage windows and find complexes losing step-free access in a time window.")
+    parser.add_argument("--outages", default=OUTAGES_URL, help="outage feed URL or a saved nyct_ene.json file")
+    parser.add_argument("--from", dest="start", default="22:00", help="window start, HH:MM or 'YYYY-MM-DD HH:MM' (default: %(default)s)")
+    parser.add_argument("--to", dest="end", default="05:00", help="window end; a clock time before --from means the next day (default: %(default)s)")
+    parser.add_argument("--date", type=lambda text: datetime.strptime(text, "%Y-%m-%d").date(),
+                        default=datetime.now().date(), help="day of a HH:MM --from (default: today)")
+    parser.add_argument("--complex", action="append", help="complex_id to check (repeatable; default: all)")
+    parser.add_argument("--planned-only", action="store_true", help="ignore current outages, only index upcoming ones")
+    parser.add_argument("--degraded", action="store_true", help="also report stretches where a complex is only degraded")
+    parser.add_argument("--output", nargs="?", const=OUTPUT_FILE, help="write the advisories as JSON (default file: %(const)s)")
+    args = parser.parse_args()
+
+    if os.path.exists(args.outages):
+        with open(args.outages, "r", encoding="utf-8") as f:
+            feed = json.load(f)
+    else:
+        api_key = os.environ.get("MTA_API_KEY")
+        feed = fetch_json(args.outages, headers={"x-api-key": api_key} if api_key else None)
+
+    index = load_index(feed, include_current=not args.planned_only)
+    start, end = parse_window(args.start, args.end, args.date)
+    advisories = index.advisories(start, end, args.complex, args.degraded)
+    timelines = advisories["complexes"]
+
+    print(f"\n** 🗓️ PLANNED OUTAGES 🗓️ **\n{len(index)} outage windows ({int(index.planned.sum())} upcoming), "
+          f"{from_seconds(start)} → {from_seconds(end)}")
+    for complex_id, stretches in sorted(timelines.items(), key=lambda item: item[1][0]["from"]):
+        for s in stretches:
+            print(f"  complex {complex_id:<5} {s['status']:<12} {s['from']} → {s['to']}  ({', '.join(s['elevators'])})")
+    print(f"{len(timelines)} complexes affected")
+
+    if args.output:
+        os.makedirs(os.path.dirname(args.output), exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(advisories, f, indent=2)
+        print(f"✅ Saved to {args.output}")
@@ -0,0 +1,200 @@
+import argparse
+import heapq
+import json
+import math
+import os
+
+# Get directory where this script is located
+THIS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# File paths
+STATIONS_FILE = os.path.join(THIS_DIR, "..", "..", "mta_subway_stations_all.json")
+COMPLEXES_FILE = os.path.join(THIS_DIR, "..", "..", "mta_subway_complexes.json")
+CUSTOM_ELEVATOR_FILE = os.path.join(THIS_DIR, "..", "..", "custom_elevator_dataset.json")
+
+# === CONFIG ===
+CELL_SIZE_M = 500  # grid cell edge; roughly the spacing between neighbouring subway stations
+METERS_PER_DEGREE_LAT = 111_320
+MAX_ELEVATOR_DISTANCE_M = 400  # an elevator further than this from its own complex is flagged
+
+
+class GridIndex:
+    """
+    Uniform-grid spatial index over points. Coordinates are projected to local
+    meters around the data's mean latitude (equirectangular), which is accurate
+    to well under 1% at city scale, so distances come back in meters.
+    """
+
+    def __init__(self, points, cell_size_m=CELL_SIZE_M):
+        """`points` is an iterable of (id, lon, lat); points without coordinates are ignored."""
+        self.cell_size = cell_size_m
+        self.ids = []
+        self.xy = []
+        self.cells = {}
+
+        points = [(pid, lon, lat) for pid, lon, lat in points if lon is not None and lat is not None]
+        mean_lat = sum(lat for _, _, lat in points) / len(points) if points else 0.0
+        self.meters_per_degree_lon = METERS_PER_DEGREE_LAT * math.cos(math.radians(mean_lat))
+
+        for pid, lon, lat in points:
+            x, y = self.project(lon, lat)
+            self.cells.setdefault(self._cell(x, y), []).append(len(self.ids))
+            self.ids.append(pid)
+            self.xy.append((x, y))
+
+        if self.cells:
+            cxs = [cx for cx, _ in self.cells]
+            cys = [cy for _, cy in self.cells]
+            self.bounds = (min(cxs), min(cys), max(cxs), max(cys))
+
+    def __len__(self):
+        return len(self.ids)
+
+    def project(self, lon, lat):
+        return lon * self.meters_per_degree_lon, lat * METERS_PER_DEGREE_LAT
+
+    def _cell(self, x, y):
+        return int(math.floor(x / self.cell_size)), int(math.floor(y / self.cell_size))
+
+    def _ring(self, cx, cy, r):
+        """Point indices in the cells at Chebyshev distance exactly `r` from (cx, cy)."""
+        if r == 0:
+            yield from self.cells.get((cx, cy), ())
+            return
+        for dx in range(-r, r + 1):
+            yield from self.cells.get((cx + dx, cy - r), ())
+            yield from self.cells.get((cx + dx, cy + r), ())
+        for dy in range(-r + 1, r):
+            yield from self.cells.get((cx - r, cy + dy), ())
+            yield from self.cells.get((cx + r, cy + dy), ())
+
+    def _max_ring(self, cx, cy):
+        min_cx, min_cy, max_cx, max_cy = self.bounds
+        return max(abs(cx - min_cx), abs(cx - max_cx), abs(cy - min_cy), abs(cy - max_cy))
+
+    def nearest(self, lon, lat, k=1, max_distance_m=None):
+        """The `k` nearest points as [(distance_m, id), ...], closest first."""
+        if not self.ids:
+            return []
+        x, y = self.project(lon, lat)
+        cx, cy = self._cell(x, y)
+        best = []  # max-heap of (-distance, index) holding the k closest seen so far
+
+        for r in range(self._max_ring(cx, cy) + 1):
+            # The query sits somewhere inside its own cell, so ring r and beyond are at least r - 1 cells away
+            if len(best) == k and -best[0][0] <= (r - 1) * self.cell_size:
+                break
+            if max_distance_m is not None and (r - 1) * self.cell_size > max_distance_m:
+                break
+            for i in self._ring(cx, cy, r):
+                px, py = self.xy[i]
+                d = math.hypot(px - x, py - y)
+                if max_distance_m is not None and d > max_distance_m:
+                    continue
+                if len(best) < k:
+                    heapq.heappush(best, (-d, i))
+                elif d < -best[0][0]:
+                    heapq.heapreplace(best, (-d, i))
+
+        return [(-neg_d, self.ids[i]) for neg_d, i in sorted(best, reverse=True)]
+
+    def within(self, lon, lat, radius_m):
+        """Every point within `radius_m` as [(distance_m, id), ...], closest first."""
+        if not self.ids:
+            return []
+        x, y = self.project(lon, lat)
+        cx, cy = self._cell(x, y)
+        reach = int(radius_m // self.cell_size) + 1
+        hits = []
+        for r in range(min(reach, self._max_ring(cx, cy)) + 1):
+            for i in self._ring(cx, cy, r):
+                px, py = self.xy[i]
+                d = math.hypot(px - x, py - y)
+                if d <= radius_m:
+                    hits.append((d, self.ids[i]))
+        return sorted(hits)
+
+    def nearest_batch(self, points, k=1, max_distance_m=None):
+        """`nearest` for many (lon, lat) points at once; one result list per point."""
+        return [self.nearest(lon, lat, k, max_distance_m) for lon, lat in points]
+
+    def within_batch(self, points, radius_m):
+        return [self.within(lon, lat, radius_m) for lon, lat in points]
+
+
+def _point_features(data, id_property):
+    for feature in data.get("features", []):
+        coords = (feature.get("geometry") or {}).get("coordinates") or [None, None]
+        yield str(feature["properties"].get(id_property)), coords[0], coords[1]
+
+
+def station_index(stations_data, cell_size_m=CELL_SIZE_M):
+    """Index of mta_subway_stations_all.json keyed by station_id."""
+    return GridIndex(_point_features(stations_data, "station_id"), cell_size_m)
+
+
+def complex_index(complexes_data, cell_size_m=CELL_SIZE_M):
+    """Index of mta_subway_complexes.json keyed by complex_id."""
+    return GridIndex(_point_features(complexes_data, "complex_id"), cell_size_m)
+
+
+def nearest_complex_id(index, coords, max_distance_m=MAX_ELEVATOR_DISTANCE_M):
+    """Complex ID nearest to [lon, lat], or "" if there is none within `max_distance_m`."""
+    if not coords or None in coords:
+        return ""
+    hits = index.nearest(coords[0], coords[1], 1, max_distance_m)
+    return hits[0][1] if hits else ""
+
+
+def validate_elevator_coordinates(elevator_data, complexes, max_distance_m=MAX_ELEVATOR_DISTANCE_M):
+    """
+    Check every elevator against the complex index in one batch. Returns the
+    elevators that are missing coordinates, are more than `max_distance_m` from
+    their own complex, or have a different complex as their nearest.
+    """
+    with_coords = []
+    problems = []
+    for f in elevator_data["features"]:
+        if None in (f["geometry"].get("coordinates") or [None]):
+            problems.append({"elevatorno": f["properties"].get("elevatorno"), "issue": "missing coordinates"})
+        else:
+            with_coords.append(f)
+    nearest = complexes.nearest_batch([f["geometry"]["coordinates"] for f in with_coords], k=1)
+    complex_xy = dict(zip(complexes.ids, complexes.xy))
+
+    for feature, hits in zip(with_coords, nearest):
+        props = feature["properties"]
+        own_id = str(props.get("complexID", ""))
+        lon, lat = feature["geometry"]["coordinates"]
+        x, y = complexes.project(lon, lat)
+        if own_id in complex_xy:
+            own_distance = math.hypot(complex_xy[own_id][0] - x, complex_xy[own_id][1] - y)
+            if own_distance > max_distance_m:
+                problems.append({"elevatorno": props.get("elevatorno"), "complexID": own_id,
+                                 "issue": f"{own_distance:.0f} m from its complex"})
+            elif hits and hits[0][1] != own_id:
+                problems.append({"elevatorno": props.get("elevatorno"), "complexID": own_id,
+                                 "issue": f"nearest complex is {hits[0][1]} ({hits[0][0]:.0f} m)"})
+        else:
+            problems.append({"elevatorno": props.get("elevatorno"), "complexID": own_id,
+                             "issue": "unknown complexID",
+                             "nearest": hits[0][1] if hits else None})
+    return problems
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Validate elevator coordinates against the nearest station complexes.")
+    parser.add_argument("--max-distance", type=float, default=MAX_ELEVATOR_DISTANCE_M,
+                        help="flag elevators further than this many meters from their complex")
+    args = parser.parse_args()
+
+    with open(COMPLEXES_FILE, "r", encoding="utf-8") as f:
+        complexes = complex_index(json.load(f))
+    with open(CUSTOM_ELEVATOR_FILE, "r", encoding="utf-8") as f:
+        elevators = json.load(f)
+
+    problems = validate_elevator_coordinates(elevators, complexes, args.max_distance)
+    print(f"\n** 🧭 ELEVATOR COORDINATE CHECK 🧭 **")
+    for problem in problems:
+        print(f"  {problem}")
+    print(f"{len(problems)} of {len(elevators['features'])} elevators flagged")
@@ -0,0 +1,202 @@
+import contextlib
+import cProfile
+import json
+import os
+import pstats
+import re
+import resource
+import sys
+import time
+from datetime import datetime, timezone
+
+from incrementalBuild import write_atomic
+
+# Get directory where this script is located
+THIS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# === CONFIG ===
+METRICS_DIR = os.path.join(THIS_DIR, "..", ".cache", "metrics")
+PROFILE_DIR = os.path.join(THIS_DIR, "..", ".cache", "profiles")
+METRIC_PREFIX = "transit_pipeline"
+PROFILE_TOP = 10  # functions listed per stage in the run record when profiling
+
+
+# === PROCESS COUNTERS ===
+def peak_rss_bytes():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024  # Linux reports KiB, macOS bytes
+
+
+def _io_counters():
+    """(bytes read, bytes written) through read/write syscalls so far, files and sockets alike. None where /proc is missing."""
+    try:
+        with open("/proc/self/io", "r") as f:
+            counters = dict(line.split(": ") for line in f.read().splitlines())
+        return int(counters["rchar"]), int(counters["wchar"])
+    except (OSError, KeyError, ValueError):
+        return None
+
+
+def _reset_peak_rss():
+    """Reset the kernel's RSS high-water mark (Linux), so the next reading is this stage's own peak. Returns True if it worked."""
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def _current_peak_rss():
+    try:
+        with open("/proc/self/status", "r") as f:
+            return int(re.search(r"VmHWM:\s+(\d+) kB", f.read()).group(1)) * 1024
+    except (OSError, AttributeError):
+        return peak_rss_bytes()
+
+
+def count_records(value):
+    """Features in a FeatureCollection, items in a list, keys in a dict; None for anything else."""
+    value = getattr(value, "value", value)  # unwrap pipelineRunner.Unchanged
+    if isinstance(value, dict) and isinstance(value.get("features"), list):
+        return len(value["features"])
+    if isinstance(value, (list, tuple, dict)):
+        return len(value)
+    return None
+
+
+def _total_records(values):
+    counts = [count_records(v) for v in values]
+    counts = [c for c in counts if c is not None]
+    return sum(counts) if counts else None
+
+
+class StageMetrics:
+    """
+    Resource usage of every pipeline stage: wall and CPU time, bytes read and
+    written, records in and out and peak RSS, plus an optional cProfile dump
+    per stage. run_pipeline() records into it; the result is written as a JSON
+    run record and/or a Prometheus textfile.
+    """
+
+    def __init__(self, profile_dir=None):
+        self.profile_dir = profile_dir
+        self.stages = []
+        self.started_at = datetime.now(timezone.utc)
+        self._start = time.perf_counter()
+        self._start_cpu = time.process_time()
+        self._start_io = _io_counters()
+
+    @contextlib.contextmanager
+    def measure(self, name, inputs=()):
+        """Measure the block as stage `name`. Set "outputs" on the yielded record to count the records it produced."""
+        record = {"stage": name, "skipped": False, "records_in": _total_records(inputs)}
+        per_stage_peak = _reset_peak_rss()
+        io_before = _io_counters()
+        profiler = cProfile.Profile() if self.profile_dir else None
+        cpu_before = time.process_time()
+        wall_before = time.perf_counter()
+        if profiler:
+            profiler.enable()
+        try:
+            yield record
+        finally:
+            if profiler:
+                profiler.disable()
+            record["wall_seconds"] = time.perf_counter() - wall_before
+            record["cpu_seconds"] = time.process_time() - cpu_before
+            io_after = _io_counters()
+            if io_before and io_after:
+                record["bytes_read"] = io_after[0] - io_before[0]
+                record["bytes_written"] = io_after[1] - io_before[1]
+            record["peak_rss_bytes"] = _current_peak_rss()
+            record["peak_rss_scope"] = "stage" if per_stage_peak else "process"  # without a reset it is the run's peak so far
+            record["records_out"] = _total_records(record.pop("outputs", ()))
+            if profiler:
+                record.update(self._save_profile(name, profiler))
+            self.stages.append(record)
+
+    def skipped(self, name):
+        self.stages.append({"stage": name, "skipped": True})
+
+    def _save_profile(self, name, profiler):
+        os.makedirs(self.profile_dir, exist_ok=True)
+        path = os.path.join(self.profile_dir, f"{name.replace(':', '_')}.prof")
+        profiler.dump_stats(path)
+        stats = pstats.Stats(profiler)
+        top = sorted(stats.stats.items(), key=lambda item: item[1][2], reverse=True)[:PROFILE_TOP]  # by own time
+        return {
+            "profile": path,
+            "profile_top": [
+                {"function": f"{os.path.basename(file)}:{line}({func})", "calls": calls, "tottime": tottime, "cumtime": cumtime}
+                for (file, line, func), (_, calls, tottime, cumtime, _) in top
+            ],
+        }
+
+    # === OUTPUT ===
+    def run_record(self):
+        io_now = _io_counters()
+        return {
+            "started_at": self.started_at.isoformat(timespec="seconds"),
+            "wall_seconds": time.perf_counter() - self._start,
+            "cpu_seconds": time.process_time() - self._start_cpu,
+            "bytes_read": io_now[0] - self._start_io[0] if io_now and self._start_io else None,
+            "bytes_written": io_now[1] - self._start_io[1] if io_now and self._start_io else None,
+            "peak_rss_bytes": peak_rss_bytes(),
+            "python": sys.version.split()[0],
+            "stages": self.stages,
+        }
+
+    def write_json(self, metrics_dir=METRICS_DIR):
+        """Write the run record as pipeline-run-<UTC time>.json in `metrics_dir`, one file per run. Returns the path."""
+        path = os.path.join(metrics_dir, f"pipeline-run-{self.started_at.strftime('%Y%m%dT%H%M%SZ')}.json")
+        write_atomic(path, json.dumps(self.run_record(), indent=2).encode("utf-8"))
+        return path
+
+    def prometheus_text(self):
+        record = self.run_record()
+        stage_metrics = [
+            ("wall_seconds", "Wall-clock time spent in the stage"),
+            ("cpu_seconds", "CPU time (all threads) spent in the stage"),
+            ("bytes_read", "Bytes read through syscalls (files and sockets) during the stage"),
+            ("bytes_written", "Bytes written through syscalls (files and sockets) during the stage"),
+            ("records_in", "Records (features or items) in the stage's inputs"),
+            ("records_out", "Records (features or items) in the stage's outputs"),
+            ("peak_rss_bytes", "Peak resident set size during the stage"),
+        ]
+        lines = []
+        for field, help_text in stage_metrics:
+            name = f"{METRIC_PREFIX}_stage_{field}"
+            lines += [f"# HELP {name} {help_text}.", f"# TYPE {name} gauge"]
+            lines += [f'{name}{{stage="{s["stage"]}"}} {s[field]}' for s in record["stages"] if s.get(field) is not None]
+        name = f"{METRIC_PREFIX}_stage_skipped"
+        lines += [f"# HELP {name} 1 if the stage was skipped because its inputs were unchanged.", f"# TYPE {name} gauge"]
+        lines += [f'{name}{{stage="{s["stage"]}"}} {int(s["skipped"])}' for s in record["stages"]]
+        for field, help_text in [
+            ("wall_seconds", "Wall-clock time of the whole run"),
+            ("cpu_seconds", "CPU time of the whole run"),
+            ("peak_rss_bytes", "Peak resident set size of the run"),
+        ]:
+            name = f"{METRIC_PREFIX}_run_{field}"
+            lines += [f"# HELP {name} {help_text}.", f"# TYPE {name} gauge", f"{name} {record[field]}"]
+        name = f"{METRIC_PREFIX}_run_timestamp_seconds"
+        lines += [f"# HELP {name} Unix time the run started.", f"# TYPE {name} gauge", f"{name} {self.started_at.timestamp():.0f}"]
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path):
+        """Write the node_exporter textfile, atomically so the collector never reads half a file."""
+        write_atomic(path, self.prometheus_text().encode("utf-8"))
+        return path
+
+
+def print_metrics(metrics):
+    print(f"\n** 📊 STAGE METRICS 📊 **")
+    print(f"  {'stage':<28} {'wall s':>8} {'cpu s':>8} {'read MiB':>9} {'write MiB':>9} {'in':>7} {'out':>7} {'peak MiB':>9}")
+    for s in metrics.stages:
+        if s["skipped"]:
+            print(f"  {s['stage']:<28} skipped")
+            continue
+        mib = lambda n: f"{n / 2**20:9.2f}" if n is not None else f"{'-':>9}"
+        count = lambda n: f"{n:>7}" if n is not None else f"{'-':>7}"
+        print(f"  {s['stage']:<28} {s['wall_seconds']:8.3f} {s['cpu_seconds']:8.3f} {mib(s.get('bytes_read'))} "
+              f"{mib(s.get('bytes_written'))} {count(s['records_in'])} {count(s['records_out'])} {mib(s['peak_rss_bytes'])}")
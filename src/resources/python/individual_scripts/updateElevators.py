@@ -1,11 +1,14 @@
+import argparse
 import json
 import os
-import re
-import requests
 
-# === CONFIG ===
-API_KEY = os.environ["MTA_API_KEY"]
-API_URL = "https://api-endpoint.mta.info/Dataservice/mtagtfsfeeds/nyct%2Fnyct_ene_equipments.json"
+from agencyAdapters import current_adapter
+from datasetDiff import diff_features, print_diff, summarize, update_diff_report
+from elevatorClassifier import classify_all
+from elevatorPlacement import place_elevators
+from featureStore import STORE_FILE, FeatureStore
+from feedClient import fetch_json, iter_file_chunks, iter_json_array, stream_json_array
+from spatialIndex import GridIndex, nearest_complex_id
 
 # Get directory where this script is located
 THIS_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -14,68 +17,85 @@ THIS_DIR = os.path.dirname(os.path.abspath(__file__))
 MTA_EQUIP_FILE = os.path.join(THIS_DIR, "..", "..", "generated", "mta_equipments.json")
 STATIONS_FILE = os.path.join(THIS_DIR, "..", "..", "mta_subway_stations_all.json")
 CUSTOM_ELEVATOR_FILE = os.path.join(THIS_DIR, "..", "..", "custom_elevator_dataset.json")
+COMPLEX_FILE = os.path.join(THIS_DIR, "..", "..", "mta_subway_complexes.json")
+
+EQUIP_FILE_HEADER = "// 🚨 This file is auto-generated. Do not edit manually.\n"
+
+# Custom dataset properties the equipment feed is the source of truth for, and the feed field each comes from.
+# Everything else in the custom dataset is curated by hand, so it isn't compared.
+FEED_OWNED_FIELDS = {
+    "complexID": "stationcomplexid",
+    "isRedundant": "redundant",
+    "linesServed": "linesservedbyelevator",
+}
 
 # === FETCH STEP ===
-def fetch_latest_equipment():
+def equipment_feed():
+    return current_adapter().feeds()["equipmentFeed"]
+
+def is_ada_elevator(equip):
+    return equip.get("equipmenttype") == "EL" and equip.get("ADA", "").upper() == "Y"
+
+def fetch_latest_equipment(data=None):
     print(f"\n** 🛗 [1] ELEVATOR DATASET 🛗 **\nFetching latest MTA equipment data...")
-    headers = {"x-api-key": API_KEY}
-    response = requests.get(API_URL, headers=headers)
-    response.raise_for_status()
-    data = response.json()
+    # Fetch new data from API unless the pipeline already downloaded it
+    if data is None:
+        feed = equipment_feed()
+        data = fetch_json(feed["url"], headers=feed.get("headers"))
+    data = list(current_adapter().normalize_equipment(data))
 
     os.makedirs(os.path.dirname(MTA_EQUIP_FILE), exist_ok=True)
     with open(MTA_EQUIP_FILE, "w", encoding="utf-8") as f:
-        f.write("// 🚨 This file is auto-generated. Do not edit manually.\n")
+        f.write(EQUIP_FILE_HEADER)
         json.dump(data, f, indent=2)
     print(f"Saved latest equipment data to {MTA_EQUIP_FILE}")
     return data
 
-# === LOAD MTA EQUIPMENT ===
-mta_equipment_data = fetch_latest_equipment()
-
-# Load stations and existing elevators as before
-with open(STATIONS_FILE, "r", encoding="utf-8") as f:
-    mta_stations_data = json.load(f)
+def stream_elevators(source=None):
+    """
+    Yield ADA elevator records from the equipment feed while it downloads, or from
+    a saved copy of the feed when `source` is a file path. The download is saved
+    to MTA_EQUIP_FILE as raw bytes, so the full feed is never held in memory.
+    """
+    if source is not None:
+        records = iter_json_array(iter_file_chunks(source))
+    else:
+        feed = equipment_feed()
+        records = stream_json_array(feed["url"], headers=feed.get("headers"), save_to=MTA_EQUIP_FILE, header=EQUIP_FILE_HEADER)
 
-with open(CUSTOM_ELEVATOR_FILE, "r", encoding="utf-8") as f:
-    elevator_data = json.load(f)
+    for equip in current_adapter().normalize_equipment(records):
+        if is_ada_elevator(equip):
+            yield equip
 
+def stream_latest_equipment(source=None):
+    print(f"\n** 🛗 [1] ELEVATOR DATASET 🛗 **\nStreaming latest MTA equipment data...")
+    elevators = list(stream_elevators(source))
+    print(f"Kept {len(elevators)} ADA elevators")
+    if source is None:
+        print(f"Saved latest equipment data to {MTA_EQUIP_FILE}")
+    return elevators
 
-def infer_direction_label_from_desc(desc):
-    """
-    Infer direction label by finding words that end with 'bound',
-    """
-    if not desc:
-        return ""
-    
-    match = re.search(r'\b([A-Za-z]+-?[Bb]ound)\b', desc)
-    if match:
-        return match.group(1)
-    
-    return ""
 
-def load_complex_lookup(json_path):
+def build_complex_lookup(data):
     lookup = {}
-    with open(json_path, "r", encoding="utf-8") as f:
-        data = json.load(f)
 
     # If the JSON is a FeatureCollection (GeoJSON-style)
-        for feature in data.get("features", []):
-            props = feature.get("properties", {})
-            complex_id = str(props.get("complex_id"))
-            coords = feature.get("geometry", {}).get("coordinates")
-            if complex_id and coords:
-                lookup[complex_id] = (coords[0], coords[1])
+    for feature in data.get("features", []):
+        props = feature.get("properties", {})
+        complex_id = str(props.get("complex_id"))
+        coords = feature.get("geometry", {}).get("coordinates")
+        if complex_id and coords:
+            lookup[complex_id] = (coords[0], coords[1])
 
     return lookup
 
+def load_complex_lookup(json_path):
+    with open(json_path, "r", encoding="utf-8") as f:
+        return build_complex_lookup(json.load(f))
 
-# Track placement counts so we know how to offset each new one
-complex_placement_counter = {}
 
-def get_coordinates_for_elevator(equip, station_lookup, complex_lookup, is_street):
-    """Return coordinates for elevator, applying offset rules for street/non-street."""
-    # Determine base coordinates (station → complex → None)
+def base_coordinates_for_elevator(equip, station_lookup, complex_lookup):
+    """Return the un-offset coordinates for an elevator: its station's, else its complex's, else [None, None]."""
     station_ids = str(equip.get("elevatormrn", "")).split("/")
     coords = None
 
@@ -88,154 +108,196 @@ def get_coordinates_for_elevator(equip, station_lookup, complex_lookup, is_stree
         complex_id = str(equip.get("stationcomplexid", ""))
         coords = list(complex_lookup.get(complex_id, (None, None)))
 
-    # If still no coordinates, return placeholder
     if not coords or None in coords:
         return [None, None]
-
-    lon, lat = coords
-    complex_id = str(equip.get("stationcomplexid", ""))
-
-    # Track placement separately for street vs non-street
-    counter_key = (complex_id, is_street)
-    placement_count = complex_placement_counter.get(counter_key, 0)
-    offset_step = 0.0001  # ~11 meters
-
-    if is_street:
-        # Alternate left/right from base coord
-        if placement_count % 2 == 0:
-            lon -= (placement_count // 2 + 1) * offset_step
-        else:
-            lon += (placement_count // 2 + 1) * offset_step
-    else:
-        # Stack downward for non-street
-        lat -= (placement_count + 1) * offset_step
-
-    complex_placement_counter[counter_key] = placement_count + 1
-    return [lon, lat]
+    return list(coords)
+
+
+def geocode_complex_id(equip, station_lookup, complex_index):
+    """Fill in a missing stationcomplexid with the complex nearest to the elevator's station."""
+    if str(equip.get("stationcomplexid", "")).strip():
+        return equip
+    try:
+        sid = str(int(str(equip.get("elevatormrn", "")).split("/")[0].strip()))
+    except ValueError:
+        return equip
+    complex_id = nearest_complex_id(complex_index, station_lookup.get(sid, {}).get("coordinates"))
+    if complex_id:
+        print(f"🧭 {equip.get('equipmentno')} has no stationcomplexid, using nearest complex {complex_id}")
+        equip = {**equip, "stationcomplexid": complex_id}
+    return equip
+
+
+def feed_elevator_features(mta_equipment_data):
+    """ADA elevators from the feed, shaped like custom dataset features (feed-owned properties only) for diffing."""
+    return [
+        {"properties": {
+            "elevatorno": equip.get("equipmentno"),
+            "title": equip.get("station", ""),
+            **{prop: "" if equip.get(field) is None else str(equip.get(field)) for prop, field in FEED_OWNED_FIELDS.items()},
+        }}
+        for equip in mta_equipment_data
+        if is_ada_elevator(equip)
+    ]
 
 
-# Create quick lookup for stations
-station_lookup = {
-    str(int(station["properties"]["station_id"])): {  # normalize to no leading zeros
-        "ada": station["properties"].get("ada", ""),
-        "coordinates": station.get("geometry", {}).get("coordinates")
+def update_elevators(mta_equipment_data=None, mta_stations_data=None, complexes_data=None, elevator_data=None, store_path=None):
+    # === LOAD MTA EQUIPMENT ===
+    if mta_equipment_data is None:
+        mta_equipment_data = fetch_latest_equipment()
+
+    # Load stations and existing elevators unless the pipeline already handed them to us
+    if mta_stations_data is None:
+        with open(STATIONS_FILE, "r", encoding="utf-8") as f:
+            mta_stations_data = json.load(f)
+
+    if elevator_data is None and os.path.exists(CUSTOM_ELEVATOR_FILE):
+        with open(CUSTOM_ELEVATOR_FILE, "r", encoding="utf-8") as f:
+            elevator_data = json.load(f)
+    elif elevator_data is None:
+        # A newly added agency has no curated dataset yet
+        elevator_data = {"type": "FeatureCollection", "features": []}
+
+    # Create quick lookup for stations
+    station_lookup = {
+        str(int(station["properties"]["station_id"])): {  # normalize to no leading zeros
+            "ada": station["properties"].get("ada", ""),
+            "coordinates": station.get("geometry", {}).get("coordinates")
+        }
+        for station in mta_stations_data["features"]
     }
-    for station in mta_stations_data["features"]
-}
-
 
-# Create set of existing elevator numbers to avoid duplicates
-existing_elevators = {feature["properties"]["elevatorno"] for feature in elevator_data["features"]}
-
-new_features = []
-
-# Load complex coordinates from CSV
-COMPLEX_FILE = os.path.join(THIS_DIR, "..", "..", "mta_subway_complexes.json")
-complex_lookup = load_complex_lookup(COMPLEX_FILE)
 
-# Iterate through MTA equipment list
-for equip in mta_equipment_data:
-    if equip.get("equipmenttype") != "EL":
-        continue
+    # Create set of existing elevator numbers to avoid duplicates
+    existing_elevators = {feature["properties"]["elevatorno"] for feature in elevator_data["features"]}
 
-    elev_no = equip.get("equipmentno")
-    if elev_no in existing_elevators:
-        continue
+    new_features = []
 
-    # ADA filter
-    if equip.get("ADA", "").upper() != "Y":
-        continue
-
-    # Infer street flag before getting coords
-    short_desc = equip.get("shortdescription", "")
-    is_street = "street" in short_desc.lower()
-
-    # Coordinates
-    coords = get_coordinates_for_elevator(equip, station_lookup, complex_lookup, is_street)
-
-    # Station ID for output
-    station_id = str(int(str(equip.get("elevatormrn", "")).split("/")[0].strip()))
+    # Load complex coordinates
+    if complexes_data is None:
+        complex_lookup = load_complex_lookup(COMPLEX_FILE)
+    else:
+        complex_lookup = build_complex_lookup(complexes_data)
+    complex_index = GridIndex((cid, lon, lat) for cid, (lon, lat) in complex_lookup.items())
 
+    adapter = current_adapter()
 
-    # Title and image
-    title = equip.get("station", "").replace("/", "-").replace(" ", "-")
-    image_url = f"https://wheresthedamnelevator.com/assets/images/newyork/mta/{title}_{elev_no}.jpg"
+    # New ADA elevators; their text (direction, street/platform, description) is classified in one batch
+    new_equipment = [
+        geocode_complex_id(equip, station_lookup, complex_index)  # so placement and complexID use the geocoded complex
+        for equip in mta_equipment_data
+        if is_ada_elevator(equip) and equip.get("equipmentno") not in existing_elevators
+    ]
 
-    # Infer direction label (MIGHT REQUIRE MANUAL EDITING)
-    direction_label = (
-        infer_direction_label_from_desc(equip.get("serving")) or
-        infer_direction_label_from_desc(short_desc)
+    for equip, text in zip(new_equipment, classify_all(new_equipment)):
+        elev_no = equip.get("equipmentno")
+        short_desc = equip.get("shortdescription", "")
+
+        # Base coordinates; offsets are applied to all new elevators at once below
+        coords = base_coordinates_for_elevator(equip, station_lookup, complex_lookup)
+
+        # Station ID for output
+        station_id = str(int(str(equip.get("elevatormrn", "")).split("/")[0].strip()))
+
+        # Title and image
+        title = equip.get("station", "").replace("/", "-").replace(" ", "-")
+        image_url = adapter.image_url(title, elev_no)
+
+        # Create feature
+        feature = {
+            "type": "Feature",
+            "properties": {
+                "isRedundant": str(equip.get("redundant", "")),
+                "elevatorgtfsstopid": equip.get("elevatorsgtfsstopid", ""),
+                "route": equip.get("trainno", ""),
+                "complexID": equip.get("stationcomplexid", ""),
+                "stationID": station_id,
+                "system": adapter.system,
+                "elevatorno": elev_no,
+                "linesServed": equip.get("linesservedbyelevator", ""),
+                "directionLabel": text["directionLabel"],  # inferred, MIGHT REQUIRE MANUAL EDITING
+                "title": equip.get("station", ""),
+                "image": image_url,
+                "alternativeRoute": equip.get("alternativeroute", ""),
+                "ada": station_lookup.get(station_id, {}).get("ada", ""),
+                "isBroken": "",
+                "isStreet": "true" if text["isStreet"] else "",
+                "shortdescription": short_desc,
+                "description_custom": text["description_custom"]
+            },
+            "geometry": {
+                "type": "Point",
+                "coordinates": coords
+            },
+            "id": os.urandom(16).hex()
+        }
+
+        new_features.append(feature)
+
+
+    # Spread elevators sharing a complex so they don't overlap
+    placed = place_elevators(
+        [feat["geometry"]["coordinates"] for feat in new_features],
+        [str(feat["properties"]["complexID"]) for feat in new_features],
+        [feat["properties"]["isStreet"] == "true" for feat in new_features],
     )
-
-
-
-    # Build description_custom
-    if is_street:
-        description_custom = "This elevator gets you from the street to the main station mezzanine"
+    for feat, coords in zip(new_features, placed):
+        feat["geometry"]["coordinates"] = coords
+
+    # Diff the feed against the curated dataset before adding to it: removed elevators are ones the MTA no longer
+    # lists as ADA elevators, modified ones have feed-owned properties that drifted
+    diff = diff_features(
+        [feat for feat in elevator_data["features"] if feat["properties"].get("system") == adapter.system],
+        feed_elevator_features(mta_equipment_data),
+        "elevatorno",
+        fields=list(FEED_OWNED_FIELDS),
+        geometry=False,
+    )
+    diff["added"] = new_features
+
+    # Append new features
+    elevator_data["features"].extend(new_features)
+
+    # Save updated file; with a feature store only the new rows are written, and the GeoJSON is re-exported when they exist
+    if store_path:
+        with FeatureStore(store_path) as store:
+            store.sync("elevators")
+            if new_features:
+                store.upsert("elevators", new_features)
+                store.export("elevators")
     else:
-        if direction_label:
-            description_custom = f"This elevator gets you from the main station mezzanine to {direction_label} {equip.get('linesservedbyelevator', '')} trains"
-        else:
-            description_custom = f"This elevator gets you from the main station mezzanine to {equip.get('linesservedbyelevator', '')} trains"
-
-    # Create feature
-    feature = {
-        "type": "Feature",
-        "properties": {
-            "isRedundant": str(equip.get("redundant", "")),
-            "elevatorgtfsstopid": equip.get("elevatorsgtfsstopid", ""),
-            "route": equip.get("trainno", ""),
-            "complexID": equip.get("stationcomplexid", ""),
-            "stationID": station_id,
-            "system": "nyc_mta",
-            "elevatorno": elev_no,
-            "linesServed": equip.get("linesservedbyelevator", ""),
-            "directionLabel": direction_label,
-            "title": equip.get("station", ""),
-            "image": image_url,
-            "alternativeRoute": equip.get("alternativeroute", ""),
-            "ada": station_lookup.get(station_id, {}).get("ada", ""),
-            "isBroken": "",
-            "isStreet": "true" if is_street else "",
-            "shortdescription": short_desc,
-            "description_custom": description_custom
-        },
-        "geometry": {
-            "type": "Point",
-            "coordinates": coords
-        },
-        "id": os.urandom(16).hex()
-    }
-
-    new_features.append(feature)
-
-
-# Append new features
-elevator_data["features"].extend(new_features)
-
-# Save updated file
-with open(CUSTOM_ELEVATOR_FILE, "w", encoding="utf-8") as f:
-    json.dump(elevator_data, f, indent=2)
-
-if new_features:
-    print(f"✅ Added {len(new_features)} new elevators to custom_elevator_dataset:")
-    for feat in new_features:
-        print(f"  {feat['properties']['elevatorno']} - {feat['properties']['title']}")
-else:
-    print(f"\n✅ Transit Access has all accessible elevators in MTA. No new elevators were added.")
-
-# Write diff report section
-report_path = os.path.join(THIS_DIR, "..", "..", "generated", "diff_report.json")
-report = {}
-if os.path.exists(report_path):
-    with open(report_path) as f:
-        report = json.load(f)
-report["elevators"] = {
-    "added": [
-        f"{feat['properties']['elevatorno']} - {feat['properties']['title']}"
-        for feat in new_features
-    ]
-}
-os.makedirs(os.path.dirname(report_path), exist_ok=True)
-with open(report_path, "w") as f:
-    json.dump(report, f, indent=2)
+        os.makedirs(os.path.dirname(CUSTOM_ELEVATOR_FILE), exist_ok=True)
+        with open(CUSTOM_ELEVATOR_FILE, "w", encoding="utf-8") as f:
+            json.dump(elevator_data, f, indent=2)
+
+    if new_features:
+        print(f"✅ Added {len(new_features)} new elevators to custom_elevator_dataset:")
+        for feat in new_features:
+            print(f"  {feat['properties']['elevatorno']} - {feat['properties']['title']}")
+    else:
+        print(f"\n✅ Transit Access has all accessible elevators in MTA. No new elevators were added.")
+    if diff["removed"] or diff["modified"]:
+        print(f"⚠️ {len(diff['removed'])} elevators are no longer in the feed and {len(diff['modified'])} differ from it (review manually):")
+        print_diff({**diff, "added": []}, "elevatorno", "title")
+
+    # Write diff report section
+    update_diff_report("elevators", summarize(diff, lambda feat: f"{feat['properties']['elevatorno']} - {feat['properties']['title']}",
+                                              lambda feat: feat["properties"]["elevatorno"]))
+
+    return elevator_data
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Add new ADA elevators from the MTA equipment feed.")
+    parser.add_argument("--stream", action="store_true",
+                        help="parse the equipment feed incrementally instead of buffering the whole response")
+    parser.add_argument("--from-file", metavar="PATH",
+                        help="stream records from a saved copy of the feed instead of downloading it")
+    parser.add_argument("--store", nargs="?", const=STORE_FILE, metavar="PATH",
+                        help="append new elevators through the SQLite feature store (default file: %(const)s)")
+    args = parser.parse_args()
+
+    if args.stream or args.from_file:
+        update_elevators(stream_latest_equipment(args.from_file), store_path=args.store)
+    else:
+        update_elevators(store_path=args.store)
@@ -1,17 +1,24 @@
 import json
 import os
-import requests
 
-API_URL = "https://data.ny.gov/resource/5f5g-n3cz.json"
+from agencyAdapters import current_adapter
+from datasetDiff import diff_features, print_diff, summarize, update_diff_report
+from feedClient import fetch_json
+
 THIS_DIR = os.path.dirname(os.path.abspath(__file__))
 COMPLEXES_FILE = os.path.join(THIS_DIR, "..", "..", "mta_subway_complexes.json")
 
-def fetch_latest_complex_data():
+def complex_feed():
+    return current_adapter().feeds()["complexesFeed"]
+
+def fetch_latest_complex_data(new_data_raw=None):
     print(f"\n** 🚃 [0b] COMPLEXES DATASET 🚃 **\nFetching latest MTA complex data...")
 
-    response = requests.get(API_URL)
-    response.raise_for_status()
-    new_data_raw = response.json()
+    # Fetch new data from API unless the pipeline already downloaded it
+    if new_data_raw is None:
+        feed = complex_feed()
+        new_data_raw = fetch_json(feed["url"], headers=feed.get("headers"))
+    new_data_raw = current_adapter().normalize_complexes(new_data_raw)
 
     # Convert API JSON into GeoJSON Features
     new_features = []
@@ -64,68 +71,20 @@ def fetch_latest_complex_data():
     else:
         old_features = []
 
-    # Convert old/new to dict keyed by complex_id
-    old_id = {f["properties"]["complex_id"]: f["properties"] for f in old_features}
-    new_id = {f["properties"]["complex_id"]: f["properties"] for f in new_features}
-
-    # Track differences
-    added = [new_id[cid] for cid in new_id if cid not in old_id]
-    removed = [old_id[cid] for cid in old_id if cid not in new_id]
-    modified = []
-
-    for cid, new_props in new_id.items():
-        if cid in old_id:
-            old_props = old_id[cid]
-            changes = {}
-            for key, new_val in new_props.items():
-                old_val = old_props.get(key)
-                if old_val != new_val:
-                    changes[key] = {"OLD": old_val, "→ NEW": new_val}
-            if changes:
-                modified.append({
-                    "complex_id": cid,
-                    "stop_name": new_props.get("stop_name"),
-                    "changes": changes
-                })
-
-    # Print summary
-    if added or removed or modified:
-        print(f"Added: {len(added)} | Removed: {len(removed)} | Modified: {len(modified)}")
-        if added:
-            print("\n--- Added ---")
-            for item in added:
-                print(item)
-        if removed:
-            print("\n--- Removed ---")
-            for item in removed:
-                print(item)
-        if modified:
-            print("\n--- Modified ---")
-            for item in modified:
-                print(item)
-    else:
-        print("No changes detected.")
+    # Diff against the previous run, keyed by complex_id
+    diff = diff_features(old_features, new_features, "complex_id")
+    print_diff(diff, "complex_id", "stop_name")
 
     # Save as GeoJSON
+    os.makedirs(os.path.dirname(COMPLEXES_FILE), exist_ok=True)
     with open(COMPLEXES_FILE, "w", encoding="utf-8") as f:
         json.dump(new_feature_collection, f, indent=2)
 
     print(f"✅ Saved {len(new_features)} complexes to {COMPLEXES_FILE}")
 
     # Write diff report section
-    report_path = os.path.join(THIS_DIR, "..", "..", "generated", "diff_report.json")
-    report = {}
-    if os.path.exists(report_path):
-        with open(report_path) as f:
-            report = json.load(f)
-    report["complexes"] = {
-        "added":    [p["stop_name"] for p in added],
-        "removed":  [p["stop_name"] for p in removed],
-        "modified": [m["stop_name"] for m in modified],
-    }
-    os.makedirs(os.path.dirname(report_path), exist_ok=True)
-    with open(report_path, "w") as f:
-        json.dump(report, f, indent=2)
+    update_diff_report("complexes", summarize(diff, lambda feat: feat["properties"]["stop_name"],
+                                              lambda feat: feat["properties"]["complex_id"]))
 
     return new_feature_collection
 
@@ -1,20 +1,26 @@
 import json
 import os
-import requests
 
-API_URL = "https://data.ny.gov/resource/39hk-dx4f.geojson"
+from agencyAdapters import current_adapter
+from datasetDiff import diff_features, print_diff, summarize, update_diff_report
+from feedClient import fetch_json
+
 THIS_DIR = os.path.dirname(os.path.abspath(__file__))
 STATIONS_FILE = os.path.join(THIS_DIR, "..", "..", "mta_subway_stations_all.json")
 
-def fetch_latest_station_data():
+def station_feed():
+    return current_adapter().feeds()["stationsFeed"]
+
+def fetch_latest_station_data(new_data=None):
     print(f"\n** 🚃 [0a] STATIONS DATASET 🚃**\nFetching latest MTA station data...")
 
-    # Fetch new data from API
-    response = requests.get(API_URL)
-    response.raise_for_status()
-    new_data = response.json()
+    # Fetch new data from API unless the pipeline already downloaded it
+    if new_data is None:
+        feed = station_feed()
+        new_data = fetch_json(feed["url"], headers=feed.get("headers"))
     if isinstance(new_data, dict) and "features" in new_data:
         new_data = new_data["features"]
+    new_data = current_adapter().normalize_stations(new_data)
 
     # Load old data if file exists and is valid
     old_data = []
@@ -28,46 +34,9 @@ def fetch_latest_station_data():
             print(f"⚠️ Warning: {STATIONS_FILE} is empty or invalid. Starting fresh.")
             old_data = []
 
-    # Convert to dict keyed by gtfs_stop_id for diffing
-    old_id = {item["properties"]["gtfs_stop_id"]: item for item in old_data}
-    new_id = {item["properties"]["gtfs_stop_id"]: item for item in new_data}
-
-    # Track differences
-    added = [new_id[sid] for sid in new_id if sid not in old_id]
-    removed = [old_id[sid] for sid in old_id if sid not in new_id]
-    modified = []
-
-    for sid, new_item in new_id.items():
-        if sid in old_id:
-            old_props = old_id[sid]["properties"]
-            new_props = new_item["properties"]
-            changes = {k: {"OLD": old_props.get(k), "→ NEW": v}
-                       for k, v in new_props.items()
-                       if old_props.get(k) != v}
-            if changes:
-                modified.append({
-                    "gtfs_stop_id": sid,
-                    "stop_name": new_props.get("stop_name"),
-                    "changes": changes
-                })
-
-    # Print summary
-    if added or removed or modified:
-        print(f"Added: {len(added)} | Removed: {len(removed)} | Modified: {len(modified)}")
-        if added:
-            print("\n--- Added ---")
-            for item in added:
-                print(item)
-        if removed:
-            print("\n--- Removed ---")
-            for item in removed:
-                print(item)
-        if modified:
-            print("\n--- Modified ---")
-            for item in modified:
-                print(item)
-    else:
-        print("No changes detected.")
+    # Diff against the previous run, keyed by gtfs_stop_id
+    diff = diff_features(old_data, new_data, "gtfs_stop_id")
+    print_diff(diff, "gtfs_stop_id", "stop_name")
 
     # Construct feature collection with comment
     feature_collection = {
@@ -83,22 +52,11 @@ def fetch_latest_station_data():
 
     print(f"✅ Saved latest MTA station data to {STATIONS_FILE}")
 
-    # Write diff report section
-    report_path = os.path.join(THIS_DIR, "..", "..", "generated", "diff_report.json")
-    report = {}
-    if os.path.exists(report_path):
-        with open(report_path) as f:
-            report = json.load(f)
-    report["stations"] = {
-        "added":    [feat["properties"]["stop_name"] for feat in added],
-        "removed":  [feat["properties"]["stop_name"] for feat in removed],
-        "modified": [m["stop_name"] for m in modified],
-    }
-    os.makedirs(os.path.dirname(report_path), exist_ok=True)
-    with open(report_path, "w") as f:
-        json.dump(report, f, indent=2)
+    # Write diff report section; its keys are station_id, the station_details primary key, not the gtfs_stop_id matched on
+    update_diff_report("stations", summarize(diff, lambda feat: feat["properties"]["stop_name"],
+                                             lambda feat: feat["properties"]["station_id"]))
 
-    return new_data
+    return feature_collection
 
 
 if __name__ == "__main__":
@@ -0,0 +1,476 @@
+import argparse
+import gzip
+import json
+import math
+import os
+import struct
+from collections import defaultdict
+
+from incrementalBuild import hash_data, hash_file, is_up_to_date, write_outputs
+from pipelineRunner import SOURCE_FILES, load_json, unchanged
+
+# Get directory where this script is located
+THIS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Served as a static file; map clients read only the byte ranges of the tiles in view
+OUTPUT_FILE = os.path.join(THIS_DIR, "..", "..", "..", "..", "public", "tiles", "transit_access.pmtiles")
+
+# === CONFIG ===
+MIN_ZOOM = 10
+MAX_ZOOM = 15  # clients overzoom past this
+EXTENT = 4096  # tile coordinate range
+BUFFER = 64  # tile units drawn past each edge so icons and lines aren't cut at tile boundaries
+ROOT_DIRECTORY_BUDGET = 16384 - 127  # header + root directory fit in the first 16 KiB a client fetches
+
+# Tile layers, the pipeline dataset each is built from, and the properties kept from each zoom level up.
+# Layer names match the source layers the map style already uses where there is one.
+LAYERS = [
+    {"name": "station_complexes", "source": "complexGeometry", "minzoom": 10, "properties": {10: ["complex_id"]}},
+    {"name": "accessible_stations", "source": "stationGeometry", "minzoom": 10, "properties": {10: ["station_id"]}},
+    {"name": "elevator_outages", "source": "outages", "minzoom": 12, "properties": {12: ["elevatorno", "isBroken"]}},
+    {"name": "nyc_transit_elevators", "source": "elevators", "minzoom": 12, "properties": {
+        12: ["elevatorno", "isStreet", "complexID"],
+        15: ["title", "linesServed", "directionLabel"],
+    }},
+    {"name": "elevator_to_complex_line_connect", "source": "streetLines", "minzoom": 14, "properties": {
+        14: ["elevator_no", "complex_id"],
+        15: ["station_name", "side"],
+    }},
+]
+
+
+def layer_properties(layer, zoom):
+    return [prop for min_zoom, props in sorted(layer["properties"].items()) if zoom >= min_zoom for prop in props]
+
+
+# === PROTOBUF (only what the MVT format needs) ===
+def _varint(n):
+    out = bytearray()
+    while n > 0x7F:
+        out.append((n & 0x7F) | 0x80)
+        n >>= 7
+    out.append(n)
+    return bytes(out)
+
+
+def _zigzag(n):
+    return n << 1 if n >= 0 else (-n << 1) - 1
+
+
+def _key(field, wire_type):
+    return _varint((field << 3) | wire_type)
+
+
+def _message(field, payload):
+    return _key(field, 2) + _varint(len(payload)) + payload
+
+
+def _packed(field, values):
+    return _message(field, b"".join(_varint(v) for v in values))
+
+
+def _value(value):
+    """An MVT Value message: strings, bools, integers and doubles."""
+    if isinstance(value, bool):
+        return _key(7, 0) + _varint(int(value))
+    if isinstance(value, int):
+        return _key(6, 0) + _varint(_zigzag(value))
+    if isinstance(value, float):
+        return _key(3, 1) + struct.pack("<d", value)
+    return _message(1, str(value).encode("utf-8"))
+
+
+# === GEOMETRY ===
+POINT, LINESTRING = 1, 2
+
+
+def mercator(lon, lat):
+    """Web Mercator position in [0, 1) x [0, 1), y growing south."""
+    lat = max(min(lat, 85.0511), -85.0511)
+    y = math.log(math.tan(math.pi / 4 + math.radians(lat) / 2))
+    return (lon + 180.0) / 360.0, 0.5 - y / (2 * math.pi)
+
+
+def _clip_segment(x0, y0, x1, y1, lo, hi):
+    """Liang-Barsky: the part of a segment inside the square [lo, hi]², or None."""
+    t0, t1 = 0.0, 1.0
+    dx, dy = x1 - x0, y1 - y0
+    for p, q in ((-dx, x0 - lo), (dx, hi - x0), (-dy, y0 - lo), (dy, hi - y0)):
+        if p == 0:
+            if q < 0:
+                return None
+            continue
+        t = q / p
+        if p < 0:
+            t0 = max(t0, t)
+        else:
+            t1 = min(t1, t)
+        if t0 > t1:
+            return None
+    return (x0 + t0 * dx, y0 + t0 * dy), (x0 + t1 * dx, y0 + t1 * dy)
+
+
+def clip_line(points, lo, hi):
+    """Split a line into the parts that lie inside the square [lo, hi]²."""
+    parts, current = [], []
+    for (x0, y0), (x1, y1) in zip(points, points[1:]):
+        segment = _clip_segment(x0, y0, x1, y1, lo, hi)
+        if segment is None:
+            if current:
+                parts.append(current)
+                current = []
+            continue
+        start, end = segment
+        if current and current[-1] != start:
+            parts.append(current)
+            current = []
+        if not current:
+            current = [start]
+        current.append(end)
+        if end != (x1, y1):  # left the square
+            parts.append(current)
+            current = []
+    if current:
+        parts.append(current)
+    return parts
+
+
+def _encode_geometry(geom_type, parts):
+    """MVT command stream (MoveTo / LineTo with zigzag deltas) for integer tile coordinates."""
+    commands, cx, cy = [], 0, 0
+    if geom_type == POINT:
+        commands.append(1 | (len(parts) << 3))
+        for x, y in parts:
+            commands += [_zigzag(x - cx), _zigzag(y - cy)]
+            cx, cy = x, y
+        return commands
+    for part in parts:
+        commands += [1 | (1 << 3), _zigzag(part[0][0] - cx), _zigzag(part[0][1] - cy)]
+        cx, cy = part[0]
+        commands.append(2 | ((len(part) - 1) << 3))
+        for x, y in part[1:]:
+            commands += [_zigzag(x - cx), _zigzag(y - cy)]
+            cx, cy = x, y
+    return commands
+
+
+def _tile_range(min_x, min_y, max_x, max_y, zoom):
+    """Tiles at `zoom` whose buffered area overlaps a box in Mercator coordinates."""
+    scale = 1 << zoom
+    pad = BUFFER / EXTENT
+    last = scale - 1
+    return (
+        range(max(0, math.floor(min_x * scale - pad)), min(last, math.floor(max_x * scale + pad)) + 1),
+        range(max(0, math.floor(min_y * scale - pad)), min(last, math.floor(max_y * scale + pad)) + 1),
+    )
+
+
+def _tile_geometry(geom_type, coords, zoom, tx, ty):
+    """Integer tile-local parts of a projected geometry, clipped to the buffered tile, or None if nothing is left."""
+    scale = (1 << zoom) * EXTENT
+    local = [((x * scale) - tx * EXTENT, (y * scale) - ty * EXTENT) for x, y in coords]
+    if geom_type == POINT:
+        points = [(round(x), round(y)) for x, y in local if -BUFFER <= x <= EXTENT + BUFFER and -BUFFER <= y <= EXTENT + BUFFER]
+        return points or None
+    parts = []
+    for part in clip_line(local, -BUFFER, EXTENT + BUFFER):
+        rounded = [(round(x), round(y)) for x, y in part]
+        deduped = [p for i, p in enumerate(rounded) if i == 0 or p != rounded[i - 1]]
+        if len(deduped) >= 2:
+            parts.append(deduped)
+    return parts or None
+
+
+# === TILES ===
+def projected_features(collection):
+    """(geometry type, Mercator coordinates, properties) for the Point and LineString features of a FeatureCollection."""
+    for feature in collection.get("features", []):
+        geometry = feature.get("geometry") or {}
+        coords = geometry.get("coordinates")
+        if geometry.get("type") == "Point" and coords and None not in coords[:2]:
+            yield POINT, [mercator(coords[0], coords[1])], feature.get("properties", {})
+        elif geometry.get("type") == "LineString" and coords:
+            yield LINESTRING, [mercator(lon, lat) for lon, lat, *_ in coords], feature.get("properties", {})
+
+
+def encode_layer(name, features):
+    """An MVT Layer message from [(geometry type, parts, properties)], sharing keys and values across features."""
+    keys, values = {}, {}
+    encoded = []
+    for geom_type, parts, props in features:
+        tags = []
+        for key, value in props.items():
+            if value is None or value == "":
+                continue
+            tags += [keys.setdefault(key, len(keys)), values.setdefault((type(value), value), len(values))]
+        feature = _packed(2, tags) + _key(3, 0) + _varint(geom_type) + _packed(4, _encode_geometry(geom_type, parts))
+        encoded.append(_message(2, feature))
+    return (
+        _key(15, 0) + _varint(2)
+        + _message(1, name.encode("utf-8"))
+        + b"".join(encoded)
+        + b"".join(_message(3, key.encode("utf-8")) for key in keys)
+        + b"".join(_message(4, _value(value)) for _, value in values)
+        + _key(5, 0) + _varint(EXTENT)
+    )
+
+
+def build_tiles(datasets, min_zoom=MIN_ZOOM, max_zoom=MAX_ZOOM):
+    """{(z, x, y): gzipped MVT bytes} for every tile any layer touches."""
+    projected = {layer["name"]: list(projected_features(datasets[layer["source"]])) for layer in LAYERS}
+    tiles = {}
+    for zoom in range(min_zoom, max_zoom + 1):
+        contents = defaultdict(list)  # (x, y) -> [(layer name, [(geom type, parts, props)])]
+        for layer in LAYERS:
+            if zoom < layer["minzoom"]:
+                continue
+            keep = layer_properties(layer, zoom)
+            by_tile = defaultdict(list)
+            for geom_type, coords, props in projected[layer["name"]]:
+                xs, ys = [x for x, _ in coords], [y for _, y in coords]
+                kept = {prop: props.get(prop) for prop in keep}
+                tx_range, ty_range = _tile_range(min(xs), min(ys), max(xs), max(ys), zoom)
+                for tx in tx_range:
+                    for ty in ty_range:
+                        parts = _tile_geometry(geom_type, coords, zoom, tx, ty)
+                        if parts:
+                            by_tile[(tx, ty)].append((geom_type, parts, kept))
+            for xy, features in by_tile.items():
+                contents[xy].append((layer["name"], features))
+        for (x, y), layers in contents.items():
+            mvt = b"".join(_message(3, encode_layer(name, features)) for name, features in layers)
+            tiles[(zoom, x, y)] = gzip.compress(mvt, mtime=0)
+    return tiles
+
+
+# === PMTILES (v3) ===
+def tile_id(z, x, y):
+    """PMTiles tile id: tiles of lower zooms first, then the Hilbert curve position within the zoom."""
+    n = 1 << z
+    d = 0
+    s = n >> 1
+    while s > 0:
+        rx = 1 if x & s else 0
+        ry = 1 if y & s else 0
+        d += s * s * ((3 * rx) ^ ry)
+        if ry == 0:
+            if rx == 1:
+                x, y = n - 1 - x, n - 1 - y
+            x, y = y, x
+        s >>= 1
+    return ((1 << (2 * z)) - 1) // 3 + d
+
+
+def _serialize_directory(entries):
+    """Directory entries (tile_id, offset, length, run_length), delta/varint encoded column by column and gzipped."""
+    out = bytearray(_varint(len(entries)))
+    last_id = 0
+    for entry_id, _, _, _ in entries:
+        out += _varint(entry_id - last_id)
+        last_id = entry_id
+    for _, _, _, run_length in entries:
+        out += _varint(run_length)
+    for _, _, length, _ in entries:
+        out += _varint(length)
+    for i, (_, offset, _, _) in enumerate(entries):
+        previous = entries[i - 1] if i else None
+        contiguous = previous is not None and offset == previous[1] + previous[2]
+        out += _varint(0 if contiguous else offset + 1)
+    return gzip.compress(bytes(out), mtime=0)
+
+
+def _build_directories(entries):
+    """Root directory, plus leaf directories when the root alone would not fit in the initial fetch."""
+    root = _serialize_directory(entries)
+    if len(root) <= ROOT_DIRECTORY_BUDGET:
+        return root, b""
+    leaf_size = 4096
+    while True:
+        root_entries, leaves = [], bytearray()
+        for start in range(0, len(entries), leaf_size):
+            leaf = _serialize_directory(entries[start:start + leaf_size])
+            root_entries.append((entries[start][0], len(leaves), len(leaf), 0))  # run_length 0 marks a leaf
+            leaves += leaf
+        root = _serialize_directory(root_entries)
+        if len(root) <= ROOT_DIRECTORY_BUDGET:
+            return root, bytes(leaves)
+        leaf_size *= 2
+
+
+def pmtiles_archive(tiles, metadata, bounds, min_zoom=MIN_ZOOM, max_zoom=MAX_ZOOM):
+    """A PMTiles v3 archive of gzipped MVT `tiles`. Identical tiles are stored once; runs of them share one entry."""
+    entries, data, offsets = [], bytearray(), {}
+    for tid, content in sorted((tile_id(*zxy), content) for zxy, content in tiles.items()):
+        if entries and content == previous_content and tid == entries[-1][0] + entries[-1][3]:
+            last = entries[-1]
+            entries[-1] = (last[0], last[1], last[2], last[3] + 1)
+            continue
+        if content not in offsets:
+            offsets[content] = len(data)
+            data += content
+        entries.append((tid, offsets[content], len(content), 1))
+        previous_content = content
+
+    root, leaves = _build_directories(entries)
+    metadata_bytes = gzip.compress(json.dumps(metadata, separators=(",", ":")).encode("utf-8"), mtime=0)
+    min_lon, min_lat, max_lon, max_lat = bounds
+    e7 = lambda degrees: int(round(degrees * 1e7))
+
+    root_offset = 127
+    metadata_offset = root_offset + len(root)
+    leaves_offset = metadata_offset + len(metadata_bytes)
+    data_offset = leaves_offset + len(leaves)
+    header = struct.pack(
+        "<7sB8Q3Q4B2B4iB2i",
+        b"PMTiles", 3,
+        root_offset, len(root), metadata_offset, len(metadata_bytes),
+        leaves_offset, len(leaves), data_offset, len(data),
+        sum(entry[3] for entry in entries), len(entries), len(offsets),
+        1, 2, 2, 1,  # clustered, gzip directories, gzip tiles, MVT
+        min_zoom, max_zoom,
+        e7(min_lon), e7(min_lat), e7(max_lon), e7(max_lat),
+        min_zoom + 2, e7((min_lon + max_lon) / 2), e7((min_lat + max_lat) / 2),
+    )
+    return header + root + metadata_bytes + leaves + bytes(data)
+
+
+def read_tile(archive, z, x, y):
+    """The gzipped tile stored for z/x/y in a PMTiles archive (bytes), or None. Used to inspect the output."""
+    fields = struct.unpack("<7sB8Q3Q4B2B4iB2i", archive[:127])
+    directory_offset, directory_length, leaves_offset, data_offset = fields[2], fields[3], fields[6], fields[8]
+    tid = tile_id(z, x, y)
+    for _ in range(4):  # root, then at most a few leaf levels
+        entries = _parse_directory(gzip.decompress(archive[directory_offset:directory_offset + directory_length]))
+        match = None
+        for entry in entries:
+            if entry[0] > tid:
+                break
+            match = entry
+        if match is None:
+            return None
+        entry_id, offset, length, run_length = match
+        if run_length == 0:
+            directory_offset, directory_length = leaves_offset + offset, length
+            continue
+        if tid < entry_id + run_length:
+            return archive[data_offset + offset:data_offset + offset + length]
+        return None
+    return None
+
+
+def _read_varints(buffer):
+    values, value, shift = [], 0, 0
+    for byte in buffer:
+        value |= (byte & 0x7F) << shift
+        shift += 7
+        if not byte & 0x80:
+            values.append(value)
+            value, shift = 0, 0
+    return values
+
+
+def _parse_directory(buffer):
+    values = _read_varints(buffer)
+    n = values[0]
+    ids, run_lengths, lengths, offsets = values[1:n + 1], values[n + 1:2 * n + 1], values[2 * n + 1:3 * n + 1], values[3 * n + 1:4 * n + 1]
+    entries, last_id = [], 0
+    for i in range(n):
+        last_id += ids[i]
+        offset = entries[i - 1][1] + entries[i - 1][2] if offsets[i] == 0 and i else offsets[i] - 1
+        entries.append((last_id, offset, lengths[i], run_lengths[i]))
+    return entries
+
+
+# === PIPELINE STAGE ===
+def _bounds(datasets):
+    lons, lats = [], []
+    for layer in LAYERS:
+        for _, coords, _ in projected_features(datasets[layer["source"]]):
+            for x, y in coords:
+                lons.append(x * 360.0 - 180.0)
+                lats.append(math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * y)))))
+    return min(lons), min(lats), max(lons), max(lats)
+
+
+def field_type(values):
+    """TileJSON field type of a property from the values encode_layer stores: Boolean, Number, or String for anything else or a mix."""
+    types = {type(value) for value in values if value is not None and value != ""}
+    if types == {bool}:
+        return "Boolean"
+    if types and types <= {int, float}:
+        return "Number"
+    return "String"
+
+
+def metadata_json(datasets):
+    def fields(layer):
+        features = datasets[layer["source"]].get("features", [])
+        return {prop: field_type(f.get("properties", {}).get(prop) for f in features) for prop in layer_properties(layer, MAX_ZOOM)}
+
+    return {
+        "name": "transit-access",
+        "description": "Elevators, outages, accessible stations, complexes and street-to-complex lines",
+        "format": "pbf",
+        "vector_layers": [
+            {
+                "id": layer["name"],
+                "fields": fields(layer),
+                "minzoom": max(layer["minzoom"], MIN_ZOOM),
+                "maxzoom": MAX_ZOOM,
+            }
+            for layer in LAYERS
+        ],
+    }
+
+
+def tile_report(tiles):
+    """{zoom: {"tiles", "max_bytes", "mean_bytes"}} for the compressed tiles."""
+    report = {}
+    for (z, _, _), content in tiles.items():
+        entry = report.setdefault(z, {"tiles": 0, "max_bytes": 0, "total_bytes": 0})
+        entry["tiles"] += 1
+        entry["max_bytes"] = max(entry["max_bytes"], len(content))
+        entry["total_bytes"] += len(content)
+    return {z: {"tiles": e["tiles"], "max_bytes": e["max_bytes"], "mean_bytes": e["total_bytes"] // e["tiles"]}
+            for z, e in sorted(report.items())}
+
+
+def write_vector_tiles(elevators=None, outages=None, station_geometry=None, complex_geometry=None, street_lines=None,
+                       force=False, output_file=None):
+    output_file = output_file or OUTPUT_FILE
+    datasets = {
+        "elevators": elevators, "outages": outages, "stationGeometry": station_geometry,
+        "complexGeometry": complex_geometry, "streetLines": street_lines,
+    }
+    # Layers the pipeline didn't hand over come from their files
+    datasets = {key: value if value is not None else load_json(SOURCE_FILES[key]) for key, value in datasets.items()}
+
+    input_hashes = {key: hash_data(value) for key, value in datasets.items()}
+    input_hashes["script"] = hash_file(__file__)
+    if not force and is_up_to_date("vectorTiles", input_hashes, [output_file]):
+        print(f"\n** 🗺️ [4] VECTOR TILES 🗺️ **:⏭️  Inputs unchanged, {output_file} is up to date")
+        return unchanged()
+
+    tiles = build_tiles(datasets)
+    archive = pmtiles_archive(tiles, metadata_json(datasets), _bounds(datasets))
+    os.makedirs(os.path.dirname(output_file), exist_ok=True)
+    write_outputs("vectorTiles", input_hashes, {output_file: archive})
+
+    print(f"\n** 🗺️ [4] VECTOR TILES 🗺️ **\n✅ {len(tiles)} tiles (z{MIN_ZOOM}-{MAX_ZOOM}), {len(archive) / 1024:.1f} KiB saved to {output_file}")
+    for zoom, stats in tile_report(tiles).items():
+        print(f"  z{zoom}: {stats['tiles']:5} tiles, mean {stats['mean_bytes'] / 1024:5.1f} KiB, max {stats['max_bytes'] / 1024:5.1f} KiB")
+    return archive
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build a PMTiles vector tile archive from the generated map layers.")
+    parser.add_argument("--force", action="store_true", help="rebuild even if no layer changed")
+    parser.add_argument("--tile", metavar="Z/X/Y", help="print the size of one tile in the existing archive instead")
+    args = parser.parse_args()
+
+    if args.tile:
+        with open(OUTPUT_FILE, "rb") as f:
+            content = read_tile(f.read(), *(int(part) for part in args.tile.split("/")))
+        print(f"{args.tile}: " + (f"{len(content)} bytes gzipped, {len(gzip.decompress(content))} bytes MVT" if content else "no tile"))
+    else:
+        write_vector_tiles(force=args.force)
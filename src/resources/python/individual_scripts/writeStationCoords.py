@@ -1,6 +1,10 @@
 import os
 import json
 
+from incrementalBuild import hash_data, hash_file, is_up_to_date, write_outputs
+from outputFormats import coordinate_module_outputs, dumps, format_signature, geojson_outputs, print_module_savings, remove_stale_chunks
+from pipelineRunner import unchanged
+
 # Get directory where this script is located
 THIS_DIR = os.path.dirname(os.path.abspath(__file__))
 
@@ -10,60 +14,73 @@ output_geojson = os.path.join(THIS_DIR, "..", "..", "generated", "accessibleStat
 output_json = os.path.join(THIS_DIR, "..", "..", "generated", "accessibleStationGeometry.json") # compact JSON format
 output_js = os.path.join(THIS_DIR, "..", "..", "..", "utils", "accessibleStationGeometry.ts") # JavaScript file in ../../../utils
 
-# Load the GeoJSON file
-with open(input_file, "r") as f:
-    data = json.load(f)
-
-# Create filtered GeoJSON and compact JSON format
-filtered_features = []
-compact_data = {}
-
-for feature in data["features"]:
-    # Extract properties
-    station_id = feature["properties"]["station_id"]
-    ada = feature["properties"].get("ada", "0")
-    ada_northbound = feature["properties"].get("ada_northbound", "0")
-    ada_southbound = feature["properties"].get("ada_southbound", "0")
-    coordinates = feature["geometry"]["coordinates"]
-
-    # Filter by ADA accessibility (any direction or general ADA)
-    if ada != "0" or ada_northbound != "0" or ada_southbound != "0":
-        # GeoJSON format
-        new_feature = {
-            "type": "Feature",
-            "properties": {
-                "station_id": station_id
-            },
-            "geometry": feature["geometry"]
-        }
-        filtered_features.append(new_feature)
-
-        # Compact JSON format
-        compact_data[station_id] = coordinates
-
-# Write the filtered GeoJSON
-filtered_geojson = {
-    "_comment": "This file is auto-generated by updateData.py. Do not edit manually.",
-    "type": "FeatureCollection",
-    "features": filtered_features
-}
-
-# Save the GeoJSON file
-with open(output_geojson, "w") as f:
-    json.dump(filtered_geojson, f, indent=2)
-
-# Save the compact JSON file
-with open(output_json, "w") as f:
-    f.write("// 🚨 This file is auto-generated by updateData.py. Do not edit manually.\n")
-    json.dump(compact_data, f, indent=2)
-
-# Save the compact JSON as a JavaScript const
-js_content = f"/* 🚨 This file is auto-generated by updateData.py. Do not edit manually. */\nexport const stationCoordinates: Record<string, [number, number]> = {json.dumps(compact_data, indent=2)};\n\nexport default stationCoordinates;"
-
-with open(output_js, "w") as f:
-    f.write(js_content)
-
-# Print confirmation
-print(f"\n** 📍 [2b] STATION COORDINATES: 📍 **\n✅ Generated {len (filtered_features)} features and saved GEOJSON to {output_geojson}")
-print(f"JSON saved to {output_json}")
-print(f"JavaScript file saved to {output_js}")
+
+def write_station_coords(data=None, force=False):
+    # Load the GeoJSON file unless the pipeline already handed us the stations
+    if data is None:
+        with open(input_file, "r") as f:
+            data = json.load(f)
+
+    # Skip entirely when neither the stations nor this script changed since the outputs were last written
+    input_hashes = {"stations": hash_data(data), "script": hash_file(__file__), "format": format_signature()}
+    if not force and is_up_to_date("writeStationCoords", input_hashes, [output_geojson, output_json, output_js]):
+        print(f"\n** 📍 [2b] STATION COORDINATES: 📍 **\n⏭️  Stations unchanged, outputs are up to date")
+        return unchanged()
+
+    # Create filtered GeoJSON and compact JSON format
+    filtered_features = []
+    compact_data = {}
+    boroughs = {}  # ID -> borough, the chunk it goes in when the TS is packed
+
+    for feature in data["features"]:
+        # Extract properties
+        station_id = feature["properties"]["station_id"]
+        ada = feature["properties"].get("ada", "0")
+        ada_northbound = feature["properties"].get("ada_northbound", "0")
+        ada_southbound = feature["properties"].get("ada_southbound", "0")
+        coordinates = feature["geometry"]["coordinates"]
+
+        # Filter by ADA accessibility (any direction or general ADA)
+        if ada != "0" or ada_northbound != "0" or ada_southbound != "0":
+            # GeoJSON format
+            new_feature = {
+                "type": "Feature",
+                "properties": {
+                    "station_id": station_id
+                },
+                "geometry": feature["geometry"]
+            }
+            filtered_features.append(new_feature)
+
+            # Compact JSON format
+            compact_data[station_id] = coordinates
+            boroughs[station_id] = feature["properties"].get("borough")
+
+    # Write the filtered GeoJSON
+    filtered_geojson = {
+        "_comment": "This file is auto-generated by updateData.py. Do not edit manually.",
+        "type": "FeatureCollection",
+        "features": filtered_features
+    }
+
+    # Save the GeoJSON, compact JSON and JavaScript files, only touching the ones whose content changed
+    outputs = geojson_outputs(output_geojson, filtered_geojson, "station_id")
+    outputs[output_json] = "// 🚨 This file is auto-generated by updateData.py. Do not edit manually.\n" + dumps(compact_data)
+    # The TS lookup, split into per-borough chunks when the TS format is "packed"
+    js_outputs = coordinate_module_outputs(output_js, "stationCoordinates", compact_data, boroughs)
+    outputs.update(js_outputs)
+    written = write_outputs("writeStationCoords", input_hashes, outputs)
+    remove_stale_chunks(output_js, js_outputs)  # once the index no longer imports them
+
+    # Print confirmation
+    print(f"\n** 📍 [2b] STATION COORDINATES: 📍 **\n✅ Generated {len (filtered_features)} features and saved GEOJSON to {output_geojson}")
+    print(f"JSON saved to {output_json}")
+    print(f"JavaScript file saved to {output_js}")
+    print_module_savings("stationCoordinates", compact_data, js_outputs)
+    print(f"{len(written)} of {len(outputs)} files changed on disk")
+
+    return filtered_geojson
+
+
+if __name__ == "__main__":
+    write_station_coords()
@@ -0,0 +1,256 @@
+import argparse
+import contextlib
+import json
+import os
+import queue
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+THIS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(THIS_DIR, "individual_scripts"))
+
+from complexAccessibility import CUSTOM_ELEVATOR_FILE, ComplexAccessibilityView
+from complexGraph import load_graphs
+from feedArchive import ARCHIVE_DIR, FeedArchive
+from feedClient import fetch_json_cached
+from outageHistory import HISTORY_DIR, load_history
+from outageState import OutageState
+
+# === CONFIG ===
+FEED_URL = os.environ.get("MTA_OUTAGES_URL", "https://api-endpoint.mta.info/Dataservice/mtagtfsfeeds/nyct%2Fnyct_ene.json")
+POLL_INTERVAL = int(os.environ.get("OUTAGE_POLL_INTERVAL", "120"))  # seconds, same cadence the map used to poll at
+DEFAULT_PORT = int(os.environ.get("OUTAGE_POLLER_PORT", "8787"))
+KEEPALIVE_SECONDS = 15  # SSE comment sent on idle connections so proxies don't close them
+ALLOW_ORIGIN = os.environ.get("OUTAGE_POLLER_ALLOW_ORIGIN", "*")
+ARCHIVE_FEED = "outagesFeed"  # name of the outage feed's snapshots in the feed archive
+
+
+class Broadcaster:
+    """Fans each delta out to every connected client's queue."""
+
+    def __init__(self):
+        self.clients = set()
+        self.lock = threading.Lock()
+
+    def subscribe(self):
+        client = queue.Queue()
+        with self.lock:
+            self.clients.add(client)
+        return client
+
+    def unsubscribe(self, client):
+        with self.lock:
+            self.clients.discard(client)
+
+    def publish(self, event):
+        with self.lock:
+            clients = list(self.clients)
+        for client in clients:
+            client.put(event)
+
+    def __len__(self):
+        return len(self.clients)
+
+
+def poll_once(state, broadcaster, url=FEED_URL, headers=None, view=None, archive=None):
+    """
+    Fetch the feed once and publish the delta, if any. With a complex
+    accessibility `view`, the delta also carries the new status of every
+    complex the changed elevators belong to. A feedArchive.FeedArchive passed
+    as `archive` keeps every changed payload. Returns the delta or None.
+    """
+    data, changed = fetch_json_cached(url, headers=headers)
+    # After a restart the first poll is usually a 304 answered from the on-disk cache; that payload still has to be applied
+    if not changed and state.loaded:
+        return None
+    if changed and archive is not None:
+        archive.add(ARCHIVE_FEED, data)
+    return apply_feed(state, broadcaster, data, view)
+
+
+def apply_feed(state, broadcaster, data, view=None):
+    """Apply one outage feed payload to the state and view and publish the delta; the part of a poll after the download."""
+    # The state and the view move together, so a snapshot never pairs one version's outages with another's statuses
+    with view.lock if view is not None else contextlib.nullcontext():
+        delta = state.update(data)
+        if delta and view is not None:
+            changed_complexes = view.apply(delta["broken"], delta["restored"])
+            delta["complexes"] = {complex_id: entry["status"] for complex_id, entry in changed_complexes.items()}
+    if delta:
+        broadcaster.publish(delta)
+    return delta
+
+
+def load_view():
+    with open(CUSTOM_ELEVATOR_FILE, "r", encoding="utf-8") as f:
+        return ComplexAccessibilityView(json.load(f))
+
+
+def current_snapshot(state, view=None):
+    if view is None:
+        return state.snapshot()
+    with view.lock:
+        return {**state.snapshot(), "complexes": view.statuses()}
+
+
+def record_history(state, history):
+    """Add the current outages to the reliability history; unchanged polls still count as observed time."""
+    if not state.loaded:
+        return  # no feed applied yet (e.g. just after a restart), so an empty state doesn't mean every elevator works
+    with history.lock:
+        history.ingest(state.snapshot()["outages"])
+        history.flush()
+
+
+def poll_forever(state, broadcaster, url=FEED_URL, headers=None, interval=POLL_INTERVAL, view=None, history=None, archive=None):
+    while True:
+        started = time.monotonic()
+        try:
+            delta = poll_once(state, broadcaster, url, headers, view, archive)
+            if delta:
+                print(f"🔄 v{delta['version']}: {len(delta['broken'])} broken, {len(delta['restored'])} restored "
+                      f"→ {len(broadcaster)} clients")
+            if history is not None:
+                record_history(state, history)
+        except Exception as e:
+            # Keep serving the last known state; the next poll may succeed
+            print(f"⚠️ Outage poll failed: {e}")
+        time.sleep(max(0.0, interval - (time.monotonic() - started)))
+
+
+def sse_message(event, data, event_id=None):
+    lines = [f"id: {event_id}"] if event_id is not None else []
+    lines += [f"event: {event}", f"data: {json.dumps(data, separators=(',', ':'))}", "", ""]
+    return "\n".join(lines).encode("utf-8")
+
+
+def make_handler(state, broadcaster, view=None, graphs=None, history=None):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def _send_json(self, payload, status=200):
+            body = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.send_header("Access-Control-Allow-Origin", ALLOW_ORIGIN)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            path = self.path.split("?", 1)[0]
+            if path == "/outages":
+                self._send_json(current_snapshot(state, view))
+            elif path == "/accessibility" and view is not None:
+                with view.lock:
+                    payload = {"version": state.version, **view.to_json()}
+                self._send_json(payload)
+            elif path == "/reachability" and graphs is not None:
+                # Graphs are built once at startup and results are cached per outage snapshot
+                snapshot = state.snapshot()
+                self._send_json({
+                    "version": snapshot["version"],
+                    "cut_off": graphs.unreachable(snapshot["outages"]),
+                    "complexes": graphs.reachability(snapshot["outages"]),
+                })
+            elif path == "/reliability" and history is not None:
+                # ?days=30 for a rolling window (default: all time), ?elevator=EL123 (repeatable) to narrow it down
+                query = parse_qs(self.path.split("?", 1)[1] if "?" in self.path else "")
+                days = int(query["days"][0]) if query.get("days", [""])[0].isdigit() else None
+                with history.lock:
+                    payload = {"days": days, "elevators": history.reliability(days, elevators=query.get("elevator"))}
+                self._send_json(payload)
+            elif path == "/health":
+                self._send_json({"version": state.version, "clients": len(broadcaster)})
+            elif path == "/events":
+                self._stream_events()
+            else:
+                self._send_json({"error": "not found"}, 404)
+
+        def _stream_events(self):
+            # Subscribe before reading the state so no delta can slip between the catch-up and the live stream
+            client = broadcaster.subscribe()
+            try:
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Cache-Control", "no-cache")
+                self.send_header("Connection", "keep-alive")
+                self.send_header("Access-Control-Allow-Origin", ALLOW_ORIGIN)
+                self.end_headers()
+
+                # Reconnecting clients send the last version they saw; replay from there if we still can
+                last_id = self.headers.get("Last-Event-ID")
+                missed = state.deltas_since(int(last_id)) if last_id and last_id.isdigit() else None
+                if missed is None:
+                    snapshot = current_snapshot(state, view)
+                    sent_version = snapshot["version"]
+                    self.wfile.write(sse_message("snapshot", snapshot, sent_version))
+                else:
+                    sent_version = int(last_id)
+                    for delta in missed:
+                        self.wfile.write(sse_message("delta", delta, delta["version"]))
+                        sent_version = delta["version"]
+                self.wfile.flush()
+
+                while True:
+                    try:
+                        delta = client.get(timeout=KEEPALIVE_SECONDS)
+                    except queue.Empty:
+                        self.wfile.write(b": keepalive\n\n")
+                        self.wfile.flush()
+                        continue
+                    if delta["version"] <= sent_version:
+                        continue  # already covered by the snapshot or catch-up
+                    self.wfile.write(sse_message("delta", delta, delta["version"]))
+                    self.wfile.flush()
+                    sent_version = delta["version"]
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+            finally:
+                broadcaster.unsubscribe(client)
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+def start(port=DEFAULT_PORT, url=FEED_URL, headers=None, interval=POLL_INTERVAL, view=None, graphs=None, history=None, archive=None):
+    """Start polling and serving in background threads; returns (server, state, broadcaster)."""
+    state = OutageState()
+    broadcaster = Broadcaster()
+    server = ThreadingHTTPServer(("0.0.0.0", port), make_handler(state, broadcaster, view, graphs, history))
+    server.daemon_threads = True
+    threading.Thread(target=poll_forever, args=(state, broadcaster, url, headers, interval, view, history, archive), daemon=True).start()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, state, broadcaster
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Poll the MTA outage feed once for everyone and push elevator changes over SSE.")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--feed-url", default=FEED_URL,
+                        help="outage feed to poll, e.g. the mock feed at http://127.0.0.1:8766/nyct_ene.json")
+    parser.add_argument("--interval", type=float, default=POLL_INTERVAL, help="seconds between polls")
+    parser.add_argument("--history", nargs="?", const=HISTORY_DIR, metavar="DIR",
+                        help="record every poll in an outage history and serve /reliability from it")
+    parser.add_argument("--archive", nargs="?", const=ARCHIVE_DIR, metavar="DIR",
+                        help="keep every changed outage feed in the compressed feed archive in DIR")
+    args = parser.parse_args()
+
+    api_key = os.environ.get("MTA_API_KEY")
+    history = load_history(args.history) if args.history else None
+    server, state, broadcaster = start(args.port, args.feed_url, {"x-api-key": api_key} if api_key else None,
+                                       args.interval, load_view(), load_graphs(), history,
+                                       FeedArchive(args.archive) if args.archive else None)
+    print(f"\n** 📡 OUTAGE POLLER 📡 **\nPolling {args.feed_url} every {args.interval:g}s")
+    print(f"Serving http://localhost:{args.port}/events (SSE), /outages (snapshot), /accessibility (per complex), /reachability (per platform), /health"
+          + (", /reliability (per elevator)" if history else ""))
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -0,0 +1,301 @@
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+THIS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(THIS_DIR, "individual_scripts"))
+
+from feedArchive import ARCHIVE_DIR, FeedArchive, canonical_bytes, parse_when
+from outageHistory import OutageHistory
+from outageState import OutageState
+from pipelineBenchmark import make_workspace
+from pipelineRunner import SOURCE_FILES, load_json
+import outagePoller
+
+# === CONFIG ===
+DEFAULT_SPEED = 60.0  # × real time; 0 replays as fast as possible
+FILE_INTERVAL = 120  # seconds between snapshots replayed from plain files, the live poll interval
+PIPELINE_FEEDS = {"stationsFeed": "MTA_STATIONS_URL", "complexesFeed": "MTA_COMPLEXES_URL", "equipmentFeed": "MTA_EQUIPMENT_URL"}
+PIPELINE_SOURCES = ["stations", "complexes", "elevators"]  # files the workspace starts from, as a previous run left them
+
+
+# === PACING AND REPORTING ===
+
+def paced(snapshots, speed):
+    """
+    Yield (snapshot, lag) with each snapshot released at its recorded time
+    divided by `speed`, counted from the first one. Lag is how late it was
+    released because processing the ones before it overran the schedule.
+    """
+    started = first = None
+    for snapshot in snapshots:
+        at = snapshot[0]
+        if started is None:
+            started, first = time.perf_counter(), at
+        due = started + (at - first) / speed if speed else time.perf_counter()
+        wait = due - time.perf_counter()
+        if wait > 0:
+            time.sleep(wait)
+        yield snapshot, max(0.0, -wait)
+
+
+def percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(q / 100 * (len(ordered) - 1))))] if ordered else None
+
+
+def summarize(latencies, lags, wall_seconds, span_seconds):
+    return {
+        "snapshots": len(latencies),
+        "wall_seconds": wall_seconds,
+        "replayed_seconds": span_seconds,
+        "throughput_per_second": len(latencies) / wall_seconds if wall_seconds else None,
+        "latency_ms": {
+            "mean": 1000 * sum(latencies) / len(latencies) if latencies else None,
+            **{f"p{q}": 1000 * percentile(latencies, q) if latencies else None for q in (50, 95, 99)},
+            "max": 1000 * max(latencies) if latencies else None,
+        },
+        "max_lag_ms": 1000 * max(lags) if lags else None,
+        "min_poll_interval_seconds": max(latencies) if latencies else None,
+    }
+
+
+def print_summary(name, summary):
+    latency = summary["latency_ms"]
+    print(f"\n** ⏩ REPLAY: {name} ⏩ **")
+    if not summary["snapshots"]:
+        print("No snapshots to replay")
+        return
+    print(f"{summary['snapshots']} snapshots covering {summary['replayed_seconds'] / 3600:.1f} h "
+          f"replayed in {summary['wall_seconds']:.1f} s ({summary['throughput_per_second']:.1f} snapshots/s)")
+    print(f"  latency ms   mean {latency['mean']:.2f}  p50 {latency['p50']:.2f}  p95 {latency['p95']:.2f}  "
+          f"p99 {latency['p99']:.2f}  max {latency['max']:.2f}")
+    print(f"  max lag behind schedule: {summary['max_lag_ms']:.1f} ms")
+    print(f"  worst case fits a poll every {summary['min_poll_interval_seconds']:.3f} s")
+    for stage_name, seconds in summary.get("stages", {}).items():
+        print(f"    {stage_name:<32} {1000 * seconds:9.2f} ms/snapshot")
+
+
+# === SNAPSHOT SOURCES ===
+
+def archived_snapshots(archive, feed, start=None, end=None):
+    """(time, payload) for every archived change of `feed`."""
+    for at, _, data in archive.snapshots(feed, start, end):
+        yield at, data
+
+
+def file_snapshots(paths, interval=FILE_INTERVAL):
+    """(time, payload) for saved feed files, in the order given, `interval` seconds apart."""
+    for i, path in enumerate(paths):
+        yield i * interval, load_json(path)
+
+
+# === OUTAGE PROCESSING ===
+
+def replay_outages(snapshots, speed=DEFAULT_SPEED, history_dir=None, clients=0, limit=None):
+    """
+    Feed outage snapshots through the poller's processing path (state, delta,
+    complex accessibility, broadcast to `clients` subscribers and, with a
+    `history_dir`, the reliability history) and time each one.
+    """
+    state = OutageState()
+    broadcaster = outagePoller.Broadcaster()
+    subscribers = [broadcaster.subscribe() for _ in range(clients)]
+    view = outagePoller.load_view()
+    history = OutageHistory(history_dir) if history_dir else None
+
+    latencies, lags = [], []
+    first = last = None
+    wall_start = time.perf_counter()
+    for (at, data), lag in paced(snapshots, speed):
+        started = time.perf_counter()
+        outagePoller.apply_feed(state, broadcaster, data, view)
+        if history is not None:
+            history.ingest(state.snapshot()["outages"], at)
+            history.flush()
+        for subscriber in subscribers:
+            while not subscriber.empty():
+                subscriber.get_nowait()
+        latencies.append(time.perf_counter() - started)
+        lags.append(lag)
+        first = at if first is None else first
+        last = at
+        if limit is not None and len(latencies) >= limit:
+            break
+    return summarize(latencies, lags, time.perf_counter() - wall_start, (last - first) if latencies else 0.0)
+
+
+# === PIPELINE ===
+
+class StubFeedServer:
+    """
+    Serves each pipeline feed as it was at the replay's current time, with
+    ETags so unchanged feeds get a 304 like the real API (and their stages skip).
+    """
+
+    def __init__(self, archive):
+        self.archive = archive
+        self.at = None
+        self.bodies = {}  # feed -> (hash, bytes) of the payload last served
+        self.lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                feed = self.path.split("?", 1)[0].strip("/").rsplit(".", 1)[0]
+                body = stub.body(feed)
+                if body is None:
+                    self.send_error(404)
+                    return
+                etag = f'"{body[0][:32]}"'
+                if self.headers.get("If-None-Match") == etag:
+                    self.send_response(304)
+                    self.send_header("ETag", etag)
+                    self.end_headers()
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body[1])))
+                self.send_header("ETag", etag)
+                self.end_headers()
+                self.wfile.write(body[1])
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def body(self, feed):
+        """(hash, bytes) of the feed at the current time; the server's threads share one archive, hence the lock."""
+        with self.lock:
+            located = self.archive.locate(feed, self.at)
+            if located is None:
+                return None
+            if feed not in self.bodies or self.bodies[feed][0] != located[1]:
+                self.bodies[feed] = (located[1], canonical_bytes(self.archive.load(located[1])))
+            return self.bodies[feed]
+
+    def url(self, feed):
+        return f"http://127.0.0.1:{self.server.server_address[1]}/{feed}.json"
+
+
+def pipeline_times(archive, start=None, end=None):
+    """Every time one of the pipeline feeds changed, from the first time all of them have a snapshot."""
+    indexes = [archive.index(feed) for feed in PIPELINE_FEEDS]
+    if not all(times for times, _ in indexes):
+        return []
+    first = max(times[0] for times, _ in indexes)
+    start = first if start is None else max(start, first)
+    return sorted({at for times, _ in indexes for at in times if at >= start and (end is None or at < end)})
+
+
+def run_worker(result_path, archive_dir, speed, start, end, limit, stream_equipment):
+    """Runs inside the workspace copy: replay every feed change through the whole pipeline, in this one process."""
+    import updateData
+    from pipelineRunner import run_pipeline
+
+    archive = FeedArchive(archive_dir)
+    stub = StubFeedServer(archive)
+    for feed, variable in PIPELINE_FEEDS.items():
+        os.environ[variable] = stub.url(feed)
+
+    times = pipeline_times(archive, start, end)[:limit]
+    latencies, lags, stage_seconds = [], [], {}
+    wall_start = time.perf_counter()
+    for (at,), lag in paced(((at,) for at in times), speed):
+        stub.at = at
+        started = time.perf_counter()
+        _, timings = run_pipeline(updateData.build_stages(stream_equipment=stream_equipment))
+        latencies.append(time.perf_counter() - started)
+        lags.append(lag)
+        for t in timings:
+            stage_seconds[t["stage"]] = stage_seconds.get(t["stage"], 0.0) + t["seconds"]
+
+    summary = summarize(latencies, lags, time.perf_counter() - wall_start, (times[-1] - times[0]) if times else 0.0)
+    summary["stages"] = {name: seconds / len(latencies) for name, seconds in stage_seconds.items()} if latencies else {}
+    with open(result_path, "w", encoding="utf-8") as f:
+        json.dump(summary, f)
+
+
+def replay_pipeline(archive_dir=ARCHIVE_DIR, speed=DEFAULT_SPEED, start=None, end=None, limit=None, stream_equipment=False):
+    """
+    Replay the archived stations, complexes and equipment feeds through
+    updateData.py in a throwaway copy of src/ that starts from the repo's
+    current datasets, so the real outputs are never touched. Returns the summary.
+    """
+    datasets = {"disk": {key: load_json(SOURCE_FILES[key]) for key in PIPELINE_SOURCES if os.path.exists(SOURCE_FILES[key])},
+                "feeds": {}}
+    with tempfile.TemporaryDirectory(prefix="feed-replay-") as root:
+        python_dir, _ = make_workspace(root, datasets)
+        shutil.copy(os.path.join(THIS_DIR, "replayFeeds.py"), python_dir)
+        shutil.copy(os.path.join(THIS_DIR, "outagePoller.py"), python_dir)
+        env = {**os.environ, "MTA_API_KEY": "replay"}  # the stub server doesn't check it
+        for k in ("FEED_CACHE_DIR", "BUILD_MANIFEST_FILE"):
+            env.pop(k, None)  # keep the workspace's own cache and manifest
+
+        result_path = os.path.join(root, "replay.json")
+        command = [sys.executable, os.path.join(python_dir, "replayFeeds.py"), "--worker", result_path,
+                   "pipeline", "--archive", os.path.abspath(archive_dir), "--speed", str(speed)]
+        for flag, value in (("--from", start), ("--to", end), ("--limit", limit)):
+            if value is not None:
+                command += [flag, str(value)]
+        if stream_equipment:
+            command.append("--stream-equipment")
+        with open(os.path.join(root, "replay.log"), "w") as log:
+            completed = subprocess.run(command, env=env, stdout=log, stderr=subprocess.STDOUT)
+        if completed.returncode != 0:
+            with open(os.path.join(root, "replay.log")) as log:
+                raise RuntimeError(f"Pipeline replay failed:\n{log.read()[-2000:]}")
+        with open(result_path) as f:
+            return json.load(f)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay recorded feed snapshots through the pipeline or the outage poller at N× real time.")
+    parser.add_argument("--worker", metavar="RESULT", help=argparse.SUPPRESS)
+    parser.add_argument("--output", metavar="PATH", help="also write the summary as JSON to this file")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    outages = commands.add_parser("outages", help="replay outage feed snapshots through the poller's processing path")
+    outages.add_argument("files", nargs="*", help=f"saved nyct_ene.json files to replay in order, {FILE_INTERVAL}s apart "
+                                                   "(default: the archived outage feed)")
+    outages.add_argument("--history", action="store_true", help="also record every snapshot in a throwaway reliability history")
+    outages.add_argument("--clients", type=int, default=0, help="SSE subscribers each delta is broadcast to")
+
+    pipeline = commands.add_parser("pipeline", help="replay archived stations/complexes/equipment feeds through updateData.py")
+    pipeline.add_argument("--stream-equipment", action="store_true", help="replay with the streaming equipment parser")
+
+    for command in (outages, pipeline):
+        command.add_argument("--archive", default=ARCHIVE_DIR, help="feed archive directory (default: %(default)s)")
+        command.add_argument("--speed", type=float, default=DEFAULT_SPEED,
+                             help="replay speed as a multiple of real time; 0 for as fast as possible (default: %(default)g)")
+        command.add_argument("--from", dest="start", type=parse_when, help="first snapshot time (unix time or 'YYYY-MM-DD HH:MM')")
+        command.add_argument("--to", dest="end", type=parse_when, help="replay up to this time")
+        command.add_argument("--limit", type=int, help="replay at most this many snapshots")
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(args.worker, args.archive, args.speed, args.start, args.end, args.limit, args.stream_equipment)
+        sys.exit(0)
+
+    if args.command == "outages":
+        snapshots = file_snapshots(args.files) if args.files else \
+            archived_snapshots(FeedArchive(args.archive), outagePoller.ARCHIVE_FEED, args.start, args.end)
+        with tempfile.TemporaryDirectory(prefix="replay-history-") as history_dir:
+            summary = replay_outages(snapshots, args.speed, history_dir if args.history else None, args.clients, args.limit)
+    else:
+        summary = replay_pipeline(args.archive, args.speed, args.start, args.end, args.limit, args.stream_equipment)
+
+    print_summary(args.command, summary)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2)
+        print(f"Results saved to {args.output}")
@@ -0,0 +1,80 @@
+import hashlib
+import json
+import os
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+# The pipeline scripts import each other by module name, as when they are run from their own directories
+PYTHON_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PYTHON_DIR)
+sys.path.insert(0, os.path.join(PYTHON_DIR, "individual_scripts"))
+
+
+class FeedServer:
+    """
+    Local stand-in for the MTA / data.ny.gov endpoints: serves the JSON set for
+    each path with a strong ETag and answers a matching If-None-Match with a 304.
+    `requests` records (path, status) for every request served.
+    """
+
+    def __init__(self, etags=True):
+        self.etags = etags
+        self.payloads = {}
+        self.requests = []
+        self._lock = threading.Lock()
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                with server._lock:
+                    body = server.payloads.get(self.path)
+                if body is None:
+                    server.requests.append((self.path, 404))
+                    self.send_error(404)
+                    return
+                etag = f'"{hashlib.sha256(body).hexdigest()[:16]}"'
+                if server.etags and self.headers.get("If-None-Match") == etag:
+                    server.requests.append((self.path, 304))
+                    self.send_response(304)
+                    self.send_header("ETag", etag)
+                    self.end_headers()
+                    return
+                server.requests.append((self.path, 200))
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                if server.etags:
+                    self.send_header("ETag", etag)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.thread = threading.Thread(target=self.httpd.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True)
+        self.thread.start()
+
+    def set(self, path, data):
+        with self._lock:
+            self.payloads[path] = json.dumps(data).encode("utf-8")
+
+    def url(self, path):
+        return f"http://127.0.0.1:{self.httpd.server_address[1]}{path}"
+
+    def statuses(self, path):
+        return [status for served, status in self.requests if served == path]
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+@pytest.fixture
+def feed_server():
+    server = FeedServer()
+    yield server
+    server.close()
@@ -0,0 +1,124 @@
+import importlib
+import multiprocessing
+import os
+
+import pytest
+
+import agencyAdapters
+import feedClient
+import pipelineRunner
+import updateData
+import vectorTiles
+from agencyAdapters import AgencyAdapter, current_adapter, partition_path, use_agency
+from pipelineRunner import SOURCE_FILES, load_json
+
+SRC_DIR = os.path.normpath(os.path.join(os.path.dirname(pipelineRunner.__file__), "..", "..", ".."))
+COMPLEXES = {"test_a": {"611", "610"}, "test_b": {"628", "617"}}
+REPO_SOURCES = dict(SOURCE_FILES)  # the NYC datasets the fixture agencies' feeds are cut from
+
+
+def fixture_adapter(name, server):
+    """An agency serving part of the NYC datasets from the local feed server, under its own feed paths."""
+    templates = {key: load_json(REPO_SOURCES[key]) for key in ("stations", "complexes", "equipment")}
+    complexes = COMPLEXES[name]
+    server.set(f"/{name}/stations.geojson", {"type": "FeatureCollection", "features": [
+        f for f in templates["stations"]["features"] if f["properties"]["complex_id"] in complexes]})
+    server.set(f"/{name}/complexes.json", [
+        {**{key: f["properties"][key] for key in ("complex_id", "stop_name", "ada", "borough")},
+         "station_ids": f["properties"]["station_ids"].replace("/", "; "),
+         "gtfs_stop_ids": f["properties"]["gtfs_stop_ids"].replace("/", "; "),
+         "number_of_stations_in_complex": f["properties"]["num_stations_in_complex"],
+         "longitude": str(f["geometry"]["coordinates"][0]), "latitude": str(f["geometry"]["coordinates"][1])}
+        for f in templates["complexes"]["features"] if f["properties"]["complex_id"] in complexes])
+    server.set(f"/{name}/equipment.json", [r for r in templates["equipment"] if r.get("stationcomplexid") in complexes])
+
+    class FixtureAdapter(AgencyAdapter):
+        agency = name
+        system = name
+        systems = (name,)
+
+        def feeds(self):
+            return {feed: {"url": server.url(f"/{name}/{path}")} for feed, path in
+                    (("stationsFeed", "stations.geojson"), ("complexesFeed", "complexes.json"), ("equipmentFeed", "equipment.json"))}
+
+    return FixtureAdapter
+
+
+def module_paths():
+    paths = {}
+    for module_name, attributes in agencyAdapters.PARTITIONED_PATHS.items():
+        module = importlib.import_module(module_name)
+        for attribute in attributes:
+            value = getattr(module, attribute)
+            paths[module_name, attribute] = dict(value) if isinstance(value, dict) else value
+    return paths
+
+
+@pytest.fixture
+def agencies(feed_server, tmp_path, monkeypatch):
+    """The two fixture agencies, with every pipeline path moved from src/ into tmp_path."""
+    for module_name, attributes in agencyAdapters.PARTITIONED_PATHS.items():
+        module = importlib.import_module(module_name)
+        for attribute in attributes:
+            value = getattr(module, attribute)
+            moved = lambda path: str(tmp_path / os.path.relpath(os.path.normpath(path), SRC_DIR))
+            if isinstance(value, dict):
+                for key, path in value.items():
+                    monkeypatch.setitem(value, key, moved(path))
+            else:
+                monkeypatch.setattr(module, attribute, moved(value))
+    monkeypatch.setattr(feedClient, "CACHE_DIR", str(tmp_path / "cache" / "feeds"))
+    monkeypatch.setattr(updateData, "LOG_DIR", str(tmp_path / "cache" / "logs"))
+    for name in COMPLEXES:
+        monkeypatch.setitem(agencyAdapters.ADAPTERS, name, fixture_adapter(name, feed_server))
+    return tmp_path
+
+
+def test_use_agency_partitions_the_paths_and_restores_them(agencies):
+    before = module_paths()
+    optional = set(pipelineRunner.OPTIONAL_SOURCES)
+
+    with use_agency("test_a") as adapter:
+        assert current_adapter() is adapter and adapter.agency == "test_a"
+        assert pipelineRunner.SOURCE_FILES["stations"] == partition_path(before["pipelineRunner", "SOURCE_FILES"]["stations"], "test_a")
+        assert os.path.join("agencies", "test_a") in vectorTiles.OUTPUT_FILE
+        assert "elevators" in pipelineRunner.OPTIONAL_SOURCES
+        with pytest.raises(RuntimeError):
+            with use_agency("test_b"):
+                pass
+
+    assert module_paths() == before
+    assert pipelineRunner.OPTIONAL_SOURCES == optional
+    assert current_adapter().agency == agencyAdapters.PRIMARY_AGENCY
+
+    with pytest.raises(ValueError):
+        with use_agency("test_b"):
+            raise ValueError("stage failed")
+    assert module_paths() == before
+
+
+@pytest.mark.skipif(multiprocessing.get_start_method() != "fork",
+                    reason="the fixture adapters reach the workers through fork")
+def test_agencies_run_in_parallel_into_their_own_partitions(agencies):
+    before = module_paths()
+    options = {
+        "stages": {"force": False, "stream_equipment": False, "store_path": None, "sync_db": False,
+                   "archive_dir": None, "archive_keep_days": None},
+        "formats": (None, None, None, None),
+        "metrics": None, "prometheus": None, "profile": None, "size_report": False,
+    }
+
+    assert updateData.run_agencies(["test_a", "test_b"], options) == []
+
+    assert module_paths() == before
+    assert not os.path.exists(SOURCE_FILES["stations"])  # the primary agency's files are untouched
+    for name, complexes in COMPLEXES.items():
+        partition = lambda path: partition_path(path, name)
+        stations = load_json(partition(SOURCE_FILES["stations"]))
+        assert {f["properties"]["complex_id"] for f in stations["features"]} == complexes
+        elevators = load_json(partition(SOURCE_FILES["elevators"]))
+        assert elevators["features"] and {f["properties"]["complexID"] for f in elevators["features"]} <= complexes
+        assert {f["properties"]["system"] for f in elevators["features"]} == {name}
+        assert os.path.getsize(partition(vectorTiles.OUTPUT_FILE)) > 0
+        with open(partition(os.path.join(updateData.LOG_DIR, "updateData.log")), encoding="utf-8") as f:
+            assert "STATIONS DATASET" in f.read()
@@ -0,0 +1,41 @@
+import json
+import os
+import subprocess
+import sys
+
+import alertsSnapshot
+from alertsSnapshot import build_snapshot, write_alerts_snapshot
+
+SCRIPT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "individual_scripts", "alertsSnapshot.py")
+
+
+def station_row(complex_ids, alert="Use the elevator at 5 Av"):
+    return {"complex_ids": complex_ids, "stop_names": "Some St", "alert": alert, "active": True}
+
+
+def test_by_complex_indexes_each_complex_once():
+    snapshot = build_snapshot([], [station_row("1, 2"), station_row("2,2"), station_row("")])
+    assert snapshot["byComplex"] == {"1": [0], "2": [0, 1]}
+    assert len(snapshot["station"]["features"]) == 3
+
+
+def test_version_only_moves_when_the_alerts_change(tmp_path, monkeypatch):
+    output_file = str(tmp_path / "alertsSnapshot.json")
+    rows = {"station": [station_row("1")]}
+    monkeypatch.setattr(alertsSnapshot, "rows_from_files", lambda: ([], rows["station"]))
+
+    assert write_alerts_snapshot(output_file=output_file)["version"] == 1
+    write_alerts_snapshot(output_file=output_file)
+    assert write_alerts_snapshot(output_file=output_file, force=True)["version"] == 1
+
+    rows["station"] = [station_row("1", alert="Elevator back in service")]
+    write_alerts_snapshot(output_file=output_file)
+    with open(output_file, encoding="utf-8") as f:
+        assert json.load(f)["version"] == 2
+
+
+def test_from_db_without_a_database_is_an_error(tmp_path):
+    env = {key: value for key, value in os.environ.items() if key != "SUPABASE_DB_URL"}
+    result = subprocess.run([sys.executable, SCRIPT, "--from-db"], env=env, cwd=tmp_path, capture_output=True, text=True)
+    assert result.returncode == 2
+    assert "--from-db needs --dsn or $SUPABASE_DB_URL" in result.stderr
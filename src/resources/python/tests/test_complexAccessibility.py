@@ -0,0 +1,91 @@
+import copy
+import itertools
+import random
+
+from complexAccessibility import ACCESSIBLE, DEGRADED, INACCESSIBLE, ComplexAccessibilityView, complex_status
+
+
+def elevator(elevatorno, complex_id, street=False, redundant="0", direction="", route=""):
+    return {"type": "Feature", "geometry": {"type": "Point", "coordinates": [-73.98, 40.75]}, "properties": {
+        "elevatorno": elevatorno, "complexID": complex_id, "isStreet": "true" if street else "", "isRedundant": redundant,
+        "directionLabel": direction, "linesServed": "1", "alternativeRoute": route}}
+
+
+# 611: two redundant street elevators, one platform elevator per direction; 610: one of each; 612: platform only
+ELEVATORS = {"type": "FeatureCollection", "features": [
+    elevator("EL101", "611", street=True, redundant="1", route="Use EL102"),
+    elevator("EL102", "611", street=True, redundant="1", route="Use EL101"),
+    elevator("EL103", "611", direction="uptown", route="Take the 1 to 72 St"),
+    elevator("EL104", "611", direction="downtown"),
+    elevator("EL201", "610", street=True),
+    elevator("EL202", "610", direction="both"),
+    elevator("EL301", "612", direction="uptown"),
+    elevator("EL999", "", street=True),  # no complex: left out of the view
+]}
+ALL = [f["properties"]["elevatorno"] for f in ELEVATORS["features"]]
+
+
+def view():
+    return ComplexAccessibilityView(copy.deepcopy(ELEVATORS))
+
+
+def test_complex_status():
+    working = lambda redundant="0": {"isBroken": False, "isRedundant": redundant}
+    broken = lambda redundant="0": {"isBroken": True, "isRedundant": redundant}
+    assert complex_status({"street": [working(), working()], "platform": [working()]}) == ACCESSIBLE
+    assert complex_status({"street": [broken("1"), working("1")], "platform": [working()]}) == ACCESSIBLE
+    assert complex_status({"street": [broken(), working()], "platform": [working()]}) == DEGRADED
+    assert complex_status({"street": [broken("1"), broken("1")], "platform": [working()]}) == INACCESSIBLE
+    assert complex_status({"street": [working()], "platform": [broken()]}) == INACCESSIBLE
+    assert complex_status({"street": [], "platform": [working(), broken()]}) == DEGRADED
+
+
+def test_view_groups_elevators_by_complex():
+    v = view()
+    assert sorted(v.complexes) == ["610", "611", "612"]
+    assert [e["elevatorno"] for e in v.complexes["611"]["street"]] == ["EL101", "EL102"]
+    assert [(e["elevatorno"], e["directionLabel"]) for e in v.complexes["611"]["platform"]] == [("EL103", "uptown"), ("EL104", "downtown")]
+    assert set(v.statuses().values()) == {ACCESSIBLE}
+
+
+def test_apply_reports_only_the_complexes_that_changed():
+    v = view()
+    changed = v.apply(broken=["EL101", "EL999", "EL404"])
+    assert list(changed) == ["611"] and changed["611"]["status"] == ACCESSIBLE  # its twin still works
+    assert changed["611"]["alternativeRoutes"] == {"EL101": "Use EL102"}
+
+    changed = v.apply(broken=["EL101", "EL102"])
+    assert list(changed) == ["611"] and changed["611"]["status"] == INACCESSIBLE
+    assert v.apply(broken=["EL101", "EL102"]) == {}  # already out
+
+    changed = v.apply(restored=["EL101"])
+    assert changed["611"]["status"] == ACCESSIBLE and changed["611"]["alternativeRoutes"] == {"EL102": "Use EL101"}
+    assert v.out == {"EL102"}
+
+
+def test_incremental_outages_match_a_full_recompute():
+    rng = random.Random(7)
+    v = view()
+    previous = v.statuses()
+    outage_sets = [set(rng.sample(ALL, rng.randint(0, len(ALL)))) for _ in range(200)]
+    outage_sets += [set(), set(ALL), set(), {"EL103", "EL104"}, {"EL103"}, set()]
+    for out in outage_sets:
+        changed = v.set_outages(out)
+
+        fresh = view()
+        fresh.apply(broken=sorted(out))
+        assert v.complexes == fresh.complexes
+        assert v.statuses() == {complex_id: complex_status(entry) for complex_id, entry in fresh.complexes.items()}
+        assert v.out == out - {"EL999"}
+        assert {c for c, status in v.statuses().items() if status != previous[c]} <= set(changed)
+        previous = v.statuses()
+
+
+def test_statuses_for_every_outage_combination_of_one_complex():
+    for out in itertools.chain.from_iterable(itertools.combinations(["EL101", "EL102", "EL103", "EL104"], n) for n in range(5)):
+        v = view()
+        v.set_outages(out)
+        street_cut = {"EL101", "EL102"} <= set(out)
+        platform_cut = {"EL103", "EL104"} <= set(out)
+        expected = INACCESSIBLE if street_cut or platform_cut else DEGRADED if {"EL103", "EL104"} & set(out) else ACCESSIBLE
+        assert v.statuses()["611"] == expected, out
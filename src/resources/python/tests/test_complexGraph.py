@@ -0,0 +1,85 @@
+import random
+
+from complexGraph import BOTH, MEZZANINE, STREET, ComplexGraphs, elevator_connections, parse_direction_label
+
+
+def elevator(elevatorno, complex_id, street=False, direction="", lines="1", description=""):
+    return {"type": "Feature", "geometry": {"type": "Point", "coordinates": [-73.98, 40.75]}, "properties": {
+        "elevatorno": elevatorno, "complexID": complex_id, "isStreet": "true" if street else "",
+        "directionLabel": direction, "linesServed": lines, "shortdescription": description}}
+
+
+# 611: street -> mezzanine (EL101), mezzanine -> 1 uptown (EL102), -> 1 downtown (EL103),
+#      street straight to the 1 downtown platform (EL104), mezzanine -> the shared 7 platform (EL105)
+# 612: no street elevator (ramp entrance), mezzanine -> both A/C directions on one island platform (EL201)
+ELEVATORS = {"type": "FeatureCollection", "features": [
+    elevator("EL101", "611", street=True, description="Street to mezzanine"),
+    elevator("EL102", "611", direction="uptown"),
+    elevator("EL103", "611", direction="downtown"),
+    elevator("EL104", "611", street=True, direction="downtown"),
+    elevator("EL105", "611", direction="", lines="7"),
+    elevator("EL201", "612", direction="both directions", lines="A/C"),
+]}
+ALL = [f["properties"]["elevatorno"] for f in ELEVATORS["features"]]
+
+
+def test_parse_direction_label():
+    assert parse_direction_label("uptown", "1/2/3") == ([("1", "uptown"), ("2", "uptown"), ("3", "uptown")], False)
+    assert parse_direction_label("F Coney Island-bound, A/C Queens-bound", "A/C/F") == (
+        [("F", "coney island-bound"), ("A", "queens-bound"), ("C", "queens-bound")], False)
+    assert parse_direction_label("7 Queens-bound, access to E/F/M/R", "7") == ([("7", "queens-bound")], True)
+    assert parse_direction_label("", "L") == ([], False)
+    assert parse_direction_label("Both directions", "G") == ([("G", BOTH)], False)
+
+
+def test_elevator_connections():
+    props = lambda n: ELEVATORS["features"][n]["properties"]
+    assert elevator_connections(props(0)) == [(STREET, MEZZANINE)]
+    assert elevator_connections(props(1)) == [(MEZZANINE, "1 uptown")]
+    assert elevator_connections(props(3)) == [(STREET, "1 downtown")]
+    assert elevator_connections(props(4)) == [(MEZZANINE, f"7 {BOTH}")]
+    assert elevator_connections(props(5)) == [(MEZZANINE, f"A {BOTH}"), (MEZZANINE, f"C {BOTH}")]
+
+
+def test_reachability_of_direction_specific_and_both_platforms():
+    graphs = ComplexGraphs(ELEVATORS)
+    assert graphs.reachability([]) == {
+        "611": {"1 downtown": True, "1 uptown": True, "7 both": True},
+        "612": {"A both": True, "C both": True},
+    }
+
+    # Without the street to mezzanine elevator the mezzanine is still reached through the downtown platform
+    assert set(graphs.reachability(["EL101"])["611"].values()) == {True}
+    out = ["EL101", "EL103"]  # ...unless its mezzanine elevator is out too: only the downtown platform is left
+    assert graphs.reachability(out)["611"] == {"1 downtown": True, "1 uptown": False, "7 both": False}
+    assert graphs.is_reachable("611", "1", "downtown", out)
+    assert not graphs.is_reachable("611", "1", "uptown", out)
+    assert graphs.is_reachable("611", "1", None, out)  # some 1 platform is still reachable
+    assert graphs.unreachable(out) == {"611": ["1 uptown", "7 both"]}
+
+    # A "both" platform serves either direction
+    assert graphs.is_reachable("611", "7", "Uptown")
+    assert graphs.is_reachable(612, "A", "downtown")
+    assert not graphs.is_reachable("612", "A", "downtown", ["EL201"])
+    assert graphs.unreachable(["EL201"]) == {"612": ["A both", "C both"]}
+
+
+def test_incremental_reachability_matches_a_full_search():
+    rng = random.Random(3)
+    graphs = ComplexGraphs(ELEVATORS, cache_size=4)
+    for _ in range(200):
+        out = rng.sample(ALL, rng.randint(0, len(ALL))) + ["EL999"]  # an unknown elevator changes nothing
+        full = {complex_id: graphs._reachable(complex_id, frozenset(out)) for complex_id in graphs.graphs}
+        assert graphs.reachability(out) == full
+        assert len(graphs.cache) <= 4
+
+
+def test_reachability_is_cached_per_outage_set():
+    graphs = ComplexGraphs(ELEVATORS, cache_size=2)
+    first = graphs.reachability(["EL101"])
+    assert graphs.reachability({"EL101"}) is first  # same set, any iterable
+    assert graphs.reachability(["EL102"]) is not first
+
+    graphs.reachability(["EL103"])  # evicts the least recently used set, EL101
+    assert frozenset(["EL101"]) not in graphs.cache
+    assert graphs.reachability(["EL101"]) == first
@@ -0,0 +1,115 @@
+import json
+
+import pytest
+
+import datasetDiff
+import updateMTAComplexes
+import updateMTAStations
+from datasetDiff import diff_features, has_changes, summarize, update_diff_report
+
+
+def feature(coords=(-73.98, 40.75), **properties):
+    return {"type": "Feature", "geometry": {"type": "Point", "coordinates": list(coords)}, "properties": properties}
+
+
+OLD = [
+    feature(gtfs_stop_id="101", station_id="1", stop_name="Van Cortlandt Park-242 St"),
+    feature(gtfs_stop_id="102", station_id="2", stop_name="238 St"),
+    feature(gtfs_stop_id="103", station_id="3", stop_name="231 St"),
+    feature(gtfs_stop_id="104", station_id="4", stop_name="Marble Hill-225 St"),
+]
+NEW = [
+    feature(gtfs_stop_id="101", station_id="1", stop_name="Van Cortlandt Park-242 St"),  # unchanged
+    feature(gtfs_stop_id="102", station_id="2", stop_name="238 Street"),  # renamed
+    feature((-73.9, 40.8), gtfs_stop_id="103", station_id="3", stop_name="231 St"),  # moved
+    feature(gtfs_stop_id="106", station_id="6", stop_name="Dyckman St"),  # new; 104 is gone
+]
+
+
+def test_diff_classifies_added_removed_modified_and_unchanged():
+    diff = diff_features(OLD, NEW, "gtfs_stop_id")
+
+    assert [f["properties"]["gtfs_stop_id"] for f in diff["added"]] == ["106"]
+    assert [f["properties"]["gtfs_stop_id"] for f in diff["removed"]] == ["104"]
+    assert [m["new"]["properties"]["gtfs_stop_id"] for m in diff["modified"]] == ["102", "103"]
+    assert diff["modified"][0]["changes"] == {"stop_name": {"OLD": "238 St", "→ NEW": "238 Street"}}
+    assert diff["modified"][1]["changes"] == {"coordinates": {"OLD": [-73.98, 40.75], "→ NEW": [-73.9, 40.8]}}
+    assert has_changes(diff)
+    assert not has_changes(diff_features(OLD, iter(OLD), "gtfs_stop_id"))
+
+
+def test_diff_limited_to_fields_and_without_geometry():
+    diff = diff_features(OLD, NEW, "gtfs_stop_id", fields=["station_id"], geometry=False)
+    assert diff["modified"] == []
+
+    new = [feature(gtfs_stop_id="101", station_id="1", stop_name="242 St", ada="1")]
+    changes = diff_features(OLD[:1], new, "gtfs_stop_id")["modified"][0]["changes"]
+    assert changes == {"stop_name": {"OLD": "Van Cortlandt Park-242 St", "→ NEW": "242 St"}, "ada": {"OLD": None, "→ NEW": "1"}}
+
+
+def test_summary_lists_names_and_keys():
+    diff = diff_features(OLD, NEW, "gtfs_stop_id")
+    name = lambda feat: feat["properties"]["stop_name"]
+
+    assert summarize(diff, name) == {"added": ["Dyckman St"], "removed": ["Marble Hill-225 St"], "modified": ["238 Street", "231 St"]}
+    assert summarize(diff, name, lambda feat: feat["properties"]["station_id"])["keys"] == {
+        "added": ["6"], "removed": ["4"], "modified": ["2", "3"]}
+
+
+def test_update_diff_report_replaces_one_section(tmp_path):
+    path = str(tmp_path / "generated" / "diff_report.json")
+    update_diff_report("stations", {"added": ["Dyckman St"], "removed": [], "modified": []}, path)
+    update_diff_report("complexes", {"added": [], "removed": [], "modified": []}, path)
+    update_diff_report("stations", {"added": [], "removed": ["238 St"], "modified": []}, path)
+
+    with open(path) as f:
+        assert json.load(f) == {"stations": {"added": [], "removed": ["238 St"], "modified": []},
+                                "complexes": {"added": [], "removed": [], "modified": []}}
+
+
+@pytest.fixture
+def report(tmp_path, monkeypatch):
+    monkeypatch.setattr(datasetDiff, "DIFF_REPORT_FILE", str(tmp_path / "diff_report.json"))
+    monkeypatch.setattr(updateMTAStations, "STATIONS_FILE", str(tmp_path / "mta_subway_stations_all.json"))
+    monkeypatch.setattr(updateMTAComplexes, "COMPLEXES_FILE", str(tmp_path / "mta_subway_complexes.json"))
+
+    def read():
+        with open(tmp_path / "diff_report.json") as f:
+            return json.load(f)
+    return read
+
+
+def assert_workflow_readable(section):
+    """The shape the workflow's job summary and commit message read: a list of names per change type."""
+    for change in ("added", "removed", "modified"):
+        assert isinstance(section[change], list) and all(isinstance(name, str) for name in section[change])
+
+
+def test_stations_update_returns_the_collection_and_reports_station_ids(report):
+    updateMTAStations.fetch_latest_station_data(OLD)
+    collection = updateMTAStations.fetch_latest_station_data({"type": "FeatureCollection", "features": NEW})
+
+    assert collection["type"] == "FeatureCollection" and collection["features"] == NEW
+    with open(updateMTAStations.STATIONS_FILE) as f:
+        assert json.load(f)["features"] == NEW
+    section = report()["stations"]
+    assert_workflow_readable(section)
+    assert section["added"] == ["Dyckman St"]
+    assert section["keys"] == {"added": ["6"], "removed": ["4"], "modified": ["2", "3"]}
+
+
+def complex_row(complex_id, stop_name, lon="-73.98"):
+    return {"complex_id": complex_id, "station_ids": complex_id, "gtfs_stop_ids": f"{complex_id}S", "stop_name": stop_name,
+            "ada": "1", "borough": "M", "number_of_stations_in_complex": "1", "latitude": "40.75", "longitude": lon}
+
+
+def test_complexes_update_reports_complex_ids(report):
+    updateMTAComplexes.fetch_latest_complex_data([complex_row("611", "Times Sq"), complex_row("610", "42 St"), complex_row("1", "Gone")])
+    collection = updateMTAComplexes.fetch_latest_complex_data(
+        [complex_row("611", "Times Sq"), complex_row("610", "42 St", lon="-73.99"), complex_row("2", "New")])
+
+    assert [f["properties"]["complex_id"] for f in collection["features"]] == ["611", "610", "2"]
+    section = report()["complexes"]
+    assert_workflow_readable(section)
+    assert (section["added"], section["removed"], section["modified"]) == (["New"], ["Gone"], ["42 St"])
+    assert section["keys"] == {"added": ["2"], "removed": ["1"], "modified": ["610"]}
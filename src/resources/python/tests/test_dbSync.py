@@ -0,0 +1,115 @@
+import json
+import sqlite3
+
+import pytest
+
+import dbSync
+from dbSync import connect, create_schema, sync_database
+
+
+def feature(**properties):
+    return {"type": "Feature", "geometry": {"type": "Point", "coordinates": [-73.98, 40.75]}, "properties": properties}
+
+
+def collection(*features):
+    return {"type": "FeatureCollection", "features": list(features)}
+
+
+@pytest.fixture
+def database(tmp_path, monkeypatch):
+    alerts = tmp_path / "ta_alerts.json"
+    station_alerts = tmp_path / "station_alerts.json"
+    alerts.write_text(json.dumps([{"severity": "info", "text": "Elevator work"}, {"severity": "info", "text": "Elevator work"}]))
+    station_alerts.write_text(json.dumps(collection(feature(complex_id="611", stop_name="Times Sq", alert="Use EL101"))))
+    monkeypatch.setitem(dbSync.ALERT_TABLES[0], "file", str(alerts))
+    monkeypatch.setitem(dbSync.ALERT_TABLES[1], "file", str(station_alerts))
+
+    dsn = f"sqlite:///{tmp_path / 'supabase.sqlite'}"
+    with connect(dsn) as conn:
+        create_schema(conn)
+    return {"dsn": dsn, "path": tmp_path / "supabase.sqlite", "state": str(tmp_path / "db_sync_state.json"),
+            "alerts": alerts}
+
+
+def sync(database, **datasets):
+    return sync_database(dsn=database["dsn"], state_path=database["state"], **datasets)
+
+
+def rows(database, sql):
+    with sqlite3.connect(database["path"]) as conn:
+        return conn.execute(sql).fetchall()
+
+
+DATASETS = {
+    "complexes": collection(feature(complex_id="611", stop_name="Times Sq-42 St"), feature(complex_id="610", stop_name="42 St-Port Authority")),
+    "stations": collection(feature(station_id="1", complex_id="611", stop_name="Times Sq-42 St"),
+                           feature(station_id="2", complex_id="610", stop_name="42 St-Port Authority")),
+    "elevators": collection(feature(elevatorno="EL101", complexID="611", title="Street to mezzanine")),
+}
+
+
+def test_first_sync_sends_everything_and_later_syncs_only_the_changes(database):
+    counts = sync(database, **DATASETS)
+    assert counts["complexes"] == {"upserted": 2, "deleted": 0}
+    assert counts["alerts"] == {"replaced": 2}
+
+    assert sync(database, **DATASETS)["station_details"] == {"upserted": 0, "deleted": 0}
+
+    changed = {
+        "complexes": collection(DATASETS["complexes"]["features"][0]),
+        "stations": collection(feature(station_id="1", complex_id="611", stop_name="Times Square-42 St")),
+        "elevators": collection(),
+    }
+    counts = sync(database, **changed)
+
+    assert counts["station_details"] == {"upserted": 1, "deleted": 1}
+    assert counts["complexes"] == {"upserted": 0, "deleted": 1}
+    assert counts["elevators"] == {"upserted": 0, "deleted": 0}
+    assert rows(database, "SELECT station_id, stop_name FROM station_details") == [("1", "Times Square-42 St")]
+    assert rows(database, "SELECT elevator_id FROM elevators") == [("EL101",)]
+
+
+def test_changed_alerts_replace_the_table_even_with_repeated_texts(database):
+    sync(database, **DATASETS)
+    database["alerts"].write_text(json.dumps([{"severity": "info", "text": "Elevator work"}, {"severity": "high", "text": "Elevator work"}]))
+
+    assert sync(database, **DATASETS)["alerts"] == {"replaced": 2}
+    assert rows(database, "SELECT severity, text FROM alerts ORDER BY id") == [("info", "Elevator work"), ("high", "Elevator work")]
+    assert sync(database, **DATASETS)["alerts"] == {}
+
+
+def test_failed_sync_is_retried(database, monkeypatch):
+    sync(database, **DATASETS)
+    renamed = {**DATASETS, "complexes": collection(feature(complex_id="611", stop_name="Times Square"), DATASETS["complexes"]["features"][1])}
+
+    def fail(conn, dataset_plan, alert_plan):
+        raise sqlite3.OperationalError("connection lost")
+
+    with monkeypatch.context() as m:
+        m.setattr(dbSync, "apply_plan", fail)
+        with pytest.raises(sqlite3.OperationalError):
+            sync(database, **renamed)
+
+    assert sync(database, **renamed)["complexes"] == {"upserted": 1, "deleted": 0}
+    assert rows(database, "SELECT stop_name FROM complexes WHERE complex_id = '611'") == [("Times Square",)]
+
+
+def test_complex_still_referenced_by_an_elevator_is_kept_and_deleted_later(database):
+    with_elevator = {**DATASETS, "elevators": collection(feature(elevatorno="EL101", complexID="611"), feature(elevatorno="EL202", complexID="610"))}
+    sync(database, **with_elevator)
+    without_610 = {
+        "complexes": collection(DATASETS["complexes"]["features"][0]),
+        "stations": collection(DATASETS["stations"]["features"][0]),
+        "elevators": collection(feature(elevatorno="EL101", complexID="611")),
+    }
+
+    counts = sync(database, **without_610)
+
+    assert counts["station_details"] == {"upserted": 0, "deleted": 1}
+    assert counts["complexes"] == {"upserted": 0, "kept": 1, "deleted": 0}
+    assert rows(database, "SELECT complex_id FROM complexes ORDER BY complex_id") == [("610",), ("611",)]
+
+    with sqlite3.connect(database["path"]) as conn:
+        conn.execute("DELETE FROM elevators WHERE elevator_id = 'EL202'")  # the elevator is reviewed and removed by hand
+    assert sync(database, **without_610)["complexes"] == {"upserted": 0, "deleted": 1}
+    assert rows(database, "SELECT complex_id FROM complexes") == [("611",)]
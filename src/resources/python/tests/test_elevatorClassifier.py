@@ -0,0 +1,18 @@
+import pytest
+
+from elevatorClassifier import STREET_DESCRIPTION, classify, classify_text
+
+EQUIPMENT = {"serving": "Street to mezzanine", "shortdescription": "Street to mezzanine", "linesservedbyelevator": "A/C/E"}
+
+
+def test_classify_returns_a_copy_of_the_cached_result():
+    first = classify(EQUIPMENT)
+    first["description_custom"] = "edited by hand"
+
+    assert classify(EQUIPMENT)["description_custom"] == STREET_DESCRIPTION
+    assert classify(EQUIPMENT)["lines"] == ("A", "C", "E")
+
+
+def test_cached_result_is_read_only():
+    with pytest.raises(TypeError):
+        classify_text("Queens-bound platform", "Mezzanine to Queens-bound platform", "E/M")["isStreet"] = True
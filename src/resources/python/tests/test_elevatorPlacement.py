@@ -0,0 +1,66 @@
+from elevatorPlacement import OFFSET_STEP, place_elevators, stack_under_complexes
+from pipelineRunner import SOURCE_FILES, load_json
+
+
+def loop_placement(base_coords, complex_ids, is_street, offset_step=OFFSET_STEP):
+    """The per-elevator loop updateElevators placed new elevators with before the vectorized version."""
+    counter = {}
+    placed = []
+    for coords, complex_id, street in zip(base_coords, complex_ids, is_street):
+        if not coords or None in coords:
+            placed.append([None, None])
+            continue
+        lon, lat = coords
+        count = counter.get((complex_id, street), 0)
+        if street:
+            if count % 2 == 0:
+                lon -= (count // 2 + 1) * offset_step
+            else:
+                lon += (count // 2 + 1) * offset_step
+        else:
+            lat -= (count + 1) * offset_step
+        counter[(complex_id, street)] = count + 1
+        placed.append([lon, lat])
+    return placed
+
+
+def loop_stacking(base_coords, complex_ids, order, offset_step=OFFSET_STEP):
+    """The per-complex loop repositionPlatformElevators2 stacked elevators with."""
+    by_complex = {}
+    for i, complex_id in enumerate(complex_ids):
+        by_complex.setdefault(complex_id, []).append(i)
+    placed = [None] * len(base_coords)
+    for indexes in by_complex.values():
+        for idx, i in enumerate(sorted(indexes, key=lambda i: order[i])):
+            base_lng, base_lat = base_coords[i][0], base_coords[i][1] - 2 * offset_step
+            placed[i] = [base_lng, base_lat - (idx * offset_step)]
+    return placed
+
+
+def elevator_dataset():
+    features = load_json(SOURCE_FILES["elevators"])["features"]
+    coords = [f["geometry"]["coordinates"] for f in features]
+    complex_ids = [str(f["properties"].get("complexID")) for f in features]
+    is_street = [f["properties"].get("isStreet") == "true" for f in features]
+    return features, coords, complex_ids, is_street
+
+
+def test_placement_matches_the_loop_on_the_elevator_dataset():
+    _, coords, complex_ids, is_street = elevator_dataset()
+    # Elevators without coordinates keep [None, None] and don't take a slot
+    coords = [[None, None] if i % 17 == 0 else c for i, c in enumerate(coords)]
+
+    placed = place_elevators(coords, complex_ids, is_street)
+
+    assert len(set(complex_ids)) > 100 and any(is_street) and not all(is_street)
+    assert placed == loop_placement(coords, complex_ids, is_street)  # exact float equality
+
+
+def test_stacking_matches_the_loop_on_the_elevator_dataset():
+    features, coords, complex_ids, _ = elevator_dataset()
+    keep = [i for i, c in enumerate(coords) if c and None not in c]
+    coords = [coords[i] for i in keep]
+    complex_ids = [complex_ids[i] for i in keep]
+    order = [0 if "uptown" in str(features[i]["properties"].get("directionLabel", "")).lower() else 1 for i in keep]
+
+    assert stack_under_complexes(coords, complex_ids, order) == loop_stacking(coords, complex_ids, order)
@@ -0,0 +1,40 @@
+import json
+
+from featureStore import FeatureStore
+
+
+def elevator(elevatorno, complex_id, coordinates):
+    return {"type": "Feature", "geometry": {"type": "Point", "coordinates": coordinates},
+            "properties": {"elevatorno": elevatorno, "stationID": "1", "complexID": complex_id, "elevatorgtfsstopid": "101"}}
+
+
+def test_load_export_round_trip_writes_the_same_file(tmp_path):
+    path = tmp_path / "custom_elevator_dataset.json"
+    collection = {"_comment": "curated", "type": "FeatureCollection",
+                  "features": [elevator("EL102", "611", [-73.98, 40.75]), elevator("EL101", "610", [None, None])]}
+    path.write_text(json.dumps(collection, indent=2), encoding="utf-8")
+
+    with FeatureStore(str(tmp_path / "datasets.sqlite")) as store:
+        assert store.load("elevators", str(path)) == 2
+        assert not store.is_stale("elevators", str(path))
+        assert store.export("elevators", str(path)) is False
+
+    assert path.read_text(encoding="utf-8") == json.dumps(collection, indent=2)
+
+
+def test_row_updates_keep_file_order(tmp_path):
+    path = tmp_path / "custom_elevator_dataset.json"
+    path.write_text(json.dumps({"type": "FeatureCollection", "features": [
+        elevator("EL101", "610", [-73.99, 40.75]), elevator("EL102", "611", [-73.98, 40.75])]}), encoding="utf-8")
+
+    with FeatureStore(str(tmp_path / "datasets.sqlite")) as store:
+        store.load("elevators", str(path))
+        store.upsert("elevators", [elevator("EL103", "611", [-73.97, 40.76]), elevator("EL101", "612", [-73.99, 40.75])])
+        store.delete("elevators", ["EL102"])
+        store.export("elevators", str(path))
+
+        assert [f["properties"]["elevatorno"] for f in store.find("elevators", "complex_id", "611")] == ["EL103"]
+        assert store.get("elevators", "EL101")["properties"]["complexID"] == "612"
+
+    exported = json.loads(path.read_text(encoding="utf-8"))
+    assert [f["properties"]["elevatorno"] for f in exported["features"]] == ["EL101", "EL103"]
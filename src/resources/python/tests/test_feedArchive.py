@@ -0,0 +1,51 @@
+import os
+import subprocess
+import sys
+
+from feedArchive import FEED_FILES, KEYFRAME_INTERVAL, FeedArchive
+
+SCRIPT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "individual_scripts", "feedArchive.py")
+
+
+def equipment(n, status="Y"):
+    return [{"equipmentno": f"EL{i:03d}", "equipmenttype": "EL", "isactive": status if i == 0 else "Y"} for i in range(n)]
+
+
+def test_snapshots_round_trip_through_deltas(tmp_path):
+    archive = FeedArchive(str(tmp_path))
+    payloads = [equipment(20), equipment(20, status="N"), equipment(21), {"type": "FeatureCollection", "features": equipment(3)}]
+    for at, data in enumerate(payloads, start=100):
+        archive.add("equipmentFeed", data, at)
+
+    reopened = FeedArchive(str(tmp_path))
+    assert [data for _, _, data in reopened.snapshots("equipmentFeed")] == payloads
+    assert reopened.get("equipmentFeed", 101.5) == (101, payloads[1])
+    assert reopened.get("equipmentFeed", 99) is None
+
+
+def test_unchanged_payload_is_not_stored_again(tmp_path):
+    archive = FeedArchive(str(tmp_path))
+    first, written = archive.add("equipmentFeed", equipment(5), 100)
+
+    assert written > 0
+    assert archive.add("equipmentFeed", equipment(5), 200) == (first, 0)
+    assert archive.index("equipmentFeed") == ([100], [first])
+
+
+def test_prune_keeps_the_bases_of_remaining_deltas(tmp_path):
+    archive = FeedArchive(str(tmp_path))
+    day = 24 * 60 * 60
+    for i in range(KEYFRAME_INTERVAL // 8):
+        archive.add("equipmentFeed", equipment(20 + i), i * day)
+    last = archive.get("equipmentFeed")[1]
+
+    archive.prune(keep_days=1, now=(KEYFRAME_INTERVAL // 8 - 1) * day)
+
+    assert FeedArchive(str(tmp_path)).get("equipmentFeed")[1] == last
+
+
+def test_add_only_archives_raw_feed_files(tmp_path):
+    assert set(FEED_FILES) == {"equipmentFeed"}
+    result = subprocess.run([sys.executable, SCRIPT, "--dir", str(tmp_path), "add", "stationsFeed"], capture_output=True, text=True)
+    assert result.returncode != 0
+    assert "unknown feeds ['stationsFeed']" in result.stderr
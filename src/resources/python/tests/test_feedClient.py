@@ -0,0 +1,124 @@
+import pytest
+import requests
+
+from feedClient import deferred_cache, fetch_all, fetch_all_cached, fetch_json_cached, iter_json_array, make_session
+from pipelineRunner import run_pipeline, stage, unchanged
+
+
+def test_fetch_all_returns_every_feed_by_name(feed_server):
+    feed_server.set("/stations.json", [{"gtfs_stop_id": "101"}])
+    feed_server.set("/complexes.json", [{"complex_id": "1"}])
+    feed_server.set("/equipment.json", [{"equipmentno": "EL101"}])
+    feeds = {name: {"url": feed_server.url(f"/{name}.json")} for name in ("stations", "complexes", "equipment")}
+
+    data = fetch_all(feeds, session=make_session(retries=0))
+
+    assert data == {
+        "stations": [{"gtfs_stop_id": "101"}],
+        "complexes": [{"complex_id": "1"}],
+        "equipment": [{"equipmentno": "EL101"}],
+    }
+    assert sorted(status for _, status in feed_server.requests) == [200, 200, 200]
+
+
+def test_fetch_all_reraises_a_failed_feed(feed_server):
+    feed_server.set("/stations.json", [])
+    feeds = {"stations": {"url": feed_server.url("/stations.json")}, "missing": {"url": feed_server.url("/missing.json")}}
+
+    with pytest.raises(requests.HTTPError):
+        fetch_all(feeds, session=make_session(retries=0))
+
+
+def test_fetch_json_cached_answers_a_304_from_the_cache(feed_server, tmp_path):
+    feed_server.set("/equipment.json", [{"equipmentno": "EL101"}])
+    url = feed_server.url("/equipment.json")
+
+    assert fetch_json_cached(url, cache_dir=tmp_path) == ([{"equipmentno": "EL101"}], True)
+    assert fetch_json_cached(url, cache_dir=tmp_path) == ([{"equipmentno": "EL101"}], False)
+    assert feed_server.statuses("/equipment.json") == [200, 304]
+
+
+def test_304_without_a_cached_copy_refetches_the_body(feed_server, tmp_path):
+    feed_server.set("/equipment.json", [{"equipmentno": "EL101"}])
+    url = feed_server.url("/equipment.json")
+    etag = requests.get(url).headers["ETag"]
+
+    # The caller's own validator gets a 304, but there is no cached body to answer from
+    data, changed = fetch_json_cached(url, headers={"If-None-Match": etag}, cache_dir=tmp_path)
+
+    assert (data, changed) == ([{"equipmentno": "EL101"}], True)
+    assert feed_server.statuses("/equipment.json") == [200, 304, 200]
+
+
+def test_deferred_cache_is_only_written_when_the_block_succeeds(feed_server, tmp_path):
+    feed_server.set("/equipment.json", [{"equipmentno": "EL101"}])
+    url = feed_server.url("/equipment.json")
+
+    with pytest.raises(RuntimeError):
+        with deferred_cache():
+            assert fetch_json_cached(url, cache_dir=tmp_path)[1]
+            raise RuntimeError("a stage failed")
+    assert list(tmp_path.iterdir()) == []
+
+    with deferred_cache():
+        assert fetch_json_cached(url, cache_dir=tmp_path)[1]
+    assert fetch_json_cached(url, cache_dir=tmp_path)[1] is False
+    assert feed_server.statuses("/equipment.json") == [200, 200, 304]
+
+
+def test_failed_stage_reruns_after_the_feed_is_unchanged(feed_server, tmp_path):
+    feed_server.set("/stations.json", [{"gtfs_stop_id": "101"}])
+    feeds = {"stationsFeed": {"url": feed_server.url("/stations.json")}}
+    built = []
+
+    def fetch():
+        data, changed = fetch_all_cached(feeds, cache_dir=tmp_path)["stationsFeed"]
+        return data if changed else unchanged(data)
+
+    def build(stations_feed):
+        if not built:
+            built.append(None)
+            raise ValueError("first build fails")
+        built.append(stations_feed)
+
+    def run():
+        with deferred_cache():
+            run_pipeline([stage("fetchFeeds", fetch, outputs=["stationsFeed"]),
+                          stage("updateMTAStations", build, inputs=["stationsFeed"])])
+
+    with pytest.raises(ValueError):
+        run()
+    run()  # the failed run left no validators behind, so this is a 200 and the stage runs again
+    run()  # now a 304: the stage is skipped
+
+    assert feed_server.statuses("/stations.json") == [200, 200, 304]
+    assert built == [None, [{"gtfs_stop_id": "101"}]]
+
+
+def splits(text):
+    """The UTF-8 bytes of `text` as two chunks split at every possible point, then as one-byte chunks."""
+    data = text.encode("utf-8")
+    for i in range(len(data) + 1):
+        yield [data[:i], data[i:]]
+    yield [data[i:i + 1] for i in range(len(data))]
+
+
+FEED = '// Generated feed\n[ {"station": "Times Sq–42 St ☃", "lines": ["1", "N"], "z": -7.5e3}, 12, "é", true, null, [] ]  \n'
+
+
+def test_iter_json_array_at_every_chunk_boundary():
+    expected = [{"station": "Times Sq–42 St ☃", "lines": ["1", "N"], "z": -7500.0}, 12, "é", True, None, []]
+    for chunks in splits(FEED):
+        assert list(iter_json_array(chunks)) == expected
+    for chunks in splits(" [ ] \n"):
+        assert list(iter_json_array(chunks)) == []
+
+
+@pytest.mark.parametrize("text", [
+    "[1 2]", "[1,2] trailing", "[1,2]]", "[1][2]", "[1,]", "[,1]", "[1,,2]", "[1}", "[1,2", "[", '["é', "",
+    '{"equipmentno": "EL101"}', "// banner only",
+])
+def test_iter_json_array_rejects_malformed_input(text):
+    for chunks in splits(text):
+        with pytest.raises(ValueError):
+            list(iter_json_array(chunks))
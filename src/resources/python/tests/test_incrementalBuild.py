@@ -0,0 +1,84 @@
+import json
+
+import pytest
+
+import incrementalBuild
+import writeStationCoords
+from incrementalBuild import hash_data, is_up_to_date, write_outputs
+from pipelineRunner import Unchanged
+
+INPUTS = {"stations": hash_data({"features": []}), "script": "abc"}
+
+
+@pytest.fixture
+def manifest(tmp_path, monkeypatch):
+    path = tmp_path / "cache" / "build_manifest.json"
+    monkeypatch.setattr(incrementalBuild, "MANIFEST_FILE", str(path))
+    return path
+
+
+def test_hash_data_ignores_key_order_and_whitespace():
+    assert hash_data({"a": 1, "b": [1, 2]}) == hash_data(json.loads('{ "b": [1,2], "a": 1 }'))
+    assert hash_data({"a": 1}) != hash_data({"a": 2})
+
+
+def test_manifest_hit_only_while_inputs_and_outputs_match(tmp_path, manifest):
+    output = tmp_path / "accessibleStationGeometry.json"
+    assert not is_up_to_date("writeStationCoords", INPUTS, [output])  # no manifest yet
+
+    assert write_outputs("writeStationCoords", INPUTS, {str(output): "{}"}) == [str(output)]
+    assert is_up_to_date("writeStationCoords", INPUTS, [str(output)])
+    assert not is_up_to_date("writeStationCoords", {**INPUTS, "script": "def"}, [str(output)])
+    assert not is_up_to_date("writeComplexCoords", INPUTS, [str(output)])
+    assert not is_up_to_date("writeStationCoords", INPUTS, [str(output), str(tmp_path / "never_recorded.ts")])
+
+    output.write_text('{"edited": true}')
+    assert not is_up_to_date("writeStationCoords", INPUTS, [str(output)])
+    output.unlink()
+    assert not is_up_to_date("writeStationCoords", INPUTS, [str(output)])
+
+
+def test_unchanged_outputs_are_not_rewritten(tmp_path, manifest):
+    same, changed = tmp_path / "same.json", tmp_path / "changed.json"
+    same.write_text("{}")
+    changed.write_text("{}")
+
+    written = write_outputs("stage", INPUTS, {str(same): "{}", str(changed): b'{"a": 1}'})
+
+    assert written == [str(changed)]
+    assert is_up_to_date("stage", INPUTS, [str(same), str(changed)])
+
+
+def test_invalid_manifest_rebuilds_everything(tmp_path, manifest, capsys):
+    output = tmp_path / "out.json"
+    write_outputs("stage", INPUTS, {str(output): "{}"})
+    manifest.write_text("{not json")
+
+    assert not is_up_to_date("stage", INPUTS, [str(output)])
+    assert "is invalid" in capsys.readouterr().out
+    write_outputs("stage", INPUTS, {str(output): "{}"})
+    assert is_up_to_date("stage", INPUTS, [str(output)])
+
+
+def station(station_id, ada="1"):
+    return {"type": "Feature", "properties": {"station_id": station_id, "ada": ada, "borough": "M"},
+            "geometry": {"type": "Point", "coordinates": [-73.99, 40.75]}}
+
+
+def test_stage_skips_on_a_manifest_hit_and_reruns_when_its_input_changes(tmp_path, monkeypatch, manifest):
+    for name in ("output_geojson", "output_json", "output_js"):
+        monkeypatch.setattr(writeStationCoords, name, str(tmp_path / "out" / getattr(writeStationCoords, name).rsplit("/", 1)[1]))
+    stations = {"type": "FeatureCollection", "features": [station("1"), station("2", ada="0")]}
+
+    assert not isinstance(writeStationCoords.write_station_coords(stations), Unchanged)
+    assert isinstance(writeStationCoords.write_station_coords(stations), Unchanged)
+
+    stations["features"].append(station("3"))
+    assert not isinstance(writeStationCoords.write_station_coords(stations), Unchanged)
+    assert '"3"' in (tmp_path / "out" / "accessibleStationGeometry.json").read_text()
+    assert isinstance(writeStationCoords.write_station_coords(stations), Unchanged)
+    written = (tmp_path / "out" / "accessibleStationGeometry.json").stat().st_mtime_ns
+
+    # force re-runs a stage the manifest says is up to date, without touching outputs that come out the same
+    assert not isinstance(writeStationCoords.write_station_coords(stations, force=True), Unchanged)
+    assert (tmp_path / "out" / "accessibleStationGeometry.json").stat().st_mtime_ns == written
@@ -0,0 +1,65 @@
+from outageHistory import DAY, MAX_GAP, OutageHistory
+
+DAY0 = 20000 * DAY  # a UTC midnight
+MIDNIGHT = DAY0 + DAY
+
+# (time, elevators out): spans midnight, then a 1 h gap nothing is known about, then a gap of exactly MAX_GAP
+SNAPSHOTS = [
+    (MIDNIGHT - 600, []),                       # 23:50
+    (MIDNIGHT - 300, ["EL101"]),                # 23:55 EL101 goes down
+    (MIDNIGHT + 300, ["EL101"]),                # 00:05 the next day
+    (MIDNIGHT + 300 + 3600, []),                # 01:05, after a gap: EL101 is back
+    (MIDNIGHT + 300 + 4200, ["EL102"]),         # 01:15 EL102 goes down
+    (MIDNIGHT + 300 + 4200 + MAX_GAP, []),      # 01:30 EL102 is back
+]
+
+
+def replay(history_dir):
+    """Ingest the snapshots, flushing and reopening the history after every one of them, as across poller restarts."""
+    history = OutageHistory(history_dir, ["EL101", "EL102"])
+    for at, out in SNAPSHOTS:
+        history.ingest(out, at)
+        history.flush()
+        history = OutageHistory(history_dir, ["EL101", "EL102"])
+    return history
+
+
+def test_reliability_across_midnight_gaps_and_restarts(tmp_path):
+    history = replay(str(tmp_path))
+    assert history.last_snapshot == SNAPSHOTS[-1][0] and history.down_since == {}
+
+    # Observed: 300 + 600 (across midnight) + 600 + 900; the hour-long gap counts for nothing
+    report = history.reliability()
+    assert report["EL101"] == {"uptime_pct": 75.0, "mttr_hours": 1.17, "outages_per_month": None, "outages": 1, "observed_days": 0.03}
+    assert report["EL102"] == {"uptime_pct": 62.5, "mttr_hours": 0.25, "outages_per_month": None, "outages": 1, "observed_days": 0.03}
+
+    # The 600 s across midnight is split 300 / 300 between the days; the repair counts on the day it ended
+    day0 = history.reliability(days=1, end=DAY0 + 1)
+    assert (day0["EL101"]["uptime_pct"], day0["EL101"]["outages"], day0["EL101"]["mttr_hours"]) == (50.0, 1, None)
+    day1 = history.reliability(days=1, elevators=["EL101"])
+    assert day1 == {"EL101": {"uptime_pct": 83.333, "mttr_hours": 1.17, "outages_per_month": None, "outages": 0, "observed_days": 0.02}}
+    assert history.reliability(days=2) == report
+
+
+def test_outage_intervals_survive_a_reload(tmp_path):
+    history = replay(str(tmp_path))
+    went_down, came_back = SNAPSHOTS[1][0], SNAPSHOTS[3][0]
+
+    assert history.outage_intervals("EL101", DAY0) == [(went_down, came_back)]
+    assert history.outage_intervals("EL101", MIDNIGHT) == [(None, came_back)]  # went down before the window
+    assert history.outage_intervals("EL102", DAY0) == [(SNAPSHOTS[4][0], SNAPSHOTS[5][0])]
+    assert history.outage_intervals("EL404", DAY0) == []
+
+
+def test_outage_in_progress_at_a_restart_keeps_its_start(tmp_path):
+    history = OutageHistory(str(tmp_path), ["EL101"])
+    for at, out in SNAPSHOTS[:2]:
+        history.ingest(out, at)
+    history.flush()
+
+    history = OutageHistory(str(tmp_path))
+    assert history.down_since == {"EL101": SNAPSHOTS[1][0]}
+    assert history.ingest([], SNAPSHOTS[1][0]) is None  # not newer than the last snapshot
+    assert history.ingest([], SNAPSHOTS[2][0]) == ([], ["EL101"])
+    assert history.reliability()["EL101"]["mttr_hours"] == round(600 / 3600, 2)
+    assert history.outage_intervals("EL101", DAY0)[0][0] == SNAPSHOTS[1][0]
@@ -0,0 +1,65 @@
+import pytest
+
+import feedClient
+from outageHistory import OutageHistory
+from outagePoller import Broadcaster, poll_once, record_history
+from outageState import OutageState
+
+FEED = [
+    {"equipment": "EL101", "equipmenttype": "EL", "isupcomingoutage": "N", "reason": "Repair",
+     "outagedate": "07/14/2025 09:30:00 AM", "estimatedreturntoservice": "07/15/2025 05:00:00 PM"},
+    {"equipment": "ES200", "equipmenttype": "ES", "isupcomingoutage": "N", "reason": "Repair",
+     "outagedate": "07/14/2025 09:30:00 AM", "estimatedreturntoservice": "07/15/2025 05:00:00 PM"},
+]
+
+
+@pytest.fixture
+def outage_feed(feed_server, tmp_path, monkeypatch):
+    monkeypatch.setattr(feedClient, "CACHE_DIR", str(tmp_path / "feeds"))
+    feed_server.set("/nyct_ene.json", FEED)
+    return feed_server.url("/nyct_ene.json")
+
+
+def test_restarted_poller_applies_the_cached_feed_on_a_304(outage_feed, feed_server):
+    assert poll_once(OutageState(), Broadcaster(), outage_feed)["version"] == 1
+
+    # A new process: same on-disk cache, so the feed comes back 304
+    state = OutageState()
+    delta = poll_once(state, Broadcaster(), outage_feed)
+
+    assert feed_server.statuses("/nyct_ene.json") == [200, 304]
+    assert delta["version"] == 1
+    assert state.snapshot()["outages"].keys() == {"EL101"}
+    assert poll_once(state, Broadcaster(), outage_feed) is None
+    assert state.version == 1
+
+
+def test_restart_does_not_record_outages_as_repaired(outage_feed, tmp_path):
+    history_dir = str(tmp_path / "history")
+    state = OutageState()
+    history = OutageHistory(history_dir, ["EL101", "EL102"])
+    poll_once(state, Broadcaster(), outage_feed)
+    record_history(state, history)
+
+    # A new process, before and after its first poll (a 304)
+    state = OutageState()
+    history = OutageHistory(history_dir, ["EL101", "EL102"])
+    record_history(state, history)
+    assert history.down_since.keys() == {"EL101"}
+    poll_once(state, Broadcaster(), outage_feed)
+    record_history(state, history)
+
+    assert history.outage_intervals("EL101", 0) == [(int(history.down_since["EL101"]), None)]
+    assert history.reliability()["EL101"]["outages"] == 1
+
+
+def test_feed_without_outages_is_still_recorded(feed_server, outage_feed, tmp_path):
+    feed_server.set("/nyct_ene.json", FEED[1:])
+    state = OutageState()
+    history = OutageHistory(str(tmp_path / "history"), ["EL101"])
+
+    assert poll_once(state, Broadcaster(), outage_feed) is None
+    record_history(state, history)
+
+    assert state.version == 0
+    assert history.last_snapshot is not None
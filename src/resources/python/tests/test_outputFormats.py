@@ -0,0 +1,88 @@
+import pytest
+
+import incrementalBuild
+import outputFormats
+import writeComplexCoords
+from outputFormats import decode_binary, encode_binary
+
+
+@pytest.fixture
+def manifest(tmp_path, monkeypatch):
+    monkeypatch.setattr(incrementalBuild, "MANIFEST_FILE", str(tmp_path / "build_manifest.json"))
+
+
+def point(elevatorno, coordinates):
+    return {"type": "Feature", "geometry": {"type": "Point", "coordinates": coordinates}, "properties": {"elevatorno": elevatorno}}
+
+
+def complexes(*ids_and_boroughs):
+    return {"type": "FeatureCollection", "features": [
+        {"type": "Feature", "geometry": {"type": "Point", "coordinates": [-73.98, 40.75]},
+         "properties": {"complex_id": complex_id, "ada": "1", "borough": borough}}
+        for complex_id, borough in ids_and_boroughs
+    ]}
+
+
+def test_binary_round_trip_keeps_features_without_coordinates():
+    collection = {"type": "FeatureCollection", "features": [
+        point("EL101", [-73.9857, 40.7484]),
+        point("EL102", [None, None]),
+        point("EL103", [-73.9442, 40.8075]),
+    ]}
+
+    geometry_type, features = decode_binary(encode_binary(collection, "elevatorno", precision=6))
+
+    assert geometry_type == "Point"
+    assert features == [("EL101", [-73.9857, 40.7484]), ("EL102", None), ("EL103", [-73.9442, 40.8075])]
+
+
+def test_binary_rejects_precision_that_overflows_int32():
+    collection = {"type": "FeatureCollection", "features": [point("EL101", [-73.9857, 40.7484])]}
+
+    assert decode_binary(encode_binary(collection, "elevatorno", precision=7))[1] == [("EL101", [-73.9857, 40.7484])]
+    with pytest.raises(ValueError):
+        encode_binary(collection, "elevatorno", precision=8)
+
+
+def test_binary_uses_the_configured_precision_even_when_it_is_zero(monkeypatch):
+    collection = {"type": "FeatureCollection", "features": [point("EL101", [-73.9857, 40.7484])]}
+
+    monkeypatch.setattr(outputFormats, "COORD_PRECISION", None)
+    assert decode_binary(encode_binary(collection, "elevatorno"))[1] == [("EL101", [-73.9857, 40.7484])]
+    monkeypatch.setattr(outputFormats, "COORD_PRECISION", 0)
+    assert decode_binary(encode_binary(collection, "elevatorno"))[1] == [("EL101", [-74.0, 41.0])]
+
+
+def test_packed_index_lists_each_chunks_bounds(monkeypatch, tmp_path):
+    monkeypatch.setattr(outputFormats, "TS_FORMAT", "packed")
+    coordinates = {"611": [-73.987, 40.755], "610": [-73.990, 40.757], "42": [-73.95, 40.68], "99": [None, None]}
+    groups = {"611": "M", "610": "M", "42": "Bk"}
+
+    outputs = outputFormats.coordinate_module_outputs(str(tmp_path / "ComplexGeometry.ts"), "complexCoordinates", coordinates, groups)
+    index = outputs[str(tmp_path / "ComplexGeometry.ts")]
+
+    assert '{"Bk":[-73.95,40.68,-73.95,40.68],"M":[-73.99,40.755,-73.987,40.757],"other":null}' in index
+    assert "export const loadComplexCoordinatesInView = lookup.loadInView;" in index
+
+
+def test_stale_chunks_are_removed_when_switching_formats(monkeypatch, tmp_path, manifest):
+    monkeypatch.setattr(writeComplexCoords, "output_geojson", str(tmp_path / "ComplexGeometry.geojson"))
+    monkeypatch.setattr(writeComplexCoords, "output_json", str(tmp_path / "ComplexGeometry.json"))
+    monkeypatch.setattr(writeComplexCoords, "output_js", str(tmp_path / "utils" / "ComplexGeometry.ts"))
+    (tmp_path / "utils" / "coordinates").mkdir(parents=True)
+    other_module = tmp_path / "utils" / "coordinates" / "accessibleStationGeometry.M.ts"
+    other_module.write_text("export const ids = [];")
+    chunks = lambda: sorted(path.name for path in (tmp_path / "utils" / "coordinates").glob("ComplexGeometry.*.ts"))
+
+    monkeypatch.setattr(outputFormats, "TS_FORMAT", "packed")
+    writeComplexCoords.write_complex_coords(complexes(("611", "M"), ("42", "Bk")))
+    assert chunks() == ["ComplexGeometry.Bk.ts", "ComplexGeometry.M.ts"]
+
+    writeComplexCoords.write_complex_coords(complexes(("611", "M")))  # the Brooklyn group is gone
+    assert chunks() == ["ComplexGeometry.M.ts"]
+
+    monkeypatch.setattr(outputFormats, "TS_FORMAT", "object")
+    writeComplexCoords.write_complex_coords(complexes(("611", "M")))
+    assert chunks() == []
+    assert other_module.exists()  # another module's chunks are not this module's to remove
+    assert "export const complexCoordinates: Record" in (tmp_path / "utils" / "ComplexGeometry.ts").read_text()
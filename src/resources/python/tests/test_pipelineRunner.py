@@ -0,0 +1,46 @@
+import pytest
+
+import pipelineRunner
+from pipelineRunner import run_pipeline, should_skip, stage, unchanged
+
+
+def test_stage_with_unchanged_inputs_is_skipped_only_while_its_files_exist(tmp_path):
+    output = tmp_path / "transit_access.pmtiles"
+    s = stage("vectorTiles", lambda elevators: None, inputs=["elevators"], files=[output])
+    status = {"elevators": "unchanged"}
+
+    assert not should_skip(s, status)
+    output.write_bytes(b"tiles")
+    assert should_skip(s, status)
+    assert not should_skip(s, {"elevators": "changed"})
+
+
+def test_missing_output_file_reruns_the_stage(tmp_path):
+    output = tmp_path / "street_to_complex_lines.geojson"
+    ran = []
+
+    def write(elevators):
+        ran.append(elevators)
+        output.write_text("{}")
+
+    stages = [
+        stage("updateElevators", lambda: unchanged([{"elevatorno": "EL101"}]), outputs=["elevators"]),
+        stage("elevatorToComplexConnector", write, inputs=["elevators"], files=[output]),
+    ]
+    run_pipeline(stages)
+    run_pipeline(stages)
+
+    assert ran == [[{"elevatorno": "EL101"}]]
+
+
+def test_missing_source_file_is_an_error_unless_optional(tmp_path, monkeypatch):
+    monkeypatch.setitem(pipelineRunner.SOURCE_FILES, "elevators", str(tmp_path / "custom_elevator_dataset.json"))
+    received = []
+    stages = [stage("updateElevators", received.append, inputs=["elevators"])]
+
+    with pytest.raises(FileNotFoundError):
+        run_pipeline(stages)
+
+    monkeypatch.setattr(pipelineRunner, "OPTIONAL_SOURCES", {"elevators"})
+    run_pipeline(stages)
+    assert received == [None]
@@ -0,0 +1,61 @@
+from datetime import date, datetime
+
+from complexAccessibility import DEGRADED, INACCESSIBLE
+from plannedOutages import PlannedOutageIndex, parse_window, to_seconds
+
+
+def elevator(elevatorno, is_street):
+    return {"type": "Feature", "geometry": {"type": "Point", "coordinates": [-73.987, 40.755]},
+            "properties": {"elevatorno": elevatorno, "complexID": "611", "isStreet": is_street, "isRedundant": ""}}
+
+
+def outage(elevatorno, start, end, upcoming="Y"):
+    return {"equipment": elevatorno, "equipmenttype": "EL", "isupcomingoutage": upcoming, "reason": "Capital Replacement",
+            "outagedate": start, "estimatedreturntoservice": end}
+
+
+ELEVATORS = {"features": [elevator("EL101", True), elevator("EL102", False), elevator("EL103", False)]}
+FEED = [
+    outage("EL101", "07/14/2025 11:00:00 PM", "07/15/2025 04:00:00 AM"),  # the only street elevator, overnight
+    outage("EL102", "07/14/2025 09:00:00 PM", "07/14/2025 11:30:00 PM"),
+    outage("EL103", "07/01/2025 08:00:00 AM", "", upcoming="N"),  # out now, no return date
+]
+
+
+def at(text):
+    return to_seconds(datetime.strptime(text, "%Y-%m-%d %H:%M"))
+
+
+def test_overnight_window_spans_midnight():
+    assert parse_window("22:00", "05:00", date(2025, 7, 14)) == (at("2025-07-14 22:00"), at("2025-07-15 05:00"))
+    assert parse_window("01:00", "05:00", date(2025, 7, 15)) == (at("2025-07-15 01:00"), at("2025-07-15 05:00"))
+
+
+def test_overnight_outages_merge_into_one_inaccessible_stretch():
+    index = PlannedOutageIndex(ELEVATORS).load(FEED)
+    start, end = parse_window("22:00", "05:00", date(2025, 7, 14))
+
+    assert index.losing_access(start, end) == {"611": [
+        {"from": "2025-07-14 22:00", "to": "2025-07-15 04:00", "status": INACCESSIBLE, "elevators": ["EL101", "EL102", "EL103"]},
+    ]}
+    assert index.status_at(at("2025-07-15 02:00")) == {"611": INACCESSIBLE}
+    assert index.status_at(at("2025-07-15 04:00")) == {"611": DEGRADED}
+
+
+def test_windows_before_and_after_the_overnight_outage():
+    index = PlannedOutageIndex(ELEVATORS).load(FEED)
+
+    assert index.elevators_out(at("2025-07-14 20:00"), at("2025-07-14 22:59")).keys() == {"EL102", "EL103"}
+    assert index.elevators_out(at("2025-07-15 03:59")).keys() == {"EL101", "EL103"}
+    assert index.losing_access(*parse_window("22:00", "05:00", date(2025, 7, 15))) == {}
+    assert index.elevators_out(at("2025-08-01 12:00"))["EL103"] == [
+        {"elevatorno": "EL103", "from": "2025-07-01 08:00", "to": None, "planned": False, "reason": "Capital Replacement"}]
+
+
+def test_planned_only_ignores_current_outages():
+    index = PlannedOutageIndex(ELEVATORS).load(FEED, include_current=False)
+    start, end = parse_window("22:00", "05:00", date(2025, 7, 14))
+
+    assert index.losing_access(start, end) == {"611": [
+        {"from": "2025-07-14 23:00", "to": "2025-07-15 04:00", "status": INACCESSIBLE, "elevators": ["EL101", "EL102"]},
+    ]}
@@ -0,0 +1,117 @@
+import json
+import os
+import time
+
+import pytest
+
+import feedClient
+import replayFeeds
+import updateData
+from feedArchive import FeedArchive
+from pipelineRunner import stage
+from replayFeeds import PIPELINE_FEEDS, StubFeedServer, paced, percentile, pipeline_times, run_worker, summarize
+
+
+def equipment(*out):
+    return [{"equipmentno": no, "isactive": "N" if no in out else "Y"} for no in ("EL101", "EL102")]
+
+
+def stations(*ids):
+    return {"type": "FeatureCollection", "features": [{"properties": {"station_id": i}} for i in ids]}
+
+
+@pytest.fixture
+def archive(tmp_path):
+    archive = FeedArchive(str(tmp_path / "archive"))
+    archive.add("stationsFeed", stations("1"), 50)  # before the other feeds have a snapshot, so not replayed
+    archive.add("stationsFeed", stations("1", "2"), 100)
+    archive.add("complexesFeed", {"type": "FeatureCollection", "features": []}, 100)
+    archive.add("equipmentFeed", equipment(), 100)
+    archive.add("equipmentFeed", equipment("EL101"), 200)
+    archive.add("stationsFeed", stations("1", "2", "3"), 300)
+    return archive
+
+
+def test_pipeline_times_start_once_every_feed_has_a_snapshot(archive):
+    assert pipeline_times(archive) == [100, 200, 300]
+    assert pipeline_times(archive, start=150) == [200, 300]
+    assert pipeline_times(archive, end=300) == [100, 200]
+    assert pipeline_times(FeedArchive(str(archive.dir) + "-empty")) == []
+
+
+def test_stub_server_answers_304_until_the_feed_changes(archive, tmp_path, monkeypatch):
+    monkeypatch.setattr(feedClient, "CACHE_DIR", str(tmp_path / "cache"))
+    stub = StubFeedServer(archive)
+    url = stub.url("stationsFeed")
+
+    stub.at = 100
+    assert feedClient.fetch_json_cached(url) == (stations("1", "2"), True)
+    stub.at = 200
+    assert feedClient.fetch_json_cached(url) == (stations("1", "2"), False)
+    stub.at = 300
+    assert feedClient.fetch_json_cached(url) == (stations("1", "2", "3"), True)
+    stub.at = 10  # before the archive starts
+    with pytest.raises(Exception):
+        feedClient.fetch_json_cached(stub.url("complexesFeed"))
+
+
+def test_replayed_stages_skip_until_their_feed_changes(archive, tmp_path, monkeypatch):
+    monkeypatch.setattr(feedClient, "CACHE_DIR", str(tmp_path / "cache"))
+    for variable in PIPELINE_FEEDS.values():
+        monkeypatch.setenv(variable, "")  # run_worker points these at its stub server
+    ran = []
+
+    def write(name):
+        path = tmp_path / f"{name}.json"
+
+        def func(data):
+            ran.append((name, data))
+            path.write_text(json.dumps(data))
+        return stage(name, func, inputs=[name], files=[path])
+
+    def build_stages(stream_equipment=False):
+        fetch = lambda: updateData.download_feeds({feed: {"url": os.environ[variable]} for feed, variable in PIPELINE_FEEDS.items()})
+        return [stage("fetchFeeds", fetch, outputs=list(PIPELINE_FEEDS)), write("stationsFeed"), write("equipmentFeed")]
+
+    monkeypatch.setattr(updateData, "build_stages", build_stages)
+    result_path = tmp_path / "replay.json"
+    run_worker(str(result_path), archive.dir, 0, None, None, None, False)
+
+    assert ran == [
+        ("stationsFeed", stations("1", "2")),
+        ("equipmentFeed", equipment()),
+        ("equipmentFeed", equipment("EL101")),  # 200: stations came back 304, so its stage was skipped
+        ("stationsFeed", stations("1", "2", "3")),  # 300: the new stations hash re-runs it
+    ]
+    summary = json.loads(result_path.read_text())
+    assert summary["snapshots"] == 3 and summary["replayed_seconds"] == 200
+    assert set(summary["stages"]) == {"fetchFeeds", "stationsFeed", "equipmentFeed"}
+
+
+def test_paced_releases_snapshots_on_the_sped_up_schedule():
+    snapshots = [(0, "a"), (36, "b"), (72, "c")]  # 10 ms apart at 3600×
+    started = time.perf_counter()
+    assert [snapshot for snapshot, _ in paced(snapshots, 3600)] == snapshots
+    assert time.perf_counter() - started >= 0.02
+
+    started = time.perf_counter()
+    released = list(paced([(0, "a"), (3600, "b")], 0))
+    assert [snapshot for snapshot, _ in released] == [(0, "a"), (3600, "b")]
+    assert time.perf_counter() - started < 1 and all(lag < 0.1 for _, lag in released)
+
+
+def test_percentile_and_summary():
+    assert percentile([], 50) is None
+    assert percentile([4, 1, 3, 2, 5], 50) == 3
+    assert percentile([4, 1, 3, 2, 5], 99) == 5
+    assert percentile([7], 95) == 7
+
+    summary = summarize([0.001, 0.003, 0.002], [0.0, 0.01, 0.0], 2.0, 240)
+    assert summary["snapshots"] == 3 and summary["throughput_per_second"] == 1.5
+    assert summary["latency_ms"]["p50"] == pytest.approx(2.0) and summary["latency_ms"]["max"] == pytest.approx(3.0)
+    assert summary["max_lag_ms"] == pytest.approx(10.0)
+    assert summary["min_poll_interval_seconds"] == 0.003
+
+    empty = summarize([], [], 0.0, 0.0)
+    assert empty["throughput_per_second"] is None and empty["latency_ms"]["mean"] is None and empty["max_lag_ms"] is None
+    replayFeeds.print_summary("outages", empty)  # reports there was nothing to replay rather than failing
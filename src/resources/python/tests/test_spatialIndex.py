@@ -0,0 +1,24 @@
+from spatialIndex import GridIndex, validate_elevator_coordinates
+
+
+def elevator(elevatorno, complex_id, coordinates):
+    return {"type": "Feature", "geometry": {"type": "Point", "coordinates": coordinates},
+            "properties": {"elevatorno": elevatorno, "complexID": complex_id}}
+
+
+def test_validate_elevator_coordinates_reports_each_problem_once():
+    complexes = GridIndex([("611", -73.9870, 40.7553), ("610", -73.9904, 40.7506)])
+    elevators = {"features": [
+        elevator("EL101", "611", [-73.9871, 40.7552]),
+        elevator("EL102", "611", [None, None]),
+        elevator("EL103", "611", [-73.9903, 40.7507]),
+        elevator("EL104", "999", [-73.9871, 40.7552]),
+        elevator("EL105", "610", [None, None]),
+    ]}
+
+    problems = validate_elevator_coordinates(elevators, complexes)
+
+    assert [(p["elevatorno"], p["issue"]) for p in problems if p["issue"] == "missing coordinates"] == [
+        ("EL102", "missing coordinates"), ("EL105", "missing coordinates")]
+    assert {p["elevatorno"] for p in problems} == {"EL102", "EL103", "EL104", "EL105"}
+    assert next(p for p in problems if p["elevatorno"] == "EL104")["nearest"] == "611"
@@ -0,0 +1,76 @@
+import builtins
+import json
+
+import pytest
+
+import stageMetrics
+from stageMetrics import StageMetrics, count_records
+
+
+def collection(n):
+    return {"type": "FeatureCollection", "features": [{"type": "Feature", "properties": {}}] * n}
+
+
+def run_stages(metrics):
+    with metrics.measure("updateMTAStations", inputs=[collection(3), [1, 2]]) as record:
+        record["outputs"] = [collection(4)]
+    metrics.skipped("vectorTiles")
+
+
+def test_count_records():
+    assert count_records(collection(3)) == 3
+    assert count_records([1, 2]) == 2
+    assert count_records({"a": 1}) == 1
+    assert count_records("text") is None
+
+
+def test_measure_records_each_stage(tmp_path):
+    metrics = StageMetrics()
+    run_stages(metrics)
+
+    stage, skipped = metrics.stages
+    assert (stage["stage"], stage["records_in"], stage["records_out"]) == ("updateMTAStations", 5, 4)
+    assert stage["wall_seconds"] >= 0 and stage["peak_rss_bytes"] > 0
+    assert skipped == {"stage": "vectorTiles", "skipped": True}
+
+    with open(metrics.write_json(str(tmp_path)), encoding="utf-8") as f:
+        assert json.load(f)["stages"] == metrics.stages
+
+
+def test_prometheus_textfile_with_a_bare_filename(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    metrics = StageMetrics()
+    run_stages(metrics)
+
+    assert metrics.write_prometheus("transit.prom") == "transit.prom"
+    text = (tmp_path / "transit.prom").read_text()
+    assert 'transit_pipeline_stage_records_out{stage="updateMTAStations"} 4' in text
+    assert 'transit_pipeline_stage_skipped{stage="vectorTiles"} 1' in text
+    assert not (tmp_path / "transit.prom.tmp").exists()
+
+
+@pytest.fixture
+def no_proc(monkeypatch):
+    """A system without /proc (macOS, say): every /proc/self file fails to open."""
+    real_open = builtins.open
+
+    def open_without_proc(file, *args, **kwargs):
+        if str(file).startswith("/proc/"):
+            raise FileNotFoundError(file)
+        return real_open(file, *args, **kwargs)
+
+    monkeypatch.setattr(builtins, "open", open_without_proc)
+
+
+def test_counters_fall_back_without_proc(no_proc):
+    assert stageMetrics._io_counters() is None
+    assert stageMetrics._reset_peak_rss() is False
+    assert stageMetrics._current_peak_rss() == stageMetrics.peak_rss_bytes()
+
+    metrics = StageMetrics()
+    run_stages(metrics)
+    stage = metrics.stages[0]
+    assert "bytes_read" not in stage and "bytes_written" not in stage
+    assert stage["peak_rss_scope"] == "process"
+    assert metrics.run_record()["bytes_read"] is None
+    assert "transit_pipeline_stage_bytes_read{" not in metrics.prometheus_text()
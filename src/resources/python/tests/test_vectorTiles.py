@@ -0,0 +1,109 @@
+import gzip
+import json
+import struct
+
+import pytest
+
+import vectorTiles
+from vectorTiles import _parse_directory, _serialize_directory, build_tiles, metadata_json, pmtiles_archive, read_tile, tile_id
+
+BOUNDS = (-74.05, 40.6, -73.75, 40.9)
+
+
+@pytest.mark.parametrize("zxy, expected", [
+    ((0, 0, 0), 0), ((1, 0, 0), 1), ((1, 0, 1), 2), ((1, 1, 1), 3), ((1, 1, 0), 4), ((2, 0, 0), 5),
+    ((12, 3423, 1763), 19078479),
+])
+def test_tile_id_matches_the_spec(zxy, expected):
+    assert tile_id(*zxy) == expected
+
+
+def test_tile_ids_are_unique_and_ordered_by_zoom():
+    ids = [tile_id(z, x, y) for z in range(5) for x in range(1 << z) for y in range(1 << z)]
+    assert sorted(ids) == list(range(len(ids)))
+    assert max(tile_id(3, x, y) for x in range(8) for y in range(8)) < tile_id(4, 0, 0)
+
+
+def test_directory_round_trip():
+    entries = [
+        (5, 0, 100, 1),
+        (6, 100, 50, 3),      # contiguous with the previous entry, stored as offset 0
+        (20, 0, 100, 1),      # points back at the first tile's data
+        (21, 150, 7, 1),
+        (300000, 157, 2000, 0),
+    ]
+    assert _parse_directory(gzip.decompress(_serialize_directory(entries))) == entries
+    assert _parse_directory(gzip.decompress(_serialize_directory([]))) == []
+
+
+def tiles_for(n, distinct=3):
+    """n tiles at z8, cycling through `distinct` payloads so both runs and shared data show up."""
+    return {(8, i % 256, i // 256): gzip.compress(f"tile {i % distinct}".encode(), mtime=0) for i in range(n)}
+
+
+def header(archive):
+    return struct.unpack("<7sB8Q3Q4B2B4iB2i", archive[:127])
+
+
+def test_read_tile_finds_every_tile_and_nothing_else():
+    tiles = tiles_for(40)
+    tiles.update({(8, 100, 100): tiles[(8, 0, 0)], (8, 100, 101): tiles[(8, 0, 0)]})
+    archive = pmtiles_archive(tiles, {"name": "test"}, BOUNDS, 8, 8)
+
+    fields = header(archive)
+    assert fields[:2] == (b"PMTiles", 3)
+    assert fields[10] == len(tiles)  # addressed tiles
+    assert fields[12] == 3  # tile contents, each stored once
+    metadata = archive[fields[4]:fields[4] + fields[5]]
+    assert json.loads(gzip.decompress(metadata)) == {"name": "test"}
+
+    for zxy, content in tiles.items():
+        assert read_tile(archive, *zxy) == content
+    assert read_tile(archive, 8, 200, 200) is None
+    assert read_tile(archive, 7, 0, 0) is None
+    assert read_tile(archive, 9, 0, 0) is None
+
+
+def test_read_tile_through_leaf_directories(monkeypatch):
+    monkeypatch.setattr(vectorTiles, "ROOT_DIRECTORY_BUDGET", 200)
+    tiles = tiles_for(5000, distinct=5000)
+    archive = pmtiles_archive(tiles, {}, BOUNDS, 8, 8)
+
+    fields = header(archive)
+    assert fields[7] > 0  # leaf directories were written
+    assert fields[3] <= 200
+    for zxy in [(8, 0, 0), (8, 255, 0), (8, 17, 9), (8, 135, 19)]:
+        assert read_tile(archive, *zxy) == tiles[zxy]
+    assert read_tile(archive, 8, 200, 200) is None
+
+
+def point(lon, lat, **properties):
+    return {"type": "Feature", "geometry": {"type": "Point", "coordinates": [lon, lat]}, "properties": properties}
+
+
+DATASETS = {
+    "complexGeometry": {"features": [point(-73.9869, 40.7553, complex_id="611")]},
+    "stationGeometry": {"features": [point(-73.9869, 40.7553, station_id="1")]},
+    "outages": {"features": [point(-73.9870, 40.7554, elevatorno="EL101", isBroken=True),
+                             point(-73.9000, 40.8000, elevatorno="EL102", isBroken=False)]},
+    "elevators": {"features": [point(-73.9870, 40.7554, elevatorno="EL101", isStreet="Y", complexID="611", directionLabel=None)]},
+    "streetLines": {"features": [{"type": "Feature", "properties": {"elevator_no": "EL101", "complex_id": 611, "side": 1.5},
+                                  "geometry": {"type": "LineString", "coordinates": [[-73.9870, 40.7554], [-73.9869, 40.7553]]}}]},
+}
+
+
+def test_metadata_field_types_follow_the_values():
+    layers = {layer["id"]: layer["fields"] for layer in metadata_json(DATASETS)["vector_layers"]}
+    assert layers["elevator_outages"] == {"elevatorno": "String", "isBroken": "Boolean"}
+    assert layers["nyc_transit_elevators"]["directionLabel"] == "String"
+    assert layers["elevator_to_complex_line_connect"] == {
+        "elevator_no": "String", "complex_id": "Number", "station_name": "String", "side": "Number"}
+
+
+def test_built_tiles_round_trip_through_the_archive():
+    tiles = build_tiles(DATASETS)
+    archive = pmtiles_archive(tiles, metadata_json(DATASETS), BOUNDS)
+    assert {z for z, _, _ in tiles} == set(range(vectorTiles.MIN_ZOOM, vectorTiles.MAX_ZOOM + 1))
+    for zxy, content in tiles.items():
+        assert read_tile(archive, *zxy) == content
+    assert b"elevator_outages" in gzip.decompress(tiles[max(tiles)])
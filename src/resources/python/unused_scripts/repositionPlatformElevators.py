@@ -2,6 +2,11 @@
 
 import json
 import os
+import sys
+
+# Shared direction classification lives with the pipeline scripts
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "individual_scripts"))
+from elevatorClassifier import direction_rank
 
 # Load the input elevator dataset
 with open("../../custom_dataset.json", "r") as f:
@@ -14,20 +19,8 @@ with open(os.path.join("..", "..", "accessibleStationGeometry.json"), "r") as f:
 # Offset to stack elevators vertically
 VERTICAL_OFFSET = 0.000100
 
-# Direction keywords interpreted as "uptown"
-UPTOWN_TERMS = [
-    "uptown", "bronx-bound", "queens-bound", "northbound"
-]
-
-def is_uptown(direction):
-    if not direction:
-        return False
-    direction = direction.strip().lower()
-    return any(term in direction for term in UPTOWN_TERMS)
-
 def sort_key(elevator):
-    dir_label = elevator["properties"].get("directionLabel", "")
-    return 0 if is_uptown(dir_label) else 1
+    return direction_rank(elevator["properties"].get("directionLabel", ""))
 
 def get_primary_station_id(station_id_raw):
     return str(station_id_raw).split("/")[0].strip()
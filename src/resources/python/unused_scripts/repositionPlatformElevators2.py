@@ -2,6 +2,12 @@
 
 import json
 import os
+import sys
+
+# Shared placement engine and direction classification live with the pipeline scripts
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "individual_scripts"))
+from elevatorClassifier import direction_rank
+from elevatorPlacement import stack_under_complexes
 
 # Load the input elevator dataset
 with open("../../custom_dataset.json", "r") as f:
@@ -20,17 +26,8 @@ complex_lookup = {
 # Offset to stack elevators vertically
 VERTICAL_OFFSET = 0.000100
 
-UPTOWN_TERMS = ["uptown", "bronx-bound", "queens-bound", "northbound"]
-
-def is_uptown(direction):
-    if not direction:
-        return False
-    direction = direction.strip().lower()
-    return any(term in direction for term in UPTOWN_TERMS)
-
 def sort_key(elevator):
-    dir_label = elevator["properties"].get("directionLabel", "")
-    return 0 if is_uptown(dir_label) else 1
+    return direction_rank(elevator["properties"].get("directionLabel", ""))
 
 def get_primary_complex_id(complex_id_raw):
     return str(complex_id_raw).split("/")[0].strip()
@@ -49,21 +46,23 @@ for feature in data["features"]:
     complex_id = get_primary_complex_id(complex_id_raw)
     complex_elevator_map.setdefault(complex_id, []).append(feature)
 
-# Reposition elevators
+# Reposition elevators, all complexes in one batch
+placed = []
 for complex_id, elevators in complex_elevator_map.items():
     if complex_id not in complex_lookup:
         print(f"⚠️ Skipping {complex_id}: no complexCoordinates found.")
         continue
-
     coords = complex_lookup[complex_id]["geometry"]["coordinates"]
-    base_lng = coords[0]
-    base_lat = coords[1] - 2 * VERTICAL_OFFSET
-
-    sorted_elevators = sorted(elevators, key=sort_key)
-
-    for idx, elevator in enumerate(sorted_elevators):
-        new_lat = base_lat - (idx * VERTICAL_OFFSET)
-        elevator["geometry"]["coordinates"] = [base_lng, new_lat]
+    placed.extend((elevator, complex_id, coords) for elevator in elevators)
+
+new_coords = stack_under_complexes(
+    [coords for _, _, coords in placed],
+    [complex_id for _, complex_id, _ in placed],
+    [sort_key(elevator) for elevator, _, _ in placed],
+    offset_step=VERTICAL_OFFSET,
+)
+for (elevator, _, _), coords in zip(placed, new_coords):
+    elevator["geometry"]["coordinates"] = coords
 
 # Save updated dataset
 with open("../../custom_dataset_repositioned.json", "w") as f:
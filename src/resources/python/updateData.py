@@ -1,9 +1,259 @@
-import subprocess
-
-subprocess.run(["python3", "individual_scripts/updateMTAStations.py"], check=True)
-subprocess.run(["python3", "individual_scripts/updateMTAComplexes.py"], check=True)
-subprocess.run(["python3", "individual_scripts/updateElevators.py"], check=True)
-subprocess.run(["python3", "individual_scripts/outageGeojsonParser.py"], check=True)
-subprocess.run(["python3", "individual_scripts/writeStationCoords.py"], check=True)
-subprocess.run(["python3", "individual_scripts/writeComplexCoords.py"], check=True)
-subprocess.run(["python3", "individual_scripts/elevatorToComplexConnector.py"], check=True)
\ No newline at end of file
+import argparse
+import contextlib
+import functools
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+THIS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(THIS_DIR, "individual_scripts"))
+
+import agencyAdapters
+import alertsSnapshot
+import feedClient
+from feedClient import fetch_all, fetch_all_cached
+import outputFormats
+import pipelineRunner
+from pipelineRunner import stage, run_pipeline, unchanged
+import stageMetrics
+import updateMTAStations
+import updateMTAComplexes
+import updateElevators
+import outageGeojsonParser
+import writeStationCoords
+import writeComplexCoords
+import elevatorToComplexConnector
+import vectorTiles
+import dbSync
+import feedArchive
+from featureStore import STORE_FILE
+
+
+FEED_NAMES = ["stationsFeed", "complexesFeed", "equipmentFeed"]
+LOG_DIR = os.path.join(THIS_DIR, ".cache", "logs")  # per-agency output of parallel runs
+
+
+def download_feeds(feeds, use_cache=True):
+    if not use_cache:
+        results = fetch_all(feeds)
+        return tuple(results[name] for name in feeds)
+
+    # Conditional requests: a 304 marks the feed unchanged so every stage that only depends on it is skipped
+    results = fetch_all_cached(feeds)
+    outputs = []
+    for name in feeds:
+        data, changed = results[name]
+        print(f"  {name}: {'updated' if changed else 'not modified (304)'}")
+        outputs.append(data if changed else unchanged(data))
+    return tuple(outputs)
+
+
+def fetch_feeds(use_cache=True, stream_equipment=False):
+    # All three downloads share one pooled session and run concurrently, so the slowest feed sets the wall time
+    print(f"\n** 🌐 [0] FETCH FEEDS 🌐 **\nDownloading stations, complexes and equipment feeds...")
+    feeds = {
+        "stationsFeed": updateMTAStations.station_feed(),
+        "complexesFeed": updateMTAComplexes.complex_feed(),
+        "equipmentFeed": updateElevators.equipment_feed(),
+    }
+    if not stream_equipment:
+        return download_feeds(feeds, use_cache)
+
+    # Parse the equipment feed record-by-record on its own thread while the other feeds download
+    del feeds["equipmentFeed"]
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        equipment = pool.submit(updateElevators.stream_latest_equipment)
+        return (*download_feeds(feeds, use_cache), equipment.result())
+
+
+# Every individual script runs as a stage in this one process; datasets are parsed once and passed along in memory
+def build_stages(force=False, stream_equipment=False, store_path=None, sync_db=False, archive_dir=None, archive_keep_days=None):
+    if stream_equipment:
+        # fetchFeeds already hands over the filtered ADA elevators, so there is no separate equipment stage
+        fetch_stage = stage("fetchFeeds", functools.partial(fetch_feeds, use_cache=not force, stream_equipment=True),
+                            outputs=["stationsFeed", "complexesFeed", "equipment"])
+        equipment_stages = []
+    else:
+        fetch_stage = stage("fetchFeeds", functools.partial(fetch_feeds, use_cache=not force),
+                            outputs=FEED_NAMES)
+        equipment_stages = [
+            stage("fetchEquipment", updateElevators.fetch_latest_equipment,
+                  inputs=["equipmentFeed"], outputs=["equipment"], files=[updateElevators.MTA_EQUIP_FILE]),
+        ]
+
+    stages = [
+        fetch_stage,
+        stage("updateMTAStations", updateMTAStations.fetch_latest_station_data,
+              inputs=["stationsFeed"], outputs=["stations"], files=[updateMTAStations.STATIONS_FILE]),
+        stage("updateMTAComplexes", updateMTAComplexes.fetch_latest_complex_data,
+              inputs=["complexesFeed"], outputs=["complexes"], files=[updateMTAComplexes.COMPLEXES_FILE]),
+        *equipment_stages,
+        stage("updateElevators", functools.partial(updateElevators.update_elevators, store_path=store_path),
+              inputs=["equipment", "stations", "complexes", "elevators"], outputs=["elevators"],
+              files=[updateElevators.CUSTOM_ELEVATOR_FILE]),
+        stage("outageGeojsonParser", functools.partial(outageGeojsonParser.write_outage_geometry, force=force),
+              inputs=["elevators", "complexes"], outputs=["outages"],
+              files=[outageGeojsonParser.INPUT_OUTAGE_DATASET, outageGeojsonParser.OUTPUT_DATASET, outageGeojsonParser.OUTPUT_JS]),
+        stage("writeStationCoords", functools.partial(writeStationCoords.write_station_coords, force=force),
+              inputs=["stations"], outputs=["stationGeometry"],
+              files=[writeStationCoords.output_geojson, writeStationCoords.output_json, writeStationCoords.output_js]),
+        stage("writeComplexCoords", functools.partial(writeComplexCoords.write_complex_coords, force=force),
+              inputs=["complexes"], outputs=["complexGeometry"],
+              files=[writeComplexCoords.output_geojson, writeComplexCoords.output_json, writeComplexCoords.output_js]),
+        stage("elevatorToComplexConnector", functools.partial(elevatorToComplexConnector.write_street_to_complex_lines, force=force),
+              inputs=["elevators", "complexes"], outputs=["streetLines"], files=[elevatorToComplexConnector.OUTPUT_FILE]),
+        stage("vectorTiles", functools.partial(vectorTiles.write_vector_tiles, force=force),
+              inputs=["elevators", "outages", "stationGeometry", "complexGeometry", "streetLines"], outputs=["vectorTiles"],
+              files=[vectorTiles.OUTPUT_FILE]),
+        # Reads only the alert files, so it always runs; the snapshot is rewritten only when the alerts changed
+        stage("alertsSnapshot", functools.partial(alertsSnapshot.write_alerts_snapshot, force=force), outputs=["alerts"]),
+    ]
+    if archive_dir:
+        # Feeds that came back 304 arrive as their cached copy, which the archive already holds, so they cost an index lookup
+        if stream_equipment:
+            # The streamed equipment feed is only on disk; "equipment" just orders this stage after the download
+            archive = functools.partial(archive_streamed_feeds, archive_dir=archive_dir, keep_days=archive_keep_days)
+            stages.append(stage("archiveFeeds", archive, inputs=["stationsFeed", "complexesFeed", "equipment"]))
+        else:
+            archive = functools.partial(feedArchive.archive_feeds, names=FEED_NAMES, archive_dir=archive_dir, keep_days=archive_keep_days)
+            stages.append(stage("archiveFeeds", archive, inputs=FEED_NAMES))
+    if sync_db:
+        # Sends the rows that differ from the last successful sync; a failed sync fails the run, so the feeds are fetched and synced again
+        stages.append(stage("syncDatabase", dbSync.sync_database,
+                            inputs=["stations", "complexes", "elevators"]))
+    return stages
+
+
+def archive_streamed_feeds(stations_feed, complexes_feed, equipment, archive_dir, keep_days=None):
+    equipment_feed = pipelineRunner.load_json(updateElevators.MTA_EQUIP_FILE)
+    feedArchive.archive_feeds(stations_feed, complexes_feed, equipment_feed, names=FEED_NAMES, archive_dir=archive_dir, keep_days=keep_days)
+
+
+def run_agency(agency, options, log_path=None):
+    """
+    Build one agency's datasets from start to finish and return the wall time.
+    With several agencies each call runs in its own worker process, so
+    use_agency() can point the stages at the agency's partition without
+    affecting the others.
+    """
+    with agencyAdapters.use_agency(agency):
+        outputFormats.configure(*options["formats"])
+        partition = functools.partial(agencyAdapters.partition_path, agency=agency)
+        primary = agency == agencyAdapters.PRIMARY_AGENCY
+        # The feature store, database and size report only cover the app's own (primary) datasets
+        stage_options = options["stages"] if primary else {**options["stages"], "store_path": None, "sync_db": False}
+        if stage_options["archive_dir"]:
+            stage_options = {**stage_options, "archive_dir": partition(stage_options["archive_dir"])}
+
+        start = time.perf_counter()
+        with open(log_path, "w", encoding="utf-8") if log_path else contextlib.nullcontext() as log, \
+                contextlib.redirect_stdout(log) if log else contextlib.nullcontext():
+            metrics = None
+            if options["metrics"] or options["prometheus"] or options["profile"]:
+                metrics = stageMetrics.StageMetrics(options["profile"] and partition(options["profile"]))
+            # The feed cache only records this run's downloads once every stage built from them has succeeded
+            with feedClient.deferred_cache():
+                run_pipeline(build_stages(**stage_options), force=stage_options["force"], metrics=metrics)
+            if metrics is not None:
+                stageMetrics.print_metrics(metrics)
+                if options["metrics"]:
+                    print(f"📊 Run record saved to {metrics.write_json(partition(options['metrics']))}")
+                if options["prometheus"]:
+                    print(f"📊 Prometheus metrics saved to {metrics.write_prometheus(partition(options['prometheus']))}")
+            if options["size_report"] and primary:
+                outputFormats.print_size_report(outputFormats.size_report())
+        return time.perf_counter() - start
+
+
+def run_agencies(agencies, options, workers=None):
+    """Run the agencies in parallel worker processes, then print each one's output in turn. Returns the agencies that failed."""
+    logs = {agency: agencyAdapters.partition_path(os.path.join(LOG_DIR, "updateData.log"), agency) for agency in agencies}
+    for path in logs.values():
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    results = {}
+    with ProcessPoolExecutor(max_workers=workers or len(agencies)) as pool:
+        futures = {agency: pool.submit(run_agency, agency, options, logs[agency]) for agency in agencies}
+        for agency, future in futures.items():
+            try:
+                results[agency] = future.result()
+            except Exception as e:
+                results[agency] = e
+
+    for agency in agencies:
+        print(f"\n** 🏙️ AGENCY: {agency} 🏙️ **")
+        if os.path.exists(logs[agency]):
+            with open(logs[agency], "r", encoding="utf-8") as f:
+                print(f.read(), end="")
+
+    print(f"\n** 🏙️ AGENCIES 🏙️ **")
+    for agency, result in results.items():
+        status = f"❌ {type(result).__name__}: {result}" if isinstance(result, Exception) else f"✅ {result:.1f} s"
+        print(f"  {agency:<12} {status}")
+    return [agency for agency, result in results.items() if isinstance(result, Exception)]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Refresh Transit Access datasets from the MTA feeds.")
+    parser.add_argument("--agency", action="append", choices=sorted(agencyAdapters.ADAPTERS),
+                        help="agency to build (repeatable; default: %s). Several run in parallel worker processes, "
+                             "each writing to its own agencies/<agency>/ partition" % agencyAdapters.PRIMARY_AGENCY)
+    parser.add_argument("--workers", type=int,
+                        help="worker processes when building several agencies (default: one per agency)")
+    parser.add_argument("--force", action="store_true",
+                        help="download full feeds and rebuild every output, even when nothing changed upstream")
+    parser.add_argument("--stream-equipment", action="store_true",
+                        help="parse the equipment feed incrementally while it downloads instead of buffering it")
+    parser.add_argument("--store", nargs="?", const=STORE_FILE, metavar="PATH",
+                        help="write new elevators through the SQLite feature store instead of rewriting the dataset")
+    parser.add_argument("--sync-db", action="store_true",
+                        help="send changed rows to the database at $SUPABASE_DB_URL after the refresh")
+    parser.add_argument("--archive", nargs="?", const=feedArchive.ARCHIVE_DIR, metavar="DIR",
+                        help="keep every raw feed snapshot in a compressed, content-addressed archive in DIR")
+    parser.add_argument("--archive-keep-days", type=float, default=feedArchive.KEEP_DAYS,
+                        help="drop archived snapshots older than this many days (default: keep everything)")
+    parser.add_argument("--replay", nargs="?", const=feedArchive.ARCHIVE_DIR, metavar="DIR",
+                        help="instead of fetching, replay every feed change in the archive in DIR through a throwaway "
+                             "copy of the pipeline and report per-snapshot latency (see replayFeeds.py)")
+    parser.add_argument("--replay-speed", type=float, default=60.0,
+                        help="replay speed as a multiple of real time; 0 for as fast as possible (default: %(default)g)")
+    parser.add_argument("--metrics", nargs="?", const=stageMetrics.METRICS_DIR, metavar="DIR",
+                        help="record per-stage wall/CPU time, I/O, record counts and peak RSS as a JSON run record in DIR")
+    parser.add_argument("--prometheus", metavar="PATH",
+                        help="also write the stage metrics as a Prometheus textfile (node_exporter textfile collector)")
+    parser.add_argument("--profile", nargs="?", const=stageMetrics.PROFILE_DIR, metavar="DIR",
+                        help="cProfile every stage and save <stage>.prof files in DIR")
+    parser.add_argument("--format", choices=outputFormats.FORMATS,
+                        help="serialization for generated JSON/GeoJSON/TS files (default: pretty)")
+    parser.add_argument("--precision", type=int,
+                        help="round generated coordinates to this many decimal places")
+    parser.add_argument("--binary", action="store_true",
+                        help="also write a compact binary .bin copy of every generated GeoJSON")
+    parser.add_argument("--ts-format", choices=outputFormats.TS_FORMATS,
+                        help="TS coordinate lookups as inline objects or packed, lazily loaded per-borough chunks (default: object)")
+    parser.add_argument("--size-report", action="store_true",
+                        help="print a size comparison of the generated GeoJSON across formats")
+    args = parser.parse_args()
+    if (args.binary or args.size_report) and args.precision is not None and args.precision > outputFormats.MAX_BINARY_PRECISION:
+        parser.error(f"--precision above {outputFormats.MAX_BINARY_PRECISION} does not fit the binary format")
+
+    if args.replay:
+        from replayFeeds import print_summary, replay_pipeline
+        print_summary("pipeline", replay_pipeline(args.replay, args.replay_speed, stream_equipment=args.stream_equipment))
+        sys.exit(0)
+
+    options = {
+        "stages": {"force": args.force, "stream_equipment": args.stream_equipment, "store_path": args.store, "sync_db": args.sync_db,
+                   "archive_dir": args.archive, "archive_keep_days": args.archive_keep_days},
+        "formats": (args.format, args.precision, args.binary or None, args.ts_format),
+        "metrics": args.metrics,
+        "prometheus": args.prometheus,
+        "profile": args.profile,
+        "size_report": args.size_report,
+    }
+    agencies = list(dict.fromkeys(args.agency or [agencyAdapters.PRIMARY_AGENCY]))
+    if len(agencies) == 1:
+        run_agency(agencies[0], options)
+    elif run_agencies(agencies, options, args.workers):
+        sys.exit(1)
@@ -1782,4 +1782,8 @@ export const complexCoordinates: Record<string, [number, number]> = {
   ]
 };
 
+// Everything is inline, so this resolves at once; the packed format imports its chunks here
+export const loadComplexCoordinates = (_chunks?: string[]) => Promise.resolve(complexCoordinates);
+export const loadComplexCoordinatesInView = (_view?: [number, number, number, number]) => Promise.resolve(false);
+
 export default complexCoordinates;
\ No newline at end of file
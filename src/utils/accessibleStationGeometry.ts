@@ -678,4 +678,8 @@ export const stationCoordinates: Record<string, [number, number]> = {
   ]
 };
 
+// Everything is inline, so this resolves at once; the packed format imports its chunks here
+export const loadStationCoordinates = (_chunks?: string[]) => Promise.resolve(stationCoordinates);
+export const loadStationCoordinatesInView = (_view?: [number, number, number, number]) => Promise.resolve(false);
+
 export default stationCoordinates;
\ No newline at end of file
@@ -396,11 +396,9 @@ export function getComplexOutageLayerFeatures(outStationArray) {
 
     const totalAdaStations = adaStationIDs.length;
 
+    // undefined until a packed coordinate chunk has loaded; the layer is redrawn once it has
     const geometry = complexCoordinates[complexID];
-    if (!geometry) {
-      console.warn(`Missing complex geometry for complexID ${complexID}`);
-      continue;
-    }
+    if (!geometry) continue;
 
     const ada = concatenateADA(stationIDs, stationsDataset);
     const route = concatenateRoutes(stationIDs, stationsDataset);
@@ -924,16 +922,23 @@ export function lookAtElevator(
 ) {
   if (!map || typeof map.flyTo !== "function") return;
 
-  setElevatorView(elevatorNo);
-
   const MAX_DISTANCE = 0.0007; // max distance an elevator can be from a complex before changing zoom/pitch
   const complexID = getComplexIDByElevatorNo(elevatorNo);
+  // undefined while a packed coordinate chunk has not loaded; look at the elevator itself then
   const complexCoords = complexCoordinates[complexID];
+  const center = complexCoords ?? elevatorCoords;
+  if (!center) {
+    console.warn("lookAtElevator: no coordinates yet for", elevatorNo);
+    return;
+  }
+
+  setElevatorView(elevatorNo);
+
   let baseZoom = 19;
   let pitch = 60;
   let bearing = 0;
 
-  if (elevatorCoords) {
+  if (elevatorCoords && complexCoords) {
     const deltaLng = elevatorCoords[0] - complexCoords[0];
     const deltaLat = elevatorCoords[1] - complexCoords[1];
 
@@ -948,7 +953,7 @@ export function lookAtElevator(
 
   const adjustedCenter = adjustCenter3D(
     map,
-    [complexCoords[0], complexCoords[1]],
+    [center[0], center[1]],
     0
   );
 
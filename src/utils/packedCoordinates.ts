@@ -0,0 +1,80 @@
+// utils/packedCoordinates.ts
+// runtime for the "packed" coordinate modules written by updateData.py --ts-format packed.
+// each chunk is a list of IDs plus one Float64Array of lon/lat pairs, imported the first time it is needed
+
+export type CoordinateChunk = {
+  ids: string[];
+  coords: Float64Array;
+};
+
+export type ChunkLoaders = Record<string, () => Promise<CoordinateChunk>>;
+
+// [west, south, east, north] in degrees, as written for each chunk and as read off a map view
+export type Bounds = [number, number, number, number];
+
+export class PackedCoordinates {
+  // ID -> [chunk coords, index of its lon]
+  private index = new Map<string, [Float64Array, number]>();
+
+  add(chunk: CoordinateChunk) {
+    chunk.ids.forEach((id, i) => this.index.set(id, [chunk.coords, 2 * i]));
+  }
+
+  get(id: string): [number, number] | undefined {
+    const entry = this.index.get(id);
+    if (!entry) return undefined;
+    const [coords, i] = entry;
+    return [coords[i], coords[i + 1]];
+  }
+
+  has(id: string) {
+    return this.index.has(id);
+  }
+
+  keys() {
+    return Array.from(this.index.keys());
+  }
+}
+
+const overlaps = (a: Bounds, b: Bounds) => a[0] <= b[2] && b[0] <= a[2] && a[1] <= b[3] && b[1] <= a[3];
+
+// Wraps the chunk loaders in a load() that imports each chunk once, a loadInView() that imports the chunks
+// whose bounds overlap a map view (chunks without bounds always count), and a record that reads like the
+// old inline Record<string, [number, number]> (lookups, Object.keys/entries) over whatever has loaded so far
+export function lazyCoordinates(loaders: ChunkLoaders, bounds: Record<string, Bounds | null> = {}) {
+  const packed = new PackedCoordinates();
+  const pending = new Map<string, Promise<void>>();
+
+  const record = new Proxy({} as Record<string, [number, number]>, {
+    get: (_, id) => (typeof id === "string" ? packed.get(id) : undefined),
+    has: (_, id) => typeof id === "string" && packed.has(id),
+    ownKeys: () => packed.keys(),
+    getOwnPropertyDescriptor: (_, id) =>
+      typeof id === "string" && packed.has(id)
+        ? { value: packed.get(id), enumerable: true, configurable: true }
+        : undefined,
+  });
+
+  async function load(chunks: string[] = Object.keys(loaders)) {
+    await Promise.all(
+      chunks
+        .filter((chunk) => chunk in loaders)
+        .map((chunk) => {
+          if (!pending.has(chunk)) pending.set(chunk, loaders[chunk]().then((m) => packed.add(m)));
+          return pending.get(chunk);
+        }),
+    );
+    return record;
+  }
+
+  // resolves to true when a chunk was imported for the first time, i.e. the record gained IDs
+  async function loadInView(view: Bounds) {
+    const chunks = Object.keys(loaders).filter(
+      (chunk) => !pending.has(chunk) && (!bounds[chunk] || overlaps(bounds[chunk], view)),
+    );
+    await load(chunks);
+    return chunks.length > 0;
+  }
+
+  return { load, loadInView, record };
+}